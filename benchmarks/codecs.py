@@ -0,0 +1,89 @@
+"""Benchmark the compression codecs on compressible tensors: ratio, insert and read throughput."""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import tyro
+from tensordb import Database
+from tensordb.fields import TensorField
+from tensordb.storage import CODECS
+
+logger = logging.getLogger(__name__)
+
+
+def make_tensors(kind: str, num_rows: int, size: int) -> np.ndarray:
+    """Make a stack of compressible tensors, like those of typical datasets.
+
+    Args:
+        kind: "mask" for uint8 segmentation masks, "depth" for smooth float32 depth maps,
+            or "labels" for int64 label images.
+        num_rows: The number of tensors.
+        size: The height and width of every tensor.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[:size, :size]
+
+    if kind == "mask":
+        centers = rng.integers(0, size, (num_rows, 2, 1, 1))
+        radii = rng.integers(size // 8, size // 2, (num_rows, 1, 1))
+        return ((y - centers[:, 0]) ** 2 + (x - centers[:, 1]) ** 2 < radii**2).astype(np.uint8)
+
+    if kind == "depth":
+        slopes = rng.random((num_rows, 2, 1, 1), dtype=np.float32)
+        return (1 + slopes[:, 0] * y + slopes[:, 1] * x).astype(np.float32)
+
+    if kind == "labels":
+        return np.broadcast_to((y // (size // 4) * 4 + x // (size // 4)).astype(np.int64), (num_rows, size, size))
+
+    raise ValueError(f"Unknown kind of tensor {kind}")
+
+
+def directory_nbytes(path: Path) -> int:
+    """Get the total size of the files in a directory, recursively."""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def main(num_rows: int = 1_000, size: int = 128, kinds: tuple[str, ...] = ("mask", "depth", "labels")) -> None:
+    """Compare the compression ratio, insert and read throughput of every codec.
+
+    Args:
+        num_rows: The number of tensors inserted per codec.
+        size: The height and width of every tensor.
+        kinds: The kinds of tensors to benchmark, see make_tensors.
+    """
+    for kind in kinds:
+        tensors = make_tensors(kind, num_rows, size)
+        logger.info(f"{num_rows:,} {kind} tensors of {size}x{size} {tensors.dtype} ({tensors.nbytes / 2**20:.1f} MiB)")
+
+        for codec in CODECS:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db = Database("benchmark", Path(tmp_dir))
+                collection = db.collection(
+                    "bench", fields={"tensor": TensorField(tensors.dtype, (size, size), codec=codec)}
+                )
+
+                start = time.perf_counter()
+                collection.insert_columns({"tensor": tensors})
+                insert_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                collection.find().to_numpy()
+                read_seconds = time.perf_counter() - start
+
+                ratio = tensors.nbytes / directory_nbytes(db.location / "tensors")
+                db.close()
+
+            logger.info(
+                f"{codec:>14}: {ratio:8.1f}x smaller"
+                f" {tensors.nbytes / insert_seconds / 2**20:>10,.1f} MiB/s insert"
+                f" {tensors.nbytes / read_seconds / 2**20:>10,.1f} MiB/s read"
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("tensordb").setLevel(logging.WARNING)
+    tyro.cli(main)
@@ -0,0 +1,123 @@
+"""Benchmark the bulk insert paths against the old one-statement-per-row loop."""
+
+import logging
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import tyro
+from tensordb import Database
+from tensordb.collections.functions import get_collection_fields
+from tensordb.config import CONFIG
+from tensordb.fields import TensorField
+from tensordb.storage import SegmentStore, encode_shape, field_columns, prepare_tensor, tensor_statistics
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_insert(
+    collection_name: str, data: list[dict[str, Any]], cursor: sqlite3.Cursor, store: SegmentStore
+) -> None:
+    """The old insert loop: one formatted statement and one execute per row.
+
+    Args:
+        collection_name: The name of the collection.
+        data: The data to insert.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to write tensors to.
+    """
+    fields = get_collection_fields(collection_name, cursor)
+    fields.pop("id")
+
+    for row in data:
+        assert set(row.keys()) == set(fields.keys()), f"Row {row} does not have the correct fields"
+
+        columns = []
+        values = []
+        for field_name, field_type in fields.items():
+            columns.extend(field_columns(field_name, field_type))
+            if isinstance(field_type, TensorField):
+                array = prepare_tensor(field_name, row[field_name], field_type)
+                segment, offset = store.append(collection_name, array)
+                values.extend((segment, offset, array.nbytes, encode_shape(array.shape), *tensor_statistics(array)))
+            else:
+                values.append(row[field_name])
+
+        cursor.execute(
+            f"""
+            insert into {collection_name} ({", ".join(columns)})
+            values ({", ".join(["?"] * len(columns))})
+        """,
+            values,
+        )
+
+
+def time_insert(name: str, insert: Callable[[], None], num_rows: int) -> float:
+    """Time an insert function and log its throughput.
+
+    Args:
+        name: The name of the insert method.
+        insert: Function that inserts num_rows rows.
+        num_rows: The number of rows inserted.
+
+    Returns:
+        rows_per_second: The throughput of the insert method.
+    """
+    start = time.perf_counter()
+    insert()
+    elapsed = time.perf_counter() - start
+
+    rows_per_second = num_rows / elapsed
+    logger.info(f"{name:>16}: {rows_per_second:>12,.0f} rows/s ({elapsed:.3f}s)")
+
+    return rows_per_second
+
+
+def main(num_rows: int = 100_000, tensor_size: int = 16) -> None:
+    """Compare the insert throughput of the legacy loop, insert and insert_columns.
+
+    Args:
+        num_rows: The number of rows to insert with each method.
+        tensor_size: The length of the float32 tensor stored in every row.
+    """
+    fields = {"name": str, "number": int, "tensor": TensorField(dtype=np.float32, shape=(tensor_size,))}
+
+    names = [f"row{i}" for i in range(num_rows)]
+    numbers = np.arange(num_rows)
+    tensors = np.random.rand(num_rows, tensor_size).astype(np.float32)
+    rows = [{"name": names[i], "number": i, "tensor": tensors[i]} for i in range(num_rows)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database("benchmark", Path(tmp_dir))
+
+        def run_legacy() -> None:
+            db.collection("legacy", fields=fields)
+            connection = sqlite3.connect(db.location / "db.db")
+            store = SegmentStore(db.location / CONFIG.storage.tensor_dir)
+            legacy_insert("legacy", rows, connection.cursor(), store)
+            store.sync()
+            connection.commit()
+            connection.close()
+
+        def run_insert() -> None:
+            db.collection("rows", fields=fields).insert(rows)
+
+        def run_insert_columns() -> None:
+            db.collection("columns", fields=fields).insert_columns(
+                {"name": names, "number": numbers, "tensor": tensors}
+            )
+
+        logger.info(f"Inserting {num_rows:,} rows with a float32 tensor of size {tensor_size}")
+        legacy = time_insert("legacy loop", run_legacy, num_rows)
+        insert = time_insert("insert", run_insert, num_rows)
+        columns = time_insert("insert_columns", run_insert_columns, num_rows)
+
+    logger.info(f"insert is {insert / legacy:.1f}x and insert_columns is {columns / legacy:.1f}x the legacy loop")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    tyro.cli(main)
@@ -0,0 +1,288 @@
+"""Benchmark scenarios: every scenario prepares a database, and returns the operation to time."""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from tensordb import Database
+from tensordb.collections import Collection
+from tensordb.fields import TensorField
+
+# The timed operation of a scenario returns the number of rows and tensor bytes it processed
+Operation = Callable[[], tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A benchmark scenario.
+
+    Attributes:
+        name: The name of the scenario, used as its key in the results.
+        description: What the scenario measures.
+        setup: Prepares an empty database for the given scale, and returns the operation to time.
+    """
+
+    name: str
+    description: str
+    setup: Callable[[Database, float], Operation]
+
+
+def scaled(num_rows: int, scale: float) -> int:
+    """Scale a number of rows, keeping at least one row.
+
+    Args:
+        num_rows: The number of rows at scale 1.
+        scale: The scale of the benchmark.
+    """
+    return max(1, int(num_rows * scale))
+
+
+def tensor_columns(num_rows: int, shape: tuple[int, ...]) -> dict[str, np.ndarray]:
+    """Make columns with a number and a random float32 tensor per row.
+
+    Args:
+        num_rows: The number of rows.
+        shape: The shape of every tensor.
+    """
+    rng = np.random.default_rng(0)
+    return {"number": np.arange(num_rows), "tensor": rng.random((num_rows, *shape), dtype=np.float32)}
+
+
+def insert_rows(shape: tuple[int, ...] | None, num_rows: int) -> Callable[[Database, float], Operation]:
+    """Insert rows one dict per row, with or without a tensor field.
+
+    Args:
+        shape: The shape of the tensor of every row, or None for scalar-only rows.
+        num_rows: The number of rows at scale 1.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+
+        if shape is None:
+            collection = db.collection("bench", fields={"name": str, "number": int, "value": float})
+            rows = [{"name": f"row{i}", "number": i, "value": i / 2} for i in range(n)]
+            nbytes = 0
+        else:
+            collection = db.collection("bench", fields={"number": int, "tensor": TensorField(np.float32, shape)})
+            columns = tensor_columns(n, shape)
+            rows = [{"number": i, "tensor": columns["tensor"][i]} for i in range(n)]
+            nbytes = columns["tensor"].nbytes
+
+        def run() -> tuple[int, int]:
+            collection.insert(rows)
+            return n, nbytes
+
+        return run
+
+    return setup
+
+
+def insert_columns(shape: tuple[int, ...], num_rows: int) -> Callable[[Database, float], Operation]:
+    """Insert rows as columns, with the tensors stacked in one array.
+
+    Args:
+        shape: The shape of the tensor of every row.
+        num_rows: The number of rows at scale 1.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+        collection = db.collection("bench", fields={"number": int, "tensor": TensorField(np.float32, shape)})
+        columns = tensor_columns(n, shape)
+
+        def run() -> tuple[int, int]:
+            collection.insert_columns(columns)
+            return n, columns["tensor"].nbytes
+
+        return run
+
+    return setup
+
+
+def filled(db: Database, shape: tuple[int, ...], num_rows: int) -> tuple[Collection, int]:
+    """Fill a collection named bench with rows of numbers and tensors.
+
+    Args:
+        db: The database.
+        shape: The shape of the tensor of every row.
+        num_rows: The number of rows.
+
+    Returns:
+        collection: The filled collection.
+        nbytes: The size of every tensor, in bytes.
+    """
+    collection = db.collection("bench", fields={"number": int, "tensor": TensorField(np.float32, shape)})
+    columns = tensor_columns(num_rows, shape)
+    collection.insert_columns(columns)
+    return collection, columns["tensor"][0].nbytes
+
+
+def point_lookups(num_rows: int, num_lookups: int, indexed: bool) -> Callable[[Database, float], Operation]:
+    """Find single rows by a scalar field.
+
+    Args:
+        num_rows: The number of rows in the collection at scale 1.
+        num_lookups: The number of lookups at scale 1.
+        indexed: Whether the looked up field has a secondary index.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+        collection, nbytes = filled(db, (16,), n)
+        if indexed:
+            collection.create_index("number")
+
+        numbers = np.random.default_rng(0).integers(0, n, scaled(num_lookups, scale)).tolist()
+
+        def run() -> tuple[int, int]:
+            for number in numbers:
+                collection.find({"number": number}).execute()
+            return len(numbers), len(numbers) * nbytes
+
+        return run
+
+    return setup
+
+
+def full_scan(shape: tuple[int, ...], num_rows: int, method: str) -> Callable[[Database, float], Operation]:
+    """Read every row of a collection.
+
+    Args:
+        shape: The shape of the tensor of every row.
+        num_rows: The number of rows at scale 1.
+        method: "execute" for a list of rows, or "to_numpy" for stacked columns.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+        collection, nbytes = filled(db, shape, n)
+
+        def run() -> tuple[int, int]:
+            getattr(collection.find(), method)()
+            return n, n * nbytes
+
+        return run
+
+    return setup
+
+
+def concurrent_readers(num_threads: int, num_rows: int, num_queries: int) -> Callable[[Database, float], Operation]:
+    """Run range queries from several threads at once.
+
+    Args:
+        num_threads: The number of reader threads.
+        num_rows: The number of rows in the collection at scale 1.
+        num_queries: The number of queries per thread at scale 1.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+        collection, nbytes = filled(db, (16,), n)
+        collection.create_index("number")
+
+        queries = scaled(num_queries, scale)
+        rows_per_query = min(n, 100)
+        rng = np.random.default_rng(0)
+        starts = rng.integers(0, n - rows_per_query + 1, (num_threads, queries)).tolist()
+
+        def read(thread_starts: list[int]) -> None:
+            for start in thread_starts:
+                collection.find({"number": {"$gte": start, "$lt": start + rows_per_query}}).execute()
+
+        def run() -> tuple[int, int]:
+            threads = [threading.Thread(target=read, args=(thread_starts,)) for thread_starts in starts]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            num_read = num_threads * queries * rows_per_query
+            return num_read, num_read * nbytes
+
+        return run
+
+    return setup
+
+
+def slice_reads(num_entries: int, chunk_rows: int | None, num_reads: int) -> Callable[[Database, float], Operation]:
+    """Read short slices of one long compressed time series.
+
+    Args:
+        num_entries: The length of the time series at scale 1.
+        chunk_rows: The chunk_rows of the field, or None to store the series in one piece.
+        num_reads: The number of slices read at scale 1.
+    """
+    slice_rows = 1_000
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = max(slice_rows, scaled(num_entries, scale))
+        field = TensorField(np.float64, (None, 3), codec="zlib", chunk_rows=chunk_rows)
+        collection = db.collection("bench", fields={"series": field})
+        collection.insert({"series": np.cumsum(np.ones((n, 3)), axis=0)})
+
+        reads = scaled(num_reads, scale)
+        starts = np.random.default_rng(0).integers(0, n - slice_rows + 1, reads).tolist()
+
+        def run() -> tuple[int, int]:
+            for start in starts:
+                collection.find().select({"series": np.s_[start : start + slice_rows]}).execute()
+            return reads, reads * slice_rows * 3 * 8
+
+        return run
+
+    return setup
+
+
+def compressed_stream(
+    shape: tuple[int, ...], num_rows: int, workers: int | None
+) -> Callable[[Database, float], Operation]:
+    """Stream every row of a collection with compressed tensors, and touch every tensor.
+
+    Args:
+        shape: The shape of the tensor of every row.
+        num_rows: The number of rows at scale 1.
+        workers: The number of threads to decode with, or None to decode each batch on the calling thread.
+    """
+
+    def setup(db: Database, scale: float) -> Operation:
+        n = scaled(num_rows, scale)
+        collection = db.collection("bench", fields={"tensor": TensorField(np.float32, shape, codec="zlib")})
+        collection.insert_columns({"tensor": tensor_columns(n, shape)["tensor"]})
+        nbytes = int(np.prod(shape)) * 4
+
+        def run() -> tuple[int, int]:
+            total = 0.0
+            for batch in collection.find().iter_batches(batch_size=64, workers=workers):
+                # Stands in for the caller's work on every batch, which decoding ahead overlaps with
+                total += sum(float(row["tensor"].sum()) for row in batch)
+            return n, n * nbytes
+
+        return run
+
+    return setup
+
+
+SCENARIOS = [
+    Scenario("insert_scalar", "insert 20k scalar-only rows", insert_rows(None, 20_000)),
+    Scenario("insert_small_tensor", "insert 20k rows with a 16 float32 tensor", insert_rows((16,), 20_000)),
+    Scenario("insert_large_tensor", "insert 200 rows with a 256x256 float32 tensor", insert_rows((256, 256), 200)),
+    Scenario("insert_columns_small_tensor", "insert_columns 100k rows of 16 floats", insert_columns((16,), 100_000)),
+    Scenario("insert_columns_large_tensor", "insert_columns 200 rows of 256x256", insert_columns((256, 256), 200)),
+    Scenario("point_lookup", "2k lookups by a scalar field in 20k rows", point_lookups(20_000, 2_000, False)),
+    Scenario("point_lookup_indexed", "2k lookups by an indexed field", point_lookups(20_000, 2_000, True)),
+    Scenario("scan_small_tensor", "execute over 50k rows of 16 floats", full_scan((16,), 50_000, "execute")),
+    Scenario("scan_small_tensor_numpy", "to_numpy over 50k rows of 16 floats", full_scan((16,), 50_000, "to_numpy")),
+    Scenario("scan_large_tensor", "execute over 200 rows of 256x256", full_scan((256, 256), 200, "execute")),
+    Scenario("scan_large_tensor_numpy", "to_numpy over 200 rows of 256x256", full_scan((256, 256), 200, "to_numpy")),
+    Scenario("slice_series", "100 slices of 1k rows of a 1M row series", slice_reads(1_000_000, None, 100)),
+    Scenario(
+        "slice_chunked_series", "the same slices of a series in 10k row chunks", slice_reads(1_000_000, 10_000, 100)
+    ),
+    Scenario("stream_compressed", "iter_batches over 2k rows of 64x64 zlib", compressed_stream((64, 64), 2_000, None)),
+    Scenario(
+        "stream_compressed_workers", "the same, decoded ahead on 4 threads", compressed_stream((64, 64), 2_000, 4)
+    ),
+    Scenario("concurrent_readers", "4 threads running 500 range queries each", concurrent_readers(4, 20_000, 500)),
+]
@@ -0,0 +1,160 @@
+"""Run the benchmark scenarios, and compare results between commits.
+
+Usage, from the root of the repository:
+
+    python -m benchmarks.suite run --output results/new.json
+    python -m benchmarks.suite compare results/old.json results/new.json
+"""
+
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+
+import numpy as np
+import tyro
+from tensordb import Database
+from tyro.conf import Positional
+
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+logger = logging.getLogger(__name__)
+
+
+def git_commit() -> str | None:
+    """Get the commit of the working tree, or None outside of a git repository."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result.stdout.strip()
+
+
+def run_scenario(scenario: Scenario, scale: float, repeats: int) -> dict:
+    """Time a scenario, on a new database for every repeat.
+
+    Args:
+        scenario: The scenario to run.
+        scale: The scale of the scenario.
+        repeats: The number of times the scenario is timed.
+
+    Returns:
+        result: The timings of the scenario.
+    """
+    seconds = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database("benchmark", Path(tmp_dir))
+            operation = scenario.setup(db, scale)
+
+            start = time.perf_counter()
+            num_rows, nbytes = operation()
+            seconds.append(time.perf_counter() - start)
+
+            db.close()
+
+    median_seconds = median(seconds)
+
+    return {
+        "description": scenario.description,
+        "seconds": seconds,
+        "median_seconds": median_seconds,
+        "rows": num_rows,
+        "bytes": nbytes,
+        "rows_per_second": num_rows / median_seconds,
+        "bytes_per_second": nbytes / median_seconds,
+    }
+
+
+def run(output: Path, scenarios: list[str] | None = None, scale: float = 1.0, repeats: int = 5) -> None:
+    """Run benchmark scenarios, and write their results as json.
+
+    Args:
+        output: The json file to write the results to.
+        scenarios: The names of the scenarios to run. If None, all scenarios are run.
+        scale: Multiplies the number of rows of every scenario.
+        repeats: The number of times every scenario is timed.
+    """
+    selected = [scenario for scenario in SCENARIOS if scenarios is None or scenario.name in scenarios]
+    unknown = set(scenarios or []) - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        raise ValueError(f"Unknown scenarios {sorted(unknown)}")
+
+    results = {}
+    for scenario in selected:
+        results[scenario.name] = run_scenario(scenario, scale, repeats)
+        result = results[scenario.name]
+        logger.info(
+            f"{scenario.name:>28}: {result['median_seconds']:8.4f}s {result['rows_per_second']:>14,.0f} rows/s"
+            f" {result['bytes_per_second'] / 2**20:>10,.1f} MiB/s"
+        )
+
+    report = {
+        "metadata": {
+            "commit": git_commit(),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "scale": scale,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.info(f"Results written to {output}")
+
+
+def compare(baseline: Positional[Path], candidate: Positional[Path], threshold: float = 0.1) -> None:
+    """Compare two benchmark results, and flag scenarios that got slower.
+
+    Exits with status 1 if any scenario regressed.
+
+    Args:
+        baseline: The json results of the reference commit.
+        candidate: The json results of the commit to check.
+        threshold: The relative increase of the median time that counts as a regression.
+    """
+    old = json.loads(baseline.read_text())
+    new = json.loads(candidate.read_text())
+
+    if old["metadata"]["scale"] != new["metadata"]["scale"]:
+        logger.warning("The results were measured at different scales, and are not comparable")
+
+    logger.info(f"baseline:  {old['metadata']['commit']}\ncandidate: {new['metadata']['commit']}")
+
+    regressions = []
+    for name in [name for name in old["results"] if name in new["results"]]:
+        ratio = new["results"][name]["median_seconds"] / old["results"][name]["median_seconds"]
+
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "improvement"
+        else:
+            flag = ""
+
+        logger.info(f"{name:>28}: {ratio:6.2f}x time {flag}")
+
+    for name in sorted(old["results"].keys() ^ new["results"].keys()):
+        logger.info(f"{name:>28}: only in {'baseline' if name in old['results'] else 'candidate'}")
+
+    if regressions:
+        logger.error(f"{len(regressions)} scenarios regressed by more than {threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("tensordb").setLevel(logging.WARNING)
+    tyro.extras.subcommand_cli_from_dict({"run": run, "compare": compare})
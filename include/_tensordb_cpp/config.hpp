@@ -15,6 +15,26 @@ namespace config {
 namespace reserved_table_names {
 static const std::string collections = "__collections__";
 static const std::string collection_tensor_fields = "__collection_tensor_fields__";
+static const std::string metadata = "__metadata__";
+static const std::string collection_indexes = "__collection_indexes__";
+static const std::string collection_vector_indexes = "__collection_vector_indexes__";
+static const std::string tensor_payloads = "__tensor_payloads__";
 }; // namespace reserved_table_names
+
+namespace storage {
+static const std::string tensor_dir = "tensors";
+static const int segment_max_bytes = 1073741824;
+static const int alignment = 64;
+}; // namespace storage
+
+namespace sqlite {
+static const std::string journal_mode = "wal";
+static const double busy_timeout = 5.0;
+static const int cached_statements = 512;
+}; // namespace sqlite
+
+namespace cache {
+static const int max_bytes = 0;
+}; // namespace cache
 }; // namespace config
 } // namespace tensordb_cpp
@@ -0,0 +1,25 @@
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+
+namespace tensordb {
+
+/**
+ * Compute the summary statistics of every row of a row-major block of tensors.
+ *
+ * Every row is one flattened tensor. The outputs have one entry per row.
+ */
+template <typename T>
+void row_statistics(const T *rows, size_t num_rows, size_t row_size, T *minimum, T *maximum, double *mean,
+                    double *norm);
+
+/**
+ * Copy equally sized byte ranges of a buffer into rows of an output buffer.
+ *
+ * Range i starts at offsets[i] in the buffer, and is copied to row out_rows[i] of out.
+ */
+void gather_rows(const uint8_t *buffer, size_t buffer_size, const int64_t *offsets, const int64_t *out_rows,
+                 size_t num_rows, size_t row_nbytes, uint8_t *out, size_t out_num_rows);
+
+} // namespace tensordb
@@ -1,3 +1,8 @@
 import nanobind
 
 set_spdlog_level: nanobind.nb_func
+tracy_enabled: nanobind.nb_func
+tracy_zone_begin: nanobind.nb_func
+tracy_zone_end: nanobind.nb_func
+row_statistics: nanobind.nb_func
+gather_rows: nanobind.nb_func
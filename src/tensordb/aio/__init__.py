@@ -0,0 +1,6 @@
+from tensordb.aio.collection import AsyncCollection
+from tensordb.aio.database import AsyncDatabase
+from tensordb.aio.query import AsyncQuery
+from tensordb.aio.writer import AsyncBufferedWriter
+
+__all__ = ["AsyncBufferedWriter", "AsyncCollection", "AsyncDatabase", "AsyncQuery"]
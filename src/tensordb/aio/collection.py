@@ -0,0 +1,188 @@
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Sequence, Type
+
+import numpy as np
+
+from tensordb.aio.executor import run_in_executor
+from tensordb.aio.query import AsyncQuery
+from tensordb.aio.writer import AsyncBufferedWriter
+from tensordb.catalog import CollectionIndex
+from tensordb.collections import Collection
+from tensordb.fields import Field
+
+
+class AsyncCollection:
+    """A collection whose operations run on an executor, without blocking the event loop.
+
+    See Collection for the behavior of every operation.
+    """
+
+    __collection: Collection
+    __executor: Executor
+
+    def __init__(self, collection: Collection, executor: Executor) -> None:
+        """Initialize the collection.
+
+        Args:
+            collection: The collection to run operations on.
+            executor: The executor that runs the operations.
+        """
+        self.__collection = collection
+        self.__executor = executor
+
+    @property
+    def name(self) -> str:
+        """The name of the collection."""
+        return self.__collection.name
+
+    async def fields(self) -> dict[str, Type | Field]:
+        """Get the fields of the collection."""
+        return await run_in_executor(self.__executor, lambda: self.__collection.fields)
+
+    async def insert(self, data: dict[str, Any] | list[dict[str, Any]]) -> None:
+        """Insert data into the collection.
+
+        Args:
+            data: The data to insert.
+        """
+        await run_in_executor(self.__executor, self.__collection.insert, data)
+
+    async def insert_columns(self, columns: dict[str, Sequence | np.ndarray]) -> int:
+        """Insert data given as one sequence of values per field.
+
+        Args:
+            columns: Mapping from field name to the values of that field.
+
+        Returns:
+            num_rows: The number of inserted rows.
+        """
+        return await run_in_executor(self.__executor, self.__collection.insert_columns, columns)
+
+    async def update(self, query: dict, values: dict[str, Any]) -> int:
+        """Set fields of the rows matching a query to new values.
+
+        Args:
+            query: The rows to update, as in find.
+            values: Mapping from field name to its new value.
+
+        Returns:
+            num_rows: The number of updated rows.
+        """
+        return await run_in_executor(self.__executor, self.__collection.update, query, values)
+
+    async def delete(self, query: dict) -> int:
+        """Delete the rows matching a query.
+
+        Args:
+            query: The rows to delete, as in find. {} deletes all rows.
+
+        Returns:
+            num_rows: The number of deleted rows.
+        """
+        return await run_in_executor(self.__executor, self.__collection.delete, query)
+
+    async def create_index(self, fields: str | list[str], unique: bool = False) -> str:
+        """Create a secondary index on scalar fields, or on statistics of tensor fields.
+
+        Args:
+            fields: The field or fields to index, in index order.
+            unique: Whether the index enforces unique values.
+
+        Returns:
+            name: The name of the index.
+        """
+        return await run_in_executor(self.__executor, self.__collection.create_index, fields, unique)
+
+    async def drop_index(self, name: str) -> None:
+        """Drop a secondary index.
+
+        Args:
+            name: The name of the index, as returned by create_index.
+        """
+        await run_in_executor(self.__executor, self.__collection.drop_index, name)
+
+    async def list_indexes(self) -> list[CollectionIndex]:
+        """Get the secondary indexes of the collection."""
+        return await run_in_executor(self.__executor, self.__collection.list_indexes)
+
+    async def nearest(
+        self,
+        field: str,
+        query_vector: np.ndarray,
+        k: int = 10,
+        metric: str = "l2",
+        where: dict | None = None,
+        n_probe: int = 8,
+    ) -> list[tuple[dict[str, Any], float]]:
+        """Find the rows whose vectors are closest to a query vector.
+
+        Args:
+            field: A tensor field with a fixed 1-D shape.
+            query_vector: The vector to compare with.
+            k: The number of neighbors to return.
+            metric: "l2", "cosine" or "ip".
+            where: Conditions the rows must satisfy, as in find.
+            n_probe: The number of inverted lists to scan when a vector index is used.
+
+        Returns:
+            neighbors: (row, distance) of the k nearest rows, closest first.
+        """
+        return await run_in_executor(
+            self.__executor, self.__collection.nearest, field, query_vector, k, metric, where, n_probe
+        )
+
+    async def create_vector_index(self, field: str, n_lists: int | None = None, metric: str = "l2") -> None:
+        """Build an approximate nearest neighbor (IVF) index on a 1-D tensor field.
+
+        Args:
+            field: A tensor field with a fixed 1-D shape.
+            n_lists: The number of inverted lists. If None, the square root of the number of rows.
+            metric: The metric that nearest queries using the index will use.
+        """
+        await run_in_executor(self.__executor, self.__collection.create_vector_index, field, n_lists, metric)
+
+    async def drop_vector_index(self, field: str) -> None:
+        """Drop the vector index on a field.
+
+        Args:
+            field: The indexed field.
+        """
+        await run_in_executor(self.__executor, self.__collection.drop_vector_index, field)
+
+    async def export(self, path: Path) -> int:
+        """Export all rows to a directory of .npy column files and a manifest, see Collection.export.
+
+        Args:
+            path: The directory to write to. It is created if it does not exist.
+
+        Returns:
+            num_rows: The number of exported rows.
+        """
+        return await run_in_executor(self.__executor, self.__collection.export, path)
+
+    async def writer(self, max_rows: int = 1024, max_latency_ms: float = 100) -> AsyncBufferedWriter:
+        """Get a writer that buffers rows, and inserts them in groups from a background thread.
+
+        Args:
+            max_rows: The maximum number of rows committed at once.
+            max_latency_ms: The maximum time a row waits before it is committed, in milliseconds.
+
+        Returns:
+            writer: The writer, which must be closed, e.g. by using it in an async with block.
+        """
+        writer = await run_in_executor(self.__executor, self.__collection.writer, max_rows, max_latency_ms)
+        return AsyncBufferedWriter(writer, self.__executor)
+
+    def find(self, query: dict | None = None) -> AsyncQuery:
+        """Query the collection.
+
+        Nothing is executed until the query is awaited or iterated.
+
+        Args:
+            query: The query to execute.
+
+        Returns:
+            The query.
+        """
+        return AsyncQuery(self.__collection.find(query), self.__executor)
@@ -0,0 +1,130 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import Type
+
+from tensordb.aio.collection import AsyncCollection
+from tensordb.aio.executor import run_in_executor
+from tensordb.database import Database
+from tensordb.fields import Field
+from tensordb.profiling import OperationStats
+from tensordb.storage import CacheStats
+
+# Number of threads that run blocking database calls
+DEFAULT_MAX_WORKERS = 8
+
+
+class AsyncDatabase:
+    """A database for asyncio code.
+
+    Blocking calls run on a bounded pool of threads owned by the database. Every
+    thread reads through its own pooled connection, so queries run concurrently,
+    while writes are committed one at a time.
+    """
+
+    __database: Database
+    __executor: ThreadPoolExecutor
+
+    def __init__(self, database: Database, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Wrap an open database. Use AsyncDatabase.open to open one without blocking.
+
+        Args:
+            database: The database to run operations on.
+            max_workers: The maximum number of threads running database calls at once.
+        """
+        self.__database = database
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tensordb")
+
+    @classmethod
+    async def open(
+        cls,
+        db_name: str,
+        base_path: Path | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache_bytes: int | None = None,
+    ) -> "AsyncDatabase":
+        """Open or create a database.
+
+        Args:
+            db_name: The name of the database.
+            base_path: The base path where you want to store TorchDB databases.
+                If None, it will use the default path.
+            max_workers: The maximum number of threads running database calls at once.
+            cache_bytes: The byte budget of the tensor cache. If None, cache.max_bytes of the config.
+        """
+        database = await asyncio.to_thread(Database, db_name, base_path, cache_bytes)
+        return cls(database, max_workers)
+
+    async def collection(self, name: str, fields: dict[str, Type | Field] | None = None) -> AsyncCollection:
+        """Get an existing collection, or create a new one.
+
+        Args:
+            name: The name of the collection.
+            fields: Mapping from field name to field type.
+                If None, will attempt to get an existing collection.
+
+        Returns:
+            collection: The collection with the given name.
+        """
+        collection = await run_in_executor(self.__executor, self.__database.collection, name, fields)
+        return AsyncCollection(collection, self.__executor)
+
+    async def import_collection(self, path: Path, name: str | None = None) -> AsyncCollection:
+        """Create a collection from an export, see Database.import_collection.
+
+        Args:
+            path: The directory of the export.
+            name: The name of the new collection. If None, the name of the exported collection.
+
+        Returns:
+            collection: The new collection.
+        """
+        collection = await run_in_executor(self.__executor, self.__database.import_collection, path, name)
+        return AsyncCollection(collection, self.__executor)
+
+    async def collections(self) -> list[str]:
+        """Return a list of all the collections in the database."""
+        return await run_in_executor(self.__executor, self.__database.collections)
+
+    def stats(self) -> dict[str, OperationStats]:
+        """Get the count, total time and tensor bytes of every kind of operation, see Database.stats.
+
+        Only reads counters in memory, so it does not need to be awaited.
+
+        Returns:
+            stats: Mapping from operation name to its accumulated timings.
+        """
+        return self.__database.stats()
+
+    def reset_stats(self) -> None:
+        """Forget the timings of all operations run so far, and reset the cache counters."""
+        self.__database.reset_stats()
+
+    def cache_stats(self) -> CacheStats:
+        """Get the hits, misses, evictions and size of the tensor cache, see Database.cache_stats.
+
+        Returns:
+            stats: The counters of the cache.
+        """
+        return self.__database.cache_stats()
+
+    async def close(self) -> None:
+        """Wait for running calls, and close the database."""
+        await run_in_executor(self.__executor, self.__database.close)
+        self.__executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        """Use the database in an async with block, which closes it on exit."""
+        return self
+
+    async def __aexit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Close the database."""
+        await self.close()
+
+    @property
+    def location(self) -> Path:
+        """Returns the location of the database."""
+        return self.__database.location
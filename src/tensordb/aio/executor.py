@@ -0,0 +1,22 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+async def run_in_executor(executor: Executor, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function on an executor, without blocking the event loop.
+
+    Args:
+        executor: The executor to run the function on.
+        function: The function to run.
+        args: The positional arguments of the function.
+        kwargs: The keyword arguments of the function.
+
+    Returns:
+        result: The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(function, *args, **kwargs))
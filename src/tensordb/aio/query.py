@@ -0,0 +1,203 @@
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator
+
+import numpy as np
+
+from tensordb.aio.executor import run_in_executor
+from tensordb.collections.query import Page, Query
+from tensordb.collections.query.query import DEFAULT_BATCH_SIZE, DEFAULT_IN_FLIGHT_BATCHES
+
+# Returned by next() on an exhausted iterator, since StopIteration can not cross the executor
+_EXHAUSTED = object()
+
+
+class AsyncQuery:
+    """A query whose results are fetched and decoded without blocking the event loop."""
+
+    __query: Query
+    __executor: Executor
+
+    def __init__(self, query: Query, executor: Executor) -> None:
+        """Initialize the query.
+
+        Args:
+            query: The query to run.
+            executor: The executor that runs the query.
+        """
+        self.__query = query
+        self.__executor = executor
+
+    def select(self, fields: list[str] | dict[str, Any]) -> "AsyncQuery":
+        """Select fields from the collection.
+
+        Args:
+            fields: The fields to select, optionally mapped to a numpy index into their tensors.
+
+        Returns:
+            The query.
+        """
+        self.__query.select(fields)
+
+        return self
+
+    def lazy(self) -> "AsyncQuery":
+        """Return tensors as TensorRefs, that are only read from storage when loaded.
+
+        Loading a TensorRef reads from storage on the calling thread.
+
+        Returns:
+            The query.
+        """
+        self.__query.lazy()
+
+        return self
+
+    def order_by(self, fields: str | list[str], descending: bool = False) -> "AsyncQuery":
+        """Order the result by fields.
+
+        Args:
+            fields: A field or list of fields, or statistics of tensor fields, to order by.
+            descending: Whether to order from the largest to the smallest values.
+
+        Returns:
+            The query.
+        """
+        self.__query.order_by(fields, descending)
+
+        return self
+
+    def limit(self, n: int) -> "AsyncQuery":
+        """Limit the number of rows in the result, or the number of rows per page.
+
+        Args:
+            n: The maximum number of rows.
+
+        Returns:
+            The query.
+        """
+        self.__query.limit(n)
+
+        return self
+
+    async def page(self, after: str | None = None, workers: int | None = None) -> Page:
+        """Execute the query, and return a page of at most limit rows, see Query.page.
+
+        Args:
+            after: The token of the page to read. If None, the first page is read.
+            workers: The number of threads to decompress tensors with, see Query.execute.
+
+        Returns:
+            page: The rows of the page, and the token of the next page.
+        """
+        return await run_in_executor(self.__executor, self.__query.page, after, workers)
+
+    async def execute(self, workers: int | None = None) -> list[dict[str, Any]]:
+        """Execute the query.
+
+        Args:
+            workers: The number of threads to decompress tensors with, see Query.execute.
+
+        Returns:
+            The result of the query.
+        """
+        return await run_in_executor(self.__executor, self.__query.execute, workers)
+
+    async def count(self) -> int:
+        """Count the rows matching the query, see Query.count.
+
+        Returns:
+            num_rows: The number of matching rows.
+        """
+        return await run_in_executor(self.__executor, self.__query.count)
+
+    async def aggregate(
+        self, aggregates: dict[str, str | list[str]], group_by: str | list[str] | None = None
+    ) -> dict[str, Any] | list[dict[str, Any]]:
+        """Aggregate the rows matching the query, see Query.aggregate.
+
+        Args:
+            aggregates: Mapping from field to an aggregate, or to a list of aggregates.
+            group_by: A field or list of fields to aggregate every group of equal values of separately.
+
+        Returns:
+            result: The aggregates, or a list of them per group with group_by.
+        """
+        return await run_in_executor(self.__executor, self.__query.aggregate, aggregates, group_by)
+
+    async def to_columns(self) -> dict[str, np.ndarray | list[np.ndarray]]:
+        """Execute the query, and return the result as one column per field, see Query.to_columns.
+
+        Returns:
+            columns: Mapping from field name to the values of that field.
+        """
+        return await run_in_executor(self.__executor, self.__query.to_columns)
+
+    async def to_numpy(self) -> dict[str, np.ndarray]:
+        """Execute the query, and return the result as one numpy array per field, see Query.to_numpy.
+
+        Returns:
+            columns: Mapping from field name to the values of that field.
+        """
+        return await run_in_executor(self.__executor, self.__query.to_numpy)
+
+    async def explain(self) -> list[str]:
+        """Explain how sqlite executes the query.
+
+        Returns:
+            plan: The steps of the query plan.
+        """
+        return await run_in_executor(self.__executor, self.__query.explain)
+
+    async def iter_batches(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int | None = None,
+        in_flight: int = DEFAULT_IN_FLIGHT_BATCHES,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Execute the query, and stream the result in batches.
+
+        Every batch is fetched and decoded on the executor, so only one batch is held at a time.
+        With workers, the next batches are decoded ahead, see Query.iter_batches.
+
+        Args:
+            batch_size: The maximum number of rows in a batch.
+            workers: The number of threads to decompress the tensors of a batch with, see Query.iter_batches.
+            in_flight: The maximum number of batches decoded ahead, when workers are given.
+
+        Yields:
+            batch: The next rows of the result.
+        """
+        # Batches may be fetched by different workers. The cursor stays on the reader
+        # connection of the first one, which sqlite allows to be used from any thread.
+        batches = self.__query.iter_batches(batch_size, workers, in_flight)
+
+        try:
+            while (batch := await run_in_executor(self.__executor, next, batches, _EXHAUSTED)) is not _EXHAUSTED:
+                yield batch
+        finally:
+            # Closes the cursor when iteration stops early
+            await run_in_executor(self.__executor, batches.close)
+
+    async def iter(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int | None = None,
+        in_flight: int = DEFAULT_IN_FLIGHT_BATCHES,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Execute the query, and stream the result row by row.
+
+        Args:
+            batch_size: The number of rows fetched and decoded at a time.
+            workers: The number of threads to decompress the tensors of a batch with, see Query.iter_batches.
+            in_flight: The maximum number of batches decoded ahead, when workers are given.
+
+        Yields:
+            row: The next row of the result.
+        """
+        async for batch in self.iter_batches(batch_size, workers, in_flight):
+            for row in batch:
+                yield row
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        """Stream the result row by row, see iter."""
+        return self.iter()
@@ -0,0 +1,53 @@
+from concurrent.futures import Executor
+from types import TracebackType
+from typing import Any
+
+from tensordb.aio.executor import run_in_executor
+from tensordb.collections.writer import BufferedWriter
+
+
+class AsyncBufferedWriter:
+    """A buffered writer whose blocking calls run on an executor, see BufferedWriter.
+
+    Writing validates rows and may wait for room in the buffer, and flushing waits
+    for commits, so both run on the executor instead of the event loop.
+    """
+
+    __writer: BufferedWriter
+    __executor: Executor
+
+    def __init__(self, writer: BufferedWriter, executor: Executor) -> None:
+        """Initialize the writer.
+
+        Args:
+            writer: The writer to run operations on.
+            executor: The executor that runs the operations.
+        """
+        self.__writer = writer
+        self.__executor = executor
+
+    async def write(self, data: dict[str, Any] | list[dict[str, Any]]) -> None:
+        """Buffer rows to be inserted.
+
+        Args:
+            data: The row or rows to insert.
+        """
+        await run_in_executor(self.__executor, self.__writer.write, data)
+
+    async def flush(self) -> None:
+        """Commit all rows written so far, and wait until they are durable."""
+        await run_in_executor(self.__executor, self.__writer.flush)
+
+    async def close(self) -> None:
+        """Commit all rows written so far, and stop the background thread of the writer."""
+        await run_in_executor(self.__executor, self.__writer.close)
+
+    async def __aenter__(self) -> "AsyncBufferedWriter":
+        """Use the writer in an async with block, which closes it on exit."""
+        return self
+
+    async def __aexit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Close the writer."""
+        await self.close()
@@ -1,39 +1,105 @@
 import sqlite3
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
+
+from tensordb.catalog import Catalog
+from tensordb.config import CONFIG
+from tensordb.profiling import COMMIT_ZONE, Profiler
+from tensordb.storage import SegmentStore, TensorCache
+from tensordb.utils.sqlite.plan_cache import QueryPlanCache
+from tensordb.utils.sqlite.pool import ConnectionPool
 
 
 @dataclass(frozen=True)
 class Backend:
     """Data class that holds the backend information.
 
+    The backend can be shared between threads. Reads use a connection of the
+    calling thread, and writes are serialized through a single writer connection.
+
     Attributes:
         dir: The directory where the database is stored.
         sqlite_db_path: The path to the sqlite database.
-        connection: The connection to the sqlite database.
+        pool: The connections to the sqlite database.
+        store: The segment store holding the tensor data.
+        catalog: The cached schemas of the collections.
+        cache: The cached tensors of query results.
+        plans: The cached sql of queries, by the shape of their conditions.
+        profiler: The timings of the operations run on the database.
     """
 
     dir: Path
     sqlite_db_path: Path
-    connection: sqlite3.Connection
+    pool: ConnectionPool
+    store: SegmentStore
+    catalog: Catalog
+    cache: TensorCache
+    plans: QueryPlanCache
+    profiler: Profiler
 
     def cursor(self) -> sqlite3.Cursor:
-        """Returns a cursor to the database."""
-        return self.connection.cursor()
+        """Returns a read-only cursor to the database, for use by the calling thread only.
+
+        It sees the data committed when each statement starts. Use transaction to write.
+        """
+        return self.pool.reader().cursor()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run a block of commands in a single write transaction.
+
+        Transactions of different threads run one at a time. The transaction is
+        committed when the block exits, and rolled back if it raises. Tensor data is
+        synced to disk before committing, so committed rows never point to missing bytes.
 
-    def commit(self) -> None:
-        """Commits the current transaction."""
-        self.connection.commit()
+        Yields:
+            cursor: The cursor to use to execute the commands.
+        """
+        with self.pool.writer() as connection:
+            try:
+                yield connection.cursor()
+            except BaseException:
+                connection.rollback()
+                # The catalog may have been loaded from the schema changes that were rolled back
+                self.catalog.invalidate()
+                raise
 
+            with self.profiler.zone(COMMIT_ZONE):
+                self.store.sync()
+                connection.commit()
 
-def get_backend(dir: Path) -> Backend:
+    def close(self) -> None:
+        """Close all connections, and sync and close the segment store."""
+        with self.pool.writer():
+            self.store.close()
+
+        self.pool.close()
+        self.cache.clear()
+
+
+def get_backend(dir: Path, cache_bytes: int = CONFIG.cache.max_bytes) -> Backend:
     """Return a backend for the given directory.
 
     Args:
         dir: The directory where the database is stored.
+        cache_bytes: The byte budget of the tensor cache. 0 disables the cache.
     """
     sqlite_db_path = dir / "db.db"
 
-    connection = sqlite3.connect(sqlite_db_path)
+    pool = ConnectionPool(sqlite_db_path)
+
+    store = SegmentStore(dir / CONFIG.storage.tensor_dir)
 
-    return Backend(dir=dir, sqlite_db_path=sqlite_db_path, connection=connection)
+    return Backend(
+        dir=dir,
+        sqlite_db_path=sqlite_db_path,
+        pool=pool,
+        store=store,
+        catalog=Catalog(),
+        cache=TensorCache(cache_bytes),
+        # As many queries as every connection keeps compiled statements
+        plans=QueryPlanCache(CONFIG.sqlite.cached_statements),
+        profiler=Profiler(),
+    )
@@ -0,0 +1,3 @@
+from tensordb.catalog.catalog import Catalog, CollectionIndex, CollectionSchema, VectorIndex
+
+__all__ = ["Catalog", "CollectionIndex", "CollectionSchema", "VectorIndex"]
@@ -0,0 +1,267 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Type
+
+import msgpack
+import numpy as np
+
+from tensordb.catalog.functions import get_schema_version, unpack_shape
+from tensordb.config import CONFIG
+from tensordb.fields import Field, TensorField
+from tensordb.storage import is_hidden_column, tensor_column_field
+from tensordb.utils.sqlite import SQL_TYPE_TO_TYPE
+
+
+@dataclass(frozen=True)
+class CollectionIndex:
+    """A secondary index on fields of a collection.
+
+    Attributes:
+        name: The name of the index.
+        fields: The indexed fields, in index order.
+        unique: Whether the index enforces unique values.
+    """
+
+    name: str
+    fields: tuple[str, ...]
+    unique: bool
+
+
+@dataclass(frozen=True)
+class VectorIndex:
+    """An approximate nearest neighbor (IVF) index on a 1-D tensor field.
+
+    Every row is assigned to the inverted list of its closest centroid, stored in
+    a hidden column of the collection table.
+
+    Attributes:
+        field_name: The indexed tensor field.
+        metric: The metric the index was built for.
+        centroids: The centroids of the inverted lists, of shape (n_lists, D).
+    """
+
+    field_name: str
+    metric: str
+    centroids: np.ndarray
+
+
+@dataclass(frozen=True)
+class CollectionSchema:
+    """The schema of a collection, as stored in the catalog.
+
+    Attributes:
+        id: The id of the collection in the collections table.
+        name: The name of the collection.
+        fields: Mapping from field name to field type, including the id field.
+            Must not be mutated, since the schema is shared.
+        indexes: Mapping from index name to the secondary indexes of the collection.
+        vector_indexes: Mapping from field name to the vector index on that field.
+    """
+
+    id: int
+    name: str
+    fields: dict[str, Type | Field]
+    indexes: dict[str, CollectionIndex]
+    vector_indexes: dict[str, VectorIndex]
+
+
+class Catalog:
+    """In-memory cache of the schemas of all collections in a database.
+
+    The whole catalog is loaded with a single query, and reloaded only when the
+    schema version stored in the metadata table changes. Checking the version is
+    a single primary key lookup, so lookups stay cheap.
+
+    The catalog can be shared between threads: the version and the schemas are
+    replaced together, so a lookup never sees schemas of a different version.
+    """
+
+    # (schema version, mapping from collection name to schema)
+    __state: tuple[int | None, dict[str, CollectionSchema]]
+
+    def __init__(self) -> None:
+        """Initialize an empty catalog, which is loaded on first use."""
+        self.__state = (None, {})
+
+    def refresh(self, cursor: sqlite3.Cursor) -> None:
+        """Reload the catalog if the schema has changed since it was loaded.
+
+        Args:
+            cursor: The cursor to use to execute the command.
+        """
+        self.__schemas(cursor)
+
+    def __schemas(self, cursor: sqlite3.Cursor) -> dict[str, CollectionSchema]:
+        """Get the schemas of all collections, reloading them if the schema has changed.
+
+        Args:
+            cursor: The cursor to use to execute the command.
+        """
+        version = get_schema_version(cursor)
+        loaded_version, schemas = self.__state
+
+        if version != loaded_version:
+            schemas = load_schemas(cursor)
+            self.__state = (version, schemas)
+
+        return schemas
+
+    @property
+    def version(self) -> int | None:
+        """The schema version of the loaded catalog, or None if it is not loaded."""
+        return self.__state[0]
+
+    def invalidate(self) -> None:
+        """Force the catalog to be reloaded on next use."""
+        self.__state = (None, {})
+
+    def exists(self, name: str, cursor: sqlite3.Cursor) -> bool:
+        """Check if a collection exists.
+
+        Args:
+            name: The name of the collection.
+            cursor: The cursor to use to execute the command.
+        """
+        return name in self.__schemas(cursor)
+
+    def schema(self, name: str, cursor: sqlite3.Cursor) -> CollectionSchema:
+        """Get the schema of a collection.
+
+        Args:
+            name: The name of the collection.
+            cursor: The cursor to use to execute the command.
+        """
+        schemas = self.__schemas(cursor)
+
+        if name not in schemas:
+            raise ValueError(f"Collection {name} does not exist")
+
+        return schemas[name]
+
+    def fields(self, name: str, cursor: sqlite3.Cursor) -> dict[str, Type | Field]:
+        """Get the fields of a collection, including the id field.
+
+        Args:
+            name: The name of the collection.
+            cursor: The cursor to use to execute the command.
+        """
+        return self.schema(name, cursor).fields
+
+    def names(self, cursor: sqlite3.Cursor) -> list[str]:
+        """Get the names of all the collections.
+
+        Args:
+            cursor: The cursor to use to execute the command.
+        """
+        return list(self.__schemas(cursor))
+
+
+def load_schemas(cursor: sqlite3.Cursor) -> dict[str, CollectionSchema]:
+    """Load the schemas of all collections.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+
+    Returns:
+        schemas: Mapping from collection name to schema.
+    """
+    cursor.execute(
+        f"""
+        select
+            collection_id,
+            field_name,
+            dtype,
+            shape,
+            codec,
+            chunk_rows,
+            dedup
+        from
+            {CONFIG.reserved_table_names.collection_tensor_fields}
+    """
+    )
+
+    tensor_fields: dict[int, dict[str, TensorField]] = {}
+    for collection_id, field_name, dtype, shape, codec, chunk_rows, dedup in cursor.fetchall():
+        tensor_fields.setdefault(collection_id, {})[field_name] = TensorField(
+            dtype=np.dtype(dtype),
+            shape=unpack_shape(shape),
+            codec=codec,
+            chunk_rows=chunk_rows,
+            dedup=bool(dedup),
+        )
+
+    cursor.execute(
+        f"""
+        select
+            collections.id,
+            collections.name,
+            columns.name,
+            columns.type
+        from
+            {CONFIG.reserved_table_names.collections} as collections,
+            pragma_table_info(collections.name) as columns
+        order by collections.id, columns.cid
+    """
+    )
+
+    schemas: dict[str, CollectionSchema] = {}
+    for collection_id, collection_name, column_name, column_type in cursor.fetchall():
+        if collection_name not in schemas:
+            schemas[collection_name] = CollectionSchema(
+                id=collection_id, name=collection_name, fields={}, indexes={}, vector_indexes={}
+            )
+
+        fields = schemas[collection_name].fields
+
+        if not is_hidden_column(column_name):
+            fields[column_name] = SQL_TYPE_TO_TYPE[column_type]
+            continue
+
+        # Tensor fields take the position of their first hidden column
+        field_name = tensor_column_field(column_name)
+        if field_name not in fields and field_name in tensor_fields.get(collection_id, {}):
+            fields[field_name] = tensor_fields[collection_id][field_name]
+
+    cursor.execute(
+        f"""
+        select
+            collections.name,
+            indexes.name,
+            indexes.fields,
+            indexes.is_unique
+        from
+            {CONFIG.reserved_table_names.collection_indexes} as indexes
+            join {CONFIG.reserved_table_names.collections} as collections
+            on indexes.collection_id = collections.id
+        order by indexes.id
+    """
+    )
+
+    for collection_name, index_name, index_fields, is_unique in cursor.fetchall():
+        schemas[collection_name].indexes[index_name] = CollectionIndex(
+            name=index_name, fields=tuple(msgpack.unpackb(index_fields)), unique=bool(is_unique)
+        )
+
+    cursor.execute(
+        f"""
+        select
+            collections.name,
+            vector_indexes.field_name,
+            vector_indexes.metric,
+            vector_indexes.centroids
+        from
+            {CONFIG.reserved_table_names.collection_vector_indexes} as vector_indexes
+            join {CONFIG.reserved_table_names.collections} as collections
+            on vector_indexes.collection_id = collections.id
+    """
+    )
+
+    for collection_name, field_name, metric, centroids in cursor.fetchall():
+        field = schemas[collection_name].fields[field_name]
+        schemas[collection_name].vector_indexes[field_name] = VectorIndex(
+            field_name=field_name,
+            metric=metric,
+            centroids=np.frombuffer(centroids, dtype=np.float64).reshape(-1, field.shape[0]),
+        )
+
+    return schemas
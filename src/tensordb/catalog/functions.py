@@ -0,0 +1,85 @@
+import sqlite3
+
+import msgpack
+
+from tensordb.config import CONFIG
+
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def create_metadata_table(cursor: sqlite3.Cursor) -> None:
+    """Create the metadata table, and initialize the schema version.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+    """
+    table_name = CONFIG.reserved_table_names.metadata
+
+    cursor.execute(
+        f"""
+        create table if not exists {table_name} (
+            key text primary key,
+            value integer
+        )
+    """
+    )
+
+    cursor.execute(
+        f"""
+        insert or ignore into {table_name} (key, value)
+        values (?, 0)
+    """,
+        (SCHEMA_VERSION_KEY,),
+    )
+
+
+def get_schema_version(cursor: sqlite3.Cursor) -> int:
+    """Get the schema version of the database.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+
+    Returns:
+        version: The schema version, which changes every time the schema does.
+    """
+    cursor.execute(
+        f"""
+        select value from {CONFIG.reserved_table_names.metadata}
+        where key = ?
+    """,
+        (SCHEMA_VERSION_KEY,),
+    )
+
+    return cursor.fetchone()[0]
+
+
+def bump_schema_version(cursor: sqlite3.Cursor) -> None:
+    """Increment the schema version, invalidating all cached catalogs.
+
+    Must be called in the same transaction as the schema change.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+    """
+    cursor.execute(
+        f"""
+        update {CONFIG.reserved_table_names.metadata}
+        set value = value + 1
+        where key = ?
+    """,
+        (SCHEMA_VERSION_KEY,),
+    )
+
+
+def unpack_shape(packed: bytes) -> tuple[int | None, ...] | None:
+    """Decode the shape of a tensor field, as stored in the tensor fields table.
+
+    Args:
+        packed: The msgpack encoded shape.
+
+    Returns:
+        shape: The shape, or None for fields of any shape.
+    """
+    shape = msgpack.unpackb(packed)
+
+    return tuple(shape) if shape is not None else None
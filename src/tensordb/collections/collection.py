@@ -1,10 +1,20 @@
-from typing import Any, Type
+from pathlib import Path
+from typing import Any, Sequence, Type
+
+import numpy as np
 
 from tensordb.backend import Backend
-from tensordb.collections.functions import collection_exists, create_collection, get_collection_fields
-from tensordb.collections.insert import insert_data
+from tensordb.catalog import CollectionIndex
+from tensordb.collections.export import export_collection
+from tensordb.collections.functions import create_collection
+from tensordb.collections.indexes import create_index, drop_index
+from tensordb.collections.insert import insert_columns, insert_data, prepare_row
 from tensordb.collections.query import Query
+from tensordb.collections.update import delete_data, update_data
+from tensordb.collections.vectors import create_vector_index, drop_vector_index, nearest, update_vector_indexes
+from tensordb.collections.writer import BufferedWriter
 from tensordb.fields import Field
+from tensordb.profiling import CATALOG_ZONE
 from tensordb.utils.naming import check_name_valid
 
 
@@ -34,14 +44,14 @@ class Collection:
         if fields is not None:
             create_collection(name, fields, self.__backend)
         else:
-            assert collection_exists(name, self.__backend.cursor()), f"Collection {name} does not exist"
+            assert self.__backend.catalog.exists(name, self.__backend.cursor()), f"Collection {name} does not exist"
 
         self.__name = name
 
     @property
     def fields(self) -> dict[str, Type | Field]:
         """The fields of the collection."""
-        return get_collection_fields(self.__name, self.__backend.cursor())
+        return dict(self.__backend.catalog.fields(self.__name, self.__backend.cursor()))
 
     @property
     def name(self) -> str:
@@ -51,15 +61,200 @@ class Collection:
     def insert(self, data: dict[str, Any] | list[dict[str, Any]]) -> None:
         """Insert data into the collection.
 
+        All rows are inserted in a single transaction.
+
         Args:
             data: The data to insert.
         """
         if isinstance(data, dict):
             data = [data]
 
-        cursor = self.__backend.cursor()
-        insert_data(self.__name, data, cursor)
-        self.__backend.commit()
+        with self.__backend.transaction() as cursor:
+            with self.__backend.profiler.zone(CATALOG_ZONE):
+                schema = self.__backend.catalog.schema(self.__name, cursor)
+
+            insert_data(self.__name, schema.fields, data, cursor, self.__backend.store, self.__backend.profiler)
+            update_vector_indexes(schema, cursor, self.__backend.store)
+
+    def insert_columns(self, columns: dict[str, Sequence | np.ndarray]) -> int:
+        """Insert data given as one sequence of values per field.
+
+        This is the fastest way to insert many rows. Tensor fields can be given as
+        a single array of shape (N, ...), which is written to storage in one piece.
+
+        Args:
+            columns: Mapping from field name to the values of that field.
+
+        Returns:
+            num_rows: The number of inserted rows.
+        """
+        with self.__backend.transaction() as cursor:
+            with self.__backend.profiler.zone(CATALOG_ZONE):
+                schema = self.__backend.catalog.schema(self.__name, cursor)
+
+            num_rows = insert_columns(
+                self.__name, schema.fields, columns, cursor, self.__backend.store, self.__backend.profiler
+            )
+            update_vector_indexes(schema, cursor, self.__backend.store)
+
+        return num_rows
+
+    def update(self, query: dict, values: dict[str, Any]) -> int:
+        """Set fields of the rows matching a query to new values.
+
+        Args:
+            query: The rows to update, as in find.
+            values: Mapping from field name to its new value.
+
+        Returns:
+            num_rows: The number of updated rows.
+        """
+        with self.__backend.transaction() as cursor:
+            with self.__backend.profiler.zone(CATALOG_ZONE):
+                schema = self.__backend.catalog.schema(self.__name, cursor)
+
+            ids = update_data(self.__name, schema, query, values, cursor, self.__backend.store, self.__backend.profiler)
+            update_vector_indexes(schema, cursor, self.__backend.store)
+
+        self.__backend.cache.invalidate(self.__name, ids)
+
+        return len(ids)
+
+    def delete(self, query: dict) -> int:
+        """Delete the rows matching a query.
+
+        Args:
+            query: The rows to delete, as in find. {} deletes all rows.
+
+        Returns:
+            num_rows: The number of deleted rows.
+        """
+        with self.__backend.transaction() as cursor:
+            with self.__backend.profiler.zone(CATALOG_ZONE):
+                schema = self.__backend.catalog.schema(self.__name, cursor)
+
+            ids = delete_data(self.__name, schema, query, cursor)
+
+        self.__backend.cache.invalidate(self.__name, ids)
+
+        return len(ids)
+
+    def export(self, path: Path) -> int:
+        """Export all rows to a directory of .npy column files and a manifest.
+
+        Scalar fields and tensor fields with a fixed shape are written as one contiguous
+        array each, which numpy can memory map. Import the export with Database.import_collection.
+
+        Args:
+            path: The directory to write to. It is created if it does not exist.
+
+        Returns:
+            num_rows: The number of exported rows.
+        """
+        return export_collection(self.__name, path, self.__backend)
+
+    def writer(self, max_rows: int = 1024, max_latency_ms: float = 100) -> BufferedWriter:
+        """Get a writer that buffers rows, and inserts them in groups from a background thread.
+
+        Use it to insert single rows from many producers without a commit per row.
+        Rows are validated when they are written, and are durable once the writer is
+        flushed or closed.
+
+        Args:
+            max_rows: The maximum number of rows committed at once.
+            max_latency_ms: The maximum time a row waits before it is committed, in milliseconds.
+
+        Returns:
+            writer: The writer, which must be closed, e.g. by using it in a with block.
+        """
+        fields = self.fields
+
+        return BufferedWriter(self.insert, max_rows, max_latency_ms, lambda row: prepare_row(fields, row))
+
+    def create_index(self, fields: str | list[str], unique: bool = False) -> str:
+        """Create a secondary index on scalar fields, or on statistics of tensor fields.
+
+        Queries with conditions on the indexed fields use the index instead of scanning the collection.
+
+        Args:
+            fields: The field or fields to index, in index order, e.g. "name" or "tensor.$max".
+            unique: Whether the index enforces unique values.
+
+        Returns:
+            name: The name of the index.
+        """
+        if isinstance(fields, str):
+            fields = [fields]
+
+        return create_index(self.__name, fields, unique, self.__backend)
+
+    def drop_index(self, name: str) -> None:
+        """Drop a secondary index.
+
+        Args:
+            name: The name of the index, as returned by create_index.
+        """
+        drop_index(self.__name, name, self.__backend)
+
+    def list_indexes(self) -> list[CollectionIndex]:
+        """The secondary indexes of the collection."""
+        return list(self.__backend.catalog.schema(self.__name, self.__backend.cursor()).indexes.values())
+
+    def nearest(
+        self,
+        field: str,
+        query_vector: np.ndarray,
+        k: int = 10,
+        metric: str = "l2",
+        where: dict | None = None,
+        n_probe: int = 8,
+    ) -> list[tuple[dict[str, Any], float]]:
+        """Find the rows whose vectors are closest to a query vector.
+
+        Without a vector index on the field, this is an exact scan over all matching rows.
+        With a vector index built for the same metric, only the n_probe inverted
+        lists closest to the query vector are scanned, which is approximate.
+
+        Args:
+            field: A tensor field with a fixed 1-D shape.
+            query_vector: The vector to compare with.
+            k: The number of neighbors to return.
+            metric: "l2" for the euclidean distance, "cosine" for one minus the cosine
+                similarity, and "ip" for the negative inner product.
+            where: Conditions the rows must satisfy, as in find.
+            n_probe: The number of inverted lists to scan when a vector index is used.
+
+        Returns:
+            neighbors: (row, distance) of the k nearest rows, closest first. The rows are read
+                after the search, so rows deleted in between are left out.
+        """
+        neighbors = nearest(self.__name, field, query_vector, k, metric, where, n_probe, self.__backend)
+
+        ids = [row_id for row_id, _ in neighbors]
+        rows = {row["id"]: row for row in self.find({"id": {"$in": ids}}).execute()}
+
+        return [(rows[row_id], distance) for row_id, distance in neighbors if row_id in rows]
+
+    def create_vector_index(self, field: str, n_lists: int | None = None, metric: str = "l2") -> None:
+        """Build an approximate nearest neighbor (IVF) index on a 1-D tensor field.
+
+        The vectors are clustered, and every row is assigned to the inverted list of its
+        closest centroid. Rows inserted later are assigned on insert.
+
+        Args:
+            field: A tensor field with a fixed 1-D shape.
+            n_lists: The number of inverted lists. If None, the square root of the number of rows.
+            metric: The metric that nearest queries using the index will use.
+        """
+        create_vector_index(self.__name, field, n_lists, metric, self.__backend)
+
+    def drop_vector_index(self, field: str) -> None:
+        """Drop the vector index on a field.
+
+        Args:
+            field: The indexed field.
+        """
+        drop_vector_index(self.__name, field, self.__backend)
 
     def find(self, query: dict | None = None) -> Query:
         """Query the collection.
@@ -0,0 +1,143 @@
+"""Storage of the tensors of fields with dedup, once per unique tensor.
+
+Every unique tensor of a field is stored once, as a payload in the segment store.
+The payloads table maps (collection, field, hash) to the location of the payload,
+and counts the rows that reference it. Rows hold the location of their payload in
+their location columns like any other tensor, so reading them is unchanged.
+
+The segment store is append-only, so payloads that lose their last reference stay
+stored, and are reused when an equal tensor is inserted again.
+"""
+
+import json
+import sqlite3
+from collections import Counter
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+from tensordb.catalog import CollectionSchema
+from tensordb.config import CONFIG
+from tensordb.fields import TensorField
+from tensordb.storage import SegmentStore, encode_shape, tensor_column_name, tensor_hash, write_tensor
+from tensordb.storage.codecs import parallel_map
+
+PAYLOADS_TABLE = CONFIG.reserved_table_names.tensor_payloads
+
+
+def write_deduplicated_tensors(
+    collection_name: str,
+    field_name: str,
+    field: TensorField,
+    arrays: list[np.ndarray],
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+) -> tuple[list[tuple[Any, ...]], list[str]]:
+    """Store tensors of a field with dedup, appending only the payloads that are not stored yet.
+
+    Every tensor adds a reference to its payload.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The name of the field.
+        field: The tensor field.
+        arrays: The tensors, as returned by prepare_tensor.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to write payloads to.
+
+    Returns:
+        locations: The values of the location columns of every tensor.
+        hashes: The hash of every tensor.
+    """
+    # hashlib releases the GIL for large buffers
+    hashes = parallel_map(tensor_hash, arrays)
+    counts = Counter(hashes)
+    collection_id = get_collection_id(collection_name, cursor)
+
+    cursor.execute(
+        f"""
+        select hash, segment, offset, stored_nbytes
+        from {PAYLOADS_TABLE}
+        where collection_id = ? and field_name = ? and hash in (select value from json_each(?))
+    """,
+        (collection_id, field_name, json.dumps(list(counts))),
+    )
+    payloads = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    new_payloads = []
+    for array, array_hash in zip(arrays, hashes):
+        if array_hash not in payloads:
+            payloads[array_hash] = write_tensor(collection_name, array, field, store)[:3]
+            new_payloads.append((collection_id, field_name, array_hash, *payloads[array_hash]))
+
+    cursor.executemany(
+        f"""
+        insert into {PAYLOADS_TABLE} (collection_id, field_name, hash, segment, offset, stored_nbytes, refcount)
+        values (?, ?, ?, ?, ?, ?, 0)
+    """,
+        new_payloads,
+    )
+    add_references(collection_id, field_name, counts, cursor)
+
+    locations = [(*payloads[array_hash], encode_shape(array.shape)) for array, array_hash in zip(arrays, hashes)]
+
+    return locations, hashes
+
+
+def add_references(collection_id: int, field_name: str, counts: Mapping[str, int], cursor: sqlite3.Cursor) -> None:
+    """Add to the reference counts of payloads.
+
+    Args:
+        collection_id: The id of the collection.
+        field_name: The name of the field.
+        counts: Mapping from hash to the number of references to add, or to remove if negative.
+        cursor: The cursor to use to execute the command.
+    """
+    cursor.executemany(
+        f"""
+        update {PAYLOADS_TABLE} set refcount = refcount + ?
+        where collection_id = ? and field_name = ? and hash = ?
+    """,
+        [(count, collection_id, field_name, array_hash) for array_hash, count in counts.items()],
+    )
+
+
+def remove_references(
+    schema: CollectionSchema, field_names: Iterable[str], ids: list[int], cursor: sqlite3.Cursor
+) -> None:
+    """Remove the references of rows to the payloads of their tensors, before the rows are deleted or updated.
+
+    Args:
+        schema: The schema of the collection.
+        field_names: The fields whose references are removed. Fields without dedup are skipped.
+        ids: The ids of the rows.
+        cursor: The cursor to use to execute the command.
+    """
+    for field_name in field_names:
+        field = schema.fields[field_name]
+        if not isinstance(field, TensorField) or not field.dedup:
+            continue
+
+        hash_column = tensor_column_name(field_name, "hash")
+        cursor.execute(
+            f"""
+            select {hash_column}, count(*) from {schema.name}
+            where id in (select value from json_each(?))
+            group by {hash_column}
+        """,
+            (json.dumps(ids),),
+        )
+
+        add_references(schema.id, field_name, {array_hash: -count for array_hash, count in cursor.fetchall()}, cursor)
+
+
+def get_collection_id(collection_name: str, cursor: sqlite3.Cursor) -> int:
+    """Get the id of a collection in the collections table.
+
+    Args:
+        collection_name: The name of the collection.
+        cursor: The cursor to use to execute the command.
+    """
+    cursor.execute(f"select id from {CONFIG.reserved_table_names.collections} where name = ?", (collection_name,))
+
+    return cursor.fetchone()[0]
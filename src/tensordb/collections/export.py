@@ -0,0 +1,344 @@
+"""Export of collections to columnar .npy files, and import of them.
+
+An export is a directory with a manifest.json, describing the fields and indexes
+of the collection, and one .npy file per field:
+
+- Scalar fields are a (N,) array. If the field has missing values,
+  {field}.missing.npy is a (N,) boolean array that is True for them, and the
+  column holds 0 or "" in their place.
+- Tensor fields with a fixed shape are a single (N, *shape) array.
+- Other tensor fields are the flattened tensors one after another, with their
+  shapes in {field}.shapes.npy: an (N, ndim) array, padded with -1 for tensors
+  of fewer dimensions.
+
+Rows are exported in the order of their ids, and get new ids when imported.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Type
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from tensordb.backend import Backend
+from tensordb.collections.functions import add_collection
+from tensordb.collections.indexes import add_index
+from tensordb.collections.insert import insert_columns
+from tensordb.collections.query.columns import TYPE_TO_NUMPY_DTYPE
+from tensordb.collections.query.decode import column_layout
+from tensordb.collections.vectors import add_vector_index
+from tensordb.fields import Field, TensorField
+from tensordb.profiling import CATALOG_ZONE
+from tensordb.storage import (
+    TENSOR_LOCATION_COLUMN_TYPES,
+    decode_shape,
+    field_select_columns,
+    read_tensors,
+    read_tensors_into,
+)
+
+MANIFEST_NAME = "manifest.json"
+
+MANIFEST_VERSION = 1
+
+# Number of rows whose tensors are read or written at a time
+TRANSFER_BATCH_ROWS = 4096
+
+SCALAR_TYPE_NAMES = {int: "int", float: "float", str: "str"}
+
+
+def export_collection(collection_name: str, path: Path, backend: Backend) -> int:
+    """Write all rows of a collection to column files and a manifest.
+
+    The rows are selected with a single statement, so the export is consistent even
+    while other threads write. Only the selected locations of the tensors are held in
+    memory, and the tensors are copied to the column files a batch at a time.
+
+    Args:
+        collection_name: The name of the collection.
+        path: The directory to write to. It is created if it does not exist.
+        backend: The backend to use.
+
+    Returns:
+        num_rows: The number of exported rows.
+    """
+    path = Path(path)
+    if (path / MANIFEST_NAME).exists():
+        raise FileExistsError(f"{path} already holds an export")
+
+    cursor = backend.cursor()
+    with backend.profiler.zone(CATALOG_ZONE):
+        schema = backend.catalog.schema(collection_name, cursor)
+
+    fields = [field_name for field_name in schema.fields if field_name != "id"]
+    columns = [column for field in fields for column in field_select_columns(field, schema.fields[field])]
+
+    cursor.execute(f"select {', '.join(columns)} from {collection_name} order by id")
+    values = list(zip(*cursor.fetchall())) or [()] * len(columns)
+    num_rows = len(values[0]) if values else 0
+
+    path.mkdir(parents=True, exist_ok=True)
+
+    for field_name, tensor_field, index in column_layout(fields, schema.fields):
+        if tensor_field is None:
+            export_scalars(field_name, schema.fields[field_name], values[index], path)
+            continue
+
+        locations = list(zip(*values[index : index + len(TENSOR_LOCATION_COLUMN_TYPES)]))
+        if tensor_field.has_fixed_shape:
+            export_fixed_tensors(collection_name, field_name, tensor_field, locations, path, backend)
+        else:
+            export_variable_tensors(collection_name, field_name, tensor_field, locations, path, backend)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "name": collection_name,
+        "num_rows": num_rows,
+        "fields": {field_name: field_manifest(schema.fields[field_name]) for field_name in fields},
+        "indexes": [{"fields": list(index.fields), "unique": index.unique} for index in schema.indexes.values()],
+        "vector_indexes": [
+            {"field": field_name, "metric": vector_index.metric, "n_lists": len(vector_index.centroids)}
+            for field_name, vector_index in schema.vector_indexes.items()
+        ],
+    }
+
+    # The manifest is written last, so that an interrupted export is never imported
+    (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+    return num_rows
+
+
+def export_scalars(field_name: str, field_type: Type, values: tuple, path: Path) -> None:
+    """Write the values of a scalar field to its column file.
+
+    Args:
+        field_name: The name of the field.
+        field_type: The type of the field.
+        values: The value of every row.
+        path: The directory of the export.
+    """
+    missing = np.array([value is None for value in values], dtype=bool)
+    if missing.any():
+        np.save(path / f"{field_name}.missing.npy", missing)
+        values = tuple(field_type() if value is None else value for value in values)
+
+    np.save(path / f"{field_name}.npy", np.array(values, dtype=TYPE_TO_NUMPY_DTYPE[field_type]))
+
+
+def export_fixed_tensors(
+    collection_name: str,
+    field_name: str,
+    field: TensorField,
+    locations: list[tuple],
+    path: Path,
+    backend: Backend,
+) -> None:
+    """Copy the tensors of a field with a fixed shape into a single (N, *shape) column file.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The name of the field.
+        field: The tensor field.
+        locations: The values of the location columns of every tensor.
+        path: The directory of the export.
+        backend: The backend to use.
+    """
+    out = open_memmap(
+        path / f"{field_name}.npy", mode="w+", dtype=np.dtype(field.dtype), shape=(len(locations), *field.shape)
+    )
+
+    for start in range(0, len(locations), TRANSFER_BATCH_ROWS):
+        segments, offsets, stored_nbytes, _ = zip(*locations[start : start + TRANSFER_BATCH_ROWS])
+        read_tensors_into(
+            collection_name,
+            field,
+            np.array(segments),
+            np.array(offsets),
+            np.array(stored_nbytes),
+            out[start : start + TRANSFER_BATCH_ROWS],
+            backend.store,
+        )
+
+    out.flush()
+
+
+def export_variable_tensors(
+    collection_name: str,
+    field_name: str,
+    field: TensorField,
+    locations: list[tuple],
+    path: Path,
+    backend: Backend,
+) -> None:
+    """Copy the flattened tensors of a field into one column file, and their shapes into another.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The name of the field.
+        field: The tensor field.
+        locations: The values of the location columns of every tensor.
+        path: The directory of the export.
+        backend: The backend to use.
+    """
+    shapes = [decode_shape(location[-1]) for location in locations]
+    ndim = max((len(shape) for shape in shapes), default=len(field.shape or ()))
+
+    padded_shapes = np.full((len(shapes), ndim), -1, dtype=np.int64)
+    for row, shape in enumerate(shapes):
+        padded_shapes[row, : len(shape)] = shape
+    np.save(path / f"{field_name}.shapes.npy", padded_shapes)
+
+    sizes = [int(np.prod(shape, dtype=np.int64)) for shape in shapes]
+    out = open_memmap(path / f"{field_name}.npy", mode="w+", dtype=np.dtype(field.dtype), shape=(sum(sizes),))
+
+    position = 0
+    for start in range(0, len(locations), TRANSFER_BATCH_ROWS):
+        for tensor in read_tensors(
+            collection_name, field, locations[start : start + TRANSFER_BATCH_ROWS], backend.store
+        ):
+            out[position : position + tensor.size] = tensor.reshape(-1)
+            position += tensor.size
+
+    out.flush()
+
+
+def field_manifest(field_type: Type | Field) -> dict[str, Any]:
+    """Describe a field in the manifest.
+
+    Args:
+        field_type: The type of the field.
+    """
+    if not isinstance(field_type, TensorField):
+        return {"type": SCALAR_TYPE_NAMES[field_type]}
+
+    return {
+        "type": "tensor",
+        "dtype": np.dtype(field_type.dtype).str,
+        "shape": list(field_type.shape) if field_type.shape is not None else None,
+        "codec": field_type.codec,
+        "chunk_rows": field_type.chunk_rows,
+        "dedup": field_type.dedup,
+    }
+
+
+def manifest_field(description: dict[str, Any]) -> Type | Field:
+    """Get a field from its description in the manifest, see field_manifest.
+
+    Args:
+        description: The description of the field.
+    """
+    if description["type"] != "tensor":
+        return {name: field_type for field_type, name in SCALAR_TYPE_NAMES.items()}[description["type"]]
+
+    shape = description["shape"]
+
+    return TensorField(
+        dtype=np.dtype(description["dtype"]),
+        shape=tuple(shape) if shape is not None else None,
+        codec=description["codec"],
+        chunk_rows=description["chunk_rows"],
+        dedup=description["dedup"],
+    )
+
+
+def import_collection(path: Path, name: str | None, backend: Backend) -> str:
+    """Create a collection from an export, see export_collection.
+
+    The column files are memory mapped, and the rows are inserted a batch at a time,
+    with every tensor column written as one block per batch. Indexes are built after
+    the rows are inserted, in the same transaction, so a failed import leaves no collection.
+
+    Args:
+        path: The directory of the export.
+        name: The name of the new collection. If None, the name of the exported collection.
+        backend: The backend to use.
+
+    Returns:
+        name: The name of the new collection.
+    """
+    path = Path(path)
+    manifest = json.loads((path / MANIFEST_NAME).read_text())
+
+    if manifest["version"] != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported export version {manifest['version']}, expected {MANIFEST_VERSION}")
+
+    name = name or manifest["name"]
+    num_rows = manifest["num_rows"]
+    fields = {field_name: manifest_field(description) for field_name, description in manifest["fields"].items()}
+
+    # Check every column before the collection is created
+    columns = {}
+    for field_name, field_type in fields.items():
+        columns[field_name] = np.load(path / f"{field_name}.npy", mmap_mode="r")
+
+        if isinstance(field_type, TensorField) and not field_type.has_fixed_shape:
+            shapes = np.load(path / f"{field_name}.shapes.npy")
+            if len(shapes) != num_rows:
+                raise ValueError(f"Expected {num_rows} shapes of field {field_name}, got {len(shapes)}")
+            columns[field_name] = split_tensors(field_name, columns[field_name], shapes)
+        elif len(columns[field_name]) != num_rows:
+            raise ValueError(f"Expected {num_rows} rows of field {field_name}, got {len(columns[field_name])}")
+        elif (path / f"{field_name}.missing.npy").exists():
+            missing = np.load(path / f"{field_name}.missing.npy")
+            if len(missing) != num_rows:
+                raise ValueError(f"Expected {num_rows} missing flags of field {field_name}, got {len(missing)}")
+            columns[field_name] = with_missing_values(columns[field_name], missing)
+
+    # The collection is only created if all of its rows and indexes are
+    with backend.transaction() as cursor:
+        add_collection(name, fields, cursor)
+
+        with backend.profiler.zone(CATALOG_ZONE):
+            schema = backend.catalog.schema(name, cursor)
+
+        for start in range(0, num_rows, TRANSFER_BATCH_ROWS):
+            batch = {field_name: values[start : start + TRANSFER_BATCH_ROWS] for field_name, values in columns.items()}
+            insert_columns(name, schema.fields, batch, cursor, backend.store, backend.profiler)
+
+        for index in manifest["indexes"]:
+            add_index(backend.catalog.schema(name, cursor), index["fields"], index["unique"], cursor)
+
+        for vector_index in manifest["vector_indexes"]:
+            add_vector_index(
+                backend.catalog.schema(name, cursor),
+                vector_index["field"],
+                vector_index["n_lists"],
+                vector_index["metric"],
+                cursor,
+                backend.store,
+            )
+
+    return name
+
+
+def with_missing_values(values: np.ndarray, missing: np.ndarray) -> list[Any]:
+    """Get the values of a scalar column, with None where values are missing.
+
+    Args:
+        values: The values of the column.
+        missing: Whether the value of every row is missing.
+    """
+    return [None if is_missing else value for value, is_missing in zip(values.tolist(), missing.tolist())]
+
+
+def split_tensors(field_name: str, flat: np.ndarray, shapes: np.ndarray) -> list[np.ndarray]:
+    """Split the flattened tensors of a field without a fixed shape into views of every tensor.
+
+    Args:
+        field_name: The name of the field, used for error messages.
+        flat: The tensors, flattened one after another.
+        shapes: The shape of every tensor, padded with -1.
+
+    Returns:
+        tensors: A view of every tensor.
+    """
+    tensor_shapes = [tuple(int(dim) for dim in shape if dim >= 0) for shape in shapes]
+    sizes = np.array([np.prod(shape, dtype=np.int64) for shape in tensor_shapes], dtype=np.int64)
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+
+    if sizes.sum() != len(flat):
+        raise ValueError(f"The shapes of field {field_name} do not match the size of its column")
+
+    return [flat[start:end].reshape(shape) for start, end, shape in zip(starts, ends, tensor_shapes)]
@@ -5,8 +5,16 @@ import msgpack
 import numpy as np
 
 from tensordb.backend import Backend
+from tensordb.catalog.functions import bump_schema_version, unpack_shape
 from tensordb.config import CONFIG
 from tensordb.fields import Field, TensorField
+from tensordb.storage import (
+    check_chunk_rows,
+    check_codec,
+    is_hidden_column,
+    tensor_column_name,
+    tensor_column_types,
+)
 from tensordb.utils.naming import check_name_valid
 from tensordb.utils.sqlite import SQL_TYPE_TO_TYPE, TYPE_TO_SQL_TYPE, get_table_fields
 
@@ -23,10 +31,11 @@ def get_collection_fields(name: str, cursor: sqlite3.Cursor) -> dict[str, Type |
     """
     tensor_fields = get_collection_tensor_fields(name, cursor)
 
-    all_fields = get_table_fields(name, cursor)
-
-    for key, value in all_fields.items():
-        all_fields[key] = SQL_TYPE_TO_TYPE[value]
+    all_fields = {
+        key: SQL_TYPE_TO_TYPE[value]
+        for key, value in get_table_fields(name, cursor).items()
+        if not is_hidden_column(key)
+    }
 
     all_fields.update(tensor_fields)
 
@@ -63,24 +72,41 @@ def create_collection(name, fields: dict[str, Type | Field], backend: Backend) -
         fields: Mapping from field name to field type.
         backend: The backend to use.
     """
+    with backend.transaction() as cursor:
+        add_collection(name, fields, cursor)
+
+
+def add_collection(name, fields: dict[str, Type | Field], cursor: sqlite3.Cursor) -> None:
+    """Create a new collection in an open transaction, see create_collection.
+
+    Args:
+        name: The name of the collection.
+        fields: Mapping from field name to field type.
+        cursor: The cursor of the transaction.
+    """
     assert check_name_valid(name), f"{name} is not a valid collection name"
 
-    for field_name in fields.keys():
+    for field_name, field_type in fields.items():
         assert check_name_valid(field_name), f"{field_name} is not a valid field name"
 
+        if is_hidden_column(field_name):
+            raise ValueError(f"{field_name} is not a valid field name, names starting with __ are reserved")
+
+        if isinstance(field_type, TensorField):
+            check_codec(field_name, field_type.codec, field_type.dtype)
+            check_chunk_rows(field_name, field_type)
+
     if "id" in fields:
         raise ValueError("id is a reserved field name")
 
-    cursor = backend.cursor()
-
     if collection_exists(name, cursor):
         raise ValueError(f"Collection {name} already exists")
 
-    create_collection_table(name, fields, cursor)
+    # Record the collection first, so the table is created inside the transaction
     collection_id = insert_collection(name, cursor)
+    create_collection_table(name, fields, cursor)
     insert_collection_fields(collection_id, fields, cursor)
-
-    backend.commit()
+    bump_schema_version(cursor)
 
 
 def create_collection_table(name: str, fields: dict[str, Type | Field], cursor: sqlite3.Cursor) -> None:
@@ -103,7 +129,8 @@ def create_collection_table(name: str, fields: dict[str, Type | Field], cursor:
 
     for field_name, field_type in fields.items():
         if isinstance(field_type, TensorField):
-            query_field_list.append(f"{field_name} text")
+            for attribute, sql_type in tensor_column_types(field_type).items():
+                query_field_list.append(f"{tensor_column_name(field_name, attribute)} {sql_type}")
         else:
             assert field_type in TYPE_TO_SQL_TYPE, f"Unsupported type: {field_type}"
             sql_type = TYPE_TO_SQL_TYPE[field_type]
@@ -158,16 +185,24 @@ def insert_collection_fields(
     """
     table_name = CONFIG.reserved_table_names.collection_tensor_fields
     insert_template = f"""
-        insert into {table_name} (collection_id, field_name, dtype, shape)
+        insert into {table_name} (collection_id, field_name, dtype, shape, codec, chunk_rows, dedup)
         values
-        (?, ?, ?, ?)
+        (?, ?, ?, ?, ?, ?, ?)
     """
 
     for field_name, field_type in fields.items():
         if isinstance(field_type, TensorField):
             cursor.execute(
                 insert_template,
-                (collection_id, field_name, np.dtype(field_type.dtype).name, msgpack.packb(field_type.shape)),
+                (
+                    collection_id,
+                    field_name,
+                    np.dtype(field_type.dtype).name,
+                    msgpack.packb(field_type.shape),
+                    field_type.codec,
+                    field_type.chunk_rows,
+                    int(field_type.dedup),
+                ),
             )
 
 
@@ -186,7 +221,10 @@ def get_collection_tensor_fields(collection_name: str, cursor: sqlite3.Cursor) -
         select
             field_name,
             dtype,
-            shape
+            shape,
+            codec,
+            chunk_rows,
+            dedup
         from
             {CONFIG.reserved_table_names.collection_tensor_fields}
         where collection_id = (
@@ -198,7 +236,13 @@ def get_collection_tensor_fields(collection_name: str, cursor: sqlite3.Cursor) -
     )
 
     tensor_fields = {}
-    for field_name, dtype, shape in cursor.fetchall():
-        tensor_fields[field_name] = TensorField(dtype=np.dtype(dtype), shape=tuple(msgpack.unpackb(shape)))
+    for field_name, dtype, shape, codec, chunk_rows, dedup in cursor.fetchall():
+        tensor_fields[field_name] = TensorField(
+            dtype=np.dtype(dtype),
+            shape=unpack_shape(shape),
+            codec=codec,
+            chunk_rows=chunk_rows,
+            dedup=bool(dedup),
+        )
 
     return tensor_fields
@@ -0,0 +1,134 @@
+import re
+import sqlite3
+
+import msgpack
+
+from tensordb.backend import Backend
+from tensordb.catalog import CollectionSchema
+from tensordb.catalog.functions import bump_schema_version
+from tensordb.collections.query.conditions import field_expression
+from tensordb.config import CONFIG
+
+# Escapes of the characters of indexed fields that are not valid in sql names. The underscore
+# is escaped too, so that every list of fields gets a different index name.
+INDEX_NAME_ESCAPES = {"_": "_0", ".": "_1", "$": "_2"}
+
+
+def get_index_name(collection_name: str, fields: list[str]) -> str:
+    """Get the name of the index on the given fields of a collection.
+
+    Sql index names are shared by all collections. Every underscore in the escaped
+    collection name and fields is followed by a digit or x, so they are separated by
+    a double underscore.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The indexed fields, in index order.
+    """
+    parts = [re.sub(r"[^A-Za-z0-9]", escape_index_name_character, part) for part in [collection_name, *fields]]
+    return f"__idx__{'__'.join(parts)}"
+
+
+def escape_index_name_character(match: re.Match) -> str:
+    """Escape a character of an indexed field, see get_index_name.
+
+    Args:
+        match: The match of the character.
+    """
+    character = match[0]
+    return INDEX_NAME_ESCAPES.get(character, f"_x{ord(character):06x}")
+
+
+def create_index(collection_name: str, fields: list[str], unique: bool, backend: Backend) -> str:
+    """Create a secondary index on fields of a collection, and record it in the catalog.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The fields to index, in index order.
+            Statistics of tensor fields such as "tensor.$max" can be indexed too.
+        unique: Whether the index enforces unique values.
+        backend: The backend to use.
+
+    Returns:
+        name: The name of the created index.
+    """
+    with backend.transaction() as cursor:
+        return add_index(backend.catalog.schema(collection_name, cursor), fields, unique, cursor)
+
+
+def add_index(schema: CollectionSchema, fields: list[str], unique: bool, cursor: sqlite3.Cursor) -> str:
+    """Create a secondary index in an open transaction, see create_index.
+
+    Args:
+        schema: The schema of the collection.
+        fields: The fields to index, in index order.
+        unique: Whether the index enforces unique values.
+        cursor: The cursor of the transaction.
+
+    Returns:
+        name: The name of the created index.
+    """
+    collection_name = schema.name
+
+    if len(fields) == 0:
+        raise ValueError("An index needs at least one field")
+
+    if len(set(fields)) != len(fields):
+        raise ValueError(f"Duplicate fields in index {fields}")
+
+    for field in fields:
+        if field.partition(".")[0] not in schema.fields:
+            raise ValueError(f"Collection {collection_name} has no field {field}")
+
+    expressions = [field_expression(field, schema.fields) for field in fields]
+
+    if any(list(index.fields) == list(fields) for index in schema.indexes.values()):
+        raise ValueError(f"Index on {fields} already exists")
+
+    name = get_index_name(collection_name, fields)
+
+    cursor.execute(
+        f"""
+        insert into {CONFIG.reserved_table_names.collection_indexes} (collection_id, name, fields, is_unique)
+        values (?, ?, ?, ?)
+    """,
+        (schema.id, name, msgpack.packb(fields), int(unique)),
+    )
+
+    cursor.execute(
+        f"""
+        create {"unique " if unique else ""}index {name}
+        on {collection_name} ({", ".join(expressions)})
+    """
+    )
+
+    bump_schema_version(cursor)
+
+    return name
+
+
+def drop_index(collection_name: str, name: str, backend: Backend) -> None:
+    """Drop a secondary index of a collection.
+
+    Args:
+        collection_name: The name of the collection.
+        name: The name of the index.
+        backend: The backend to use.
+    """
+    with backend.transaction() as cursor:
+        schema = backend.catalog.schema(collection_name, cursor)
+
+        if name not in schema.indexes:
+            raise ValueError(f"Collection {collection_name} has no index {name}")
+
+        cursor.execute(
+            f"""
+            delete from {CONFIG.reserved_table_names.collection_indexes}
+            where name = ?
+        """,
+            (name,),
+        )
+
+        cursor.execute(f"drop index {name}")
+
+        bump_schema_version(cursor)
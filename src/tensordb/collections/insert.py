@@ -1,29 +1,223 @@
 import sqlite3
-from typing import Any
+from typing import Any, Iterable, Sequence, Type
 
-from tensordb.collections.functions import get_collection_fields
+import numpy as np
 
+from tensordb.collections.dedup import write_deduplicated_tensors
+from tensordb.fields import Field, TensorField
+from tensordb.profiling import ENCODE_ZONE, SQL_EXECUTE_ZONE, Profiler, Zone
+from tensordb.storage import (
+    TENSOR_LOCATION_COLUMN_TYPES,
+    SegmentStore,
+    block_statistics,
+    field_columns,
+    prepare_tensor,
+    prepare_tensor_block,
+    tensor_statistics,
+    write_tensor,
+    write_tensor_block,
+)
+from tensordb.utils.sqlite import to_sql_value
 
-def insert_data(collection_name: str, data: list[dict[str, Any]], cursor: sqlite3.Cursor) -> None:
+# Python types accepted as values of scalar fields, see prepare_row
+SCALAR_VALUE_TYPES = {
+    int: (int, np.integer),
+    float: (int, float, np.integer, np.floating),
+    str: (str,),
+}
+
+
+def insert_data(
+    collection_name: str,
+    fields: dict[str, Type | Field],
+    data: list[dict[str, Any]],
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+    profiler: Profiler,
+) -> None:
     """Insert data into the collection.
 
+    Tensors are appended to the segment store, and the rows only hold their location.
+    All rows are inserted through a single prepared statement.
+
     Args:
         collection_name: The name of the collection.
+        fields: The fields of the collection.
         data: The data to insert.
         cursor: The cursor to use to execute the command.
+        store: The segment store to write tensors to.
+        profiler: The profiler to time encoding and executing in.
     """
-    fields = get_collection_fields(collection_name, cursor)
-    fields.pop("id")
+    fields = {field_name: field_type for field_name, field_type in fields.items() if field_name != "id"}
+
+    def row_values(row_index: int, row: dict[str, Any], zone: Zone) -> list[Any]:
+        values = []
+        for field_name, field_type in fields.items():
+            if field_name in deduplicated:
+                values.extend(deduplicated[field_name][row_index])
+            elif isinstance(field_type, TensorField):
+                array = prepare_tensor(field_name, row[field_name], field_type)
+                values.extend((*write_tensor(collection_name, array, field_type, store), *tensor_statistics(array)))
+                zone.nbytes += array.nbytes
+            else:
+                values.append(to_sql_value(row[field_name]))
+
+        return values
 
     for row in data:
-        assert set(row.keys()) == set(fields.keys()), f"Row {row} does not have the correct fields"
+        assert row.keys() == fields.keys(), f"Row {row} does not have the correct fields"
+
+    with profiler.zone(ENCODE_ZONE) as zone:
+        # Tensors of fields with dedup are stored together, so that equal tensors of different rows are found
+        deduplicated: dict[str, list[tuple]] = {}
+        for field_name, field_type in fields.items():
+            if isinstance(field_type, TensorField) and field_type.dedup and data:
+                values = [row[field_name] for row in data]
+                tensor_columns = tensor_column_values(collection_name, field_name, values, field_type, store, cursor)
+                deduplicated[field_name] = list(zip(*tensor_columns))
+                zone.nbytes += sum(tensor_columns[len(TENSOR_LOCATION_COLUMN_TYPES)])
+
+        rows = [row_values(row_index, row, zone) for row_index, row in enumerate(data)]
 
-        values = [row[field_name] for field_name in fields.keys()]
+    with profiler.zone(SQL_EXECUTE_ZONE):
+        cursor.executemany(insert_statement(collection_name, fields), rows)
 
-        cursor.execute(
-            f"""
-            insert into {collection_name} ({", ".join(fields.keys())})
-            values ({", ".join(["?"] * len(fields))})
-        """,
-            values,
-        )
+
+def insert_columns(
+    collection_name: str,
+    fields: dict[str, Type | Field],
+    columns: dict[str, Sequence | np.ndarray],
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+    profiler: Profiler,
+) -> int:
+    """Insert data given as one sequence of values per field.
+
+    Tensor fields can be given as a single array whose leading axis indexes rows.
+    Such a block is written to the segment store in one piece.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The fields of the collection.
+        columns: Mapping from field name to the values of that field.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to write tensors to.
+        profiler: The profiler to time encoding and executing in.
+
+    Returns:
+        num_rows: The number of inserted rows.
+    """
+    fields = {field_name: field_type for field_name, field_type in fields.items() if field_name != "id"}
+
+    assert columns.keys() == fields.keys(), f"Columns {list(columns.keys())} do not match the fields"
+
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"All columns must have the same length, got lengths {lengths}")
+
+    num_rows = lengths.pop() if lengths else 0
+    if num_rows == 0:
+        return 0
+
+    column_values: list[Iterable] = []
+    with profiler.zone(ENCODE_ZONE) as zone:
+        for field_name, field_type in fields.items():
+            values = columns[field_name]
+            if isinstance(field_type, TensorField):
+                tensor_columns = tensor_column_values(collection_name, field_name, values, field_type, store, cursor)
+                column_values.extend(tensor_columns)
+                # The nbytes statistic column follows the location columns
+                zone.nbytes += sum(tensor_columns[len(TENSOR_LOCATION_COLUMN_TYPES)])
+            elif isinstance(values, np.ndarray):
+                column_values.append(values.tolist())
+            else:
+                column_values.append(map(to_sql_value, values))
+
+    with profiler.zone(SQL_EXECUTE_ZONE):
+        cursor.executemany(insert_statement(collection_name, fields), zip(*column_values))
+
+    return num_rows
+
+
+def tensor_column_values(
+    collection_name: str,
+    field_name: str,
+    values: Sequence | np.ndarray,
+    field: TensorField,
+    store: SegmentStore,
+    cursor: sqlite3.Cursor,
+) -> list[Iterable]:
+    """Write the values of a tensor field to the store and get the values of its columns.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The name of the field.
+        values: The tensors, either as a sequence or stacked along the leading axis.
+        field: The tensor field.
+        store: The segment store to write tensors to.
+        cursor: The cursor to look up and record the payloads of fields with dedup.
+
+    Returns:
+        columns: The values of every column of the field, see field_columns.
+    """
+    if field.dedup:
+        if isinstance(values, np.ndarray):
+            block = prepare_tensor_block(field_name, values, field)
+            arrays, statistics = list(block), block_statistics(block)
+        else:
+            arrays = [prepare_tensor(field_name, value, field) for value in values]
+            statistics = list(zip(*map(tensor_statistics, arrays)))
+
+        locations, hashes = write_deduplicated_tensors(collection_name, field_name, field, arrays, cursor, store)
+        return [*zip(*locations), *statistics, hashes]
+
+    if not isinstance(values, np.ndarray):
+        arrays = [prepare_tensor(field_name, value, field) for value in values]
+        locations = [write_tensor(collection_name, array, field, store) for array in arrays]
+        return [*zip(*locations), *zip(*map(tensor_statistics, arrays))]
+
+    block = prepare_tensor_block(field_name, values, field)
+
+    return [*write_tensor_block(collection_name, block, field, store), *block_statistics(block)]
+
+
+def prepare_row(fields: dict[str, Type | Field], row: dict[str, Any]) -> dict[str, Any]:
+    """Validate a row before it is inserted, and convert its tensors to storable arrays.
+
+    Args:
+        fields: The fields of the collection.
+        row: The row.
+
+    Returns:
+        row: The row, with its tensors as returned by prepare_tensor and numpy scalars as Python values.
+    """
+    fields = {field_name: field_type for field_name, field_type in fields.items() if field_name != "id"}
+
+    if row.keys() != fields.keys():
+        raise ValueError(f"Row with fields {list(row.keys())} does not have the fields {list(fields.keys())}")
+
+    prepared = {}
+    for field_name, field_type in fields.items():
+        value = row[field_name]
+        if isinstance(field_type, TensorField):
+            value = prepare_tensor(field_name, value, field_type)
+        elif value is not None and not isinstance(value, SCALAR_VALUE_TYPES[field_type]):
+            raise TypeError(f"Cannot store {type(value).__name__} value in field {field_name} of type {field_type}")
+        prepared[field_name] = to_sql_value(value)
+
+    return prepared
+
+
+def insert_statement(collection_name: str, fields: dict[str, Type | Field]) -> str:
+    """Build the statement that inserts one row into a collection.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The fields of the collection, without the id.
+    """
+    columns = [column for field_name, field_type in fields.items() for column in field_columns(field_name, field_type)]
+
+    return f"""
+        insert into {collection_name} ({", ".join(columns)})
+        values ({", ".join(["?"] * len(columns))})
+    """
@@ -1,3 +1,4 @@
+from tensordb.collections.query.ordering import Page
 from tensordb.collections.query.query import Query
 
-__all__ = ["Query"]
+__all__ = ["Page", "Query"]
@@ -0,0 +1,290 @@
+"""Aggregations over the rows matching a query.
+
+Aggregates of scalar fields, and of statistics of tensor fields such as "tensor.$max",
+are computed by sqlite. Aggregates of whole tensors are reduced elementwise over a
+stream of the matching rows, a batch at a time, so memory use is bounded by the batch
+size and the number of groups rather than the number of rows.
+"""
+
+import math
+import sqlite3
+from typing import Any
+
+import numpy as np
+
+from tensordb.backend import Backend
+from tensordb.collections.query.conditions import compile_conditions, field_expression
+from tensordb.fields import TensorField
+from tensordb.profiling import DECODE_ZONE, SQL_EXECUTE_ZONE
+from tensordb.storage import TENSOR_LOCATION_COLUMN_TYPES, field_select_columns, read_tensors
+
+AGGREGATES = ("count", "sum", "mean", "min", "max", "std")
+
+# Aggregates computed by sqlite, of a value {0} whose mean in its group is {1}.
+# std is computed as the square root of the population variance, in two passes,
+# since avg(x * x) - avg(x) * avg(x) cancels catastrophically for large values.
+SQL_AGGREGATES = {
+    "count": "count({0})",
+    "sum": "sum({0})",
+    "mean": "avg({0})",
+    "min": "min({0})",
+    "max": "max({0})",
+    "std": "avg(({0} - {1}) * ({0} - {1}))",
+}
+
+# Number of rows whose tensors are read and reduced at a time
+AGGREGATE_BATCH_SIZE = 1024
+
+
+class TensorAccumulator:
+    """Elementwise aggregates of a stream of equally shaped tensors.
+
+    The mean and standard deviation are accumulated in float64, by combining the
+    mean and sum of squared deviations of every batch with those of the batches before.
+    The sum is accumulated in float64 too, or complex128 for complex tensors, so sums of
+    integer tensors never wrap around, at the cost of being inexact beyond 2**53.
+    """
+
+    __field_name: str
+    __count: int
+    __sum: np.ndarray | None
+    __min: np.ndarray | None
+    __max: np.ndarray | None
+    __mean: np.ndarray | None
+    # Sum of squared deviations from the mean
+    __m2: np.ndarray | None
+
+    def __init__(self, field_name: str) -> None:
+        """Initialize empty aggregates.
+
+        Args:
+            field_name: The name of the aggregated field, used for error messages.
+        """
+        self.__field_name = field_name
+        self.__count = 0
+        self.__sum = None
+        self.__min = None
+        self.__max = None
+        self.__mean = None
+        self.__m2 = None
+
+    def update(self, tensors: list[np.ndarray]) -> None:
+        """Add a batch of tensors to the aggregates.
+
+        Args:
+            tensors: The tensors, which must have the shape of all tensors added before.
+        """
+        if len(tensors) == 0:
+            return
+
+        shapes = {tensor.shape for tensor in tensors}
+        if len(shapes) != 1 or (self.__mean is not None and shapes.pop() != self.__mean.shape):
+            raise ValueError(f"Cannot aggregate tensors of field {self.__field_name} with different shapes")
+
+        batch = np.stack(tensors)
+        sum_dtype = np.complex128 if batch.dtype.kind == "c" else np.float64
+        batch_sum = batch.sum(axis=0, dtype=sum_dtype)
+        batch_mean = batch.mean(axis=0, dtype=np.float64)
+        batch_m2 = np.square(batch - batch_mean, dtype=np.float64).sum(axis=0)
+        batch_min, batch_max = batch.min(axis=0), batch.max(axis=0)
+
+        if self.__count == 0:
+            self.__count = len(batch)
+            self.__sum, self.__min, self.__max = batch_sum, batch_min, batch_max
+            self.__mean, self.__m2 = batch_mean, batch_m2
+            return
+
+        count = self.__count + len(batch)
+        delta = batch_mean - self.__mean
+
+        self.__sum = self.__sum + batch_sum
+        self.__min = np.minimum(self.__min, batch_min)
+        self.__max = np.maximum(self.__max, batch_max)
+        self.__mean = self.__mean + delta * (len(batch) / count)
+        self.__m2 = self.__m2 + batch_m2 + np.square(delta) * (self.__count * len(batch) / count)
+        self.__count = count
+
+    def result(self, aggregate: str) -> Any:
+        """Get an aggregate of the tensors added so far.
+
+        Args:
+            aggregate: One of AGGREGATES.
+
+        Returns:
+            value: The elementwise aggregate, the number of tensors for "count", or None if no tensor was added.
+        """
+        if aggregate == "count":
+            return self.__count
+
+        if self.__count == 0:
+            return None
+
+        if aggregate == "std":
+            return np.sqrt(self.__m2 / self.__count)
+
+        return {"sum": self.__sum, "mean": self.__mean, "min": self.__min, "max": self.__max}[aggregate]
+
+
+def count_rows(
+    collection_name: str, conditions: dict | None, collection_fields: dict[str, Any], cursor: sqlite3.Cursor
+) -> int:
+    """Count the rows matching query conditions.
+
+    Args:
+        collection_name: The name of the collection.
+        conditions: The query conditions, see compile_conditions. If None, all rows are counted.
+        collection_fields: The fields of the collection.
+        cursor: The cursor to use to execute the command.
+    """
+    where, parameters = compile_conditions(conditions or {}, collection_fields)
+    cursor.execute(f"select count(*) from {collection_name} where {where}", parameters)
+
+    return cursor.fetchone()[0]
+
+
+def aggregate_rows(
+    collection_name: str,
+    conditions: dict | None,
+    aggregates: dict[str, str | list[str]],
+    group_by: list[str],
+    collection_fields: dict[str, Any],
+    backend: Backend,
+    cursor: sqlite3.Cursor,
+) -> list[dict[str, Any]]:
+    """Aggregate the rows matching query conditions, optionally per group.
+
+    Args:
+        collection_name: The name of the collection.
+        conditions: The query conditions, see compile_conditions. If None, all rows are aggregated.
+        aggregates: Mapping from field, or statistic of a tensor field, to an aggregate or a list of them.
+        group_by: The fields, or statistics of tensor fields, whose values define the groups.
+        collection_fields: The fields of the collection.
+        backend: The backend to read tensors with.
+        cursor: The cursor to use to execute the command.
+
+    Returns:
+        groups: Per group in the order of its values, the values of the group fields and the aggregates.
+            A field aggregated with a list of aggregates maps to a dict from aggregate to value.
+    """
+    requested = {field: [ops] if isinstance(ops, str) else list(ops) for field, ops in aggregates.items()}
+    for field, ops in requested.items():
+        unknown = [op for op in ops if op not in AGGREGATES]
+        if unknown or len(ops) == 0:
+            raise ValueError(f"Unknown aggregates {unknown} of field {field}, must be some of {AGGREGATES}")
+
+    tensor_fields = [field for field in requested if isinstance(collection_fields.get(field), TensorField)]
+    scalar_fields = [field for field in requested if field not in tensor_fields]
+
+    group_expressions = [field_expression(field, collection_fields) for field in group_by]
+    where, parameters = compile_conditions(conditions or {}, collection_fields)
+
+    # The groups come from sqlite, together with the aggregates of scalar fields. The matching
+    # rows are selected once, with the mean of every value in its group for the std.
+    groups = [f"__group_{index}" for index in range(len(group_by))]
+    partition = f"partition by {', '.join(group_expressions)}" if group_by else ""
+    inner = [f"{expression} as {group}" for expression, group in zip(group_expressions, groups)]
+    scalar_columns = []
+    for index, field in enumerate(scalar_fields):
+        expression = field_expression(field, collection_fields)
+        inner.append(f"{expression} as __value_{index}")
+        if "std" in requested[field]:
+            inner.append(f"avg({expression}) over ({partition}) as __mean_{index}")
+        for op in requested[field]:
+            scalar_columns.append((field, op, SQL_AGGREGATES[op].format(f"__value_{index}", f"__mean_{index}")))
+
+    # count(*) keeps the select valid without scalar aggregates
+    select = [*groups, "count(*)", *(column for _, _, column in scalar_columns)]
+    group = f"group by {', '.join(groups)} order by {', '.join(groups)}" if group_by else ""
+    rows = f"select {', '.join(inner) or 'id'} from {collection_name} where {where}"
+
+    with backend.profiler.zone(SQL_EXECUTE_ZONE):
+        cursor.execute(f"select {', '.join(select)} from ({rows}) {group}", parameters)
+        group_rows = cursor.fetchall()
+
+    results: dict[tuple, dict[str, Any]] = {}
+    for row in group_rows:
+        key = tuple(row[: len(group_by)])
+        result = results.setdefault(key, dict(zip(group_by, key)))
+
+        for (field, op, _), value in zip(scalar_columns, row[len(group_by) + 1 :]):
+            if op == "std" and value is not None:
+                value = math.sqrt(value)
+            result.setdefault(field, {})[op] = value
+
+    if tensor_fields:
+        accumulators = reduce_tensors(
+            collection_name, where, parameters, tensor_fields, group_expressions, collection_fields, backend, cursor
+        )
+        for key, result in results.items():
+            for field in tensor_fields:
+                accumulator = accumulators.get(key, {}).get(field, TensorAccumulator(field))
+                result[field] = {op: accumulator.result(op) for op in requested[field]}
+
+    for result in results.values():
+        for field in requested:
+            if isinstance(aggregates[field], str):
+                result[field] = result[field][aggregates[field]]
+
+    return list(results.values())
+
+
+def reduce_tensors(
+    collection_name: str,
+    where: str,
+    parameters: list[Any],
+    tensor_fields: list[str],
+    group_expressions: list[str],
+    collection_fields: dict[str, Any],
+    backend: Backend,
+    cursor: sqlite3.Cursor,
+) -> dict[tuple, dict[str, TensorAccumulator]]:
+    """Stream the tensors of the matching rows, and accumulate them per group.
+
+    Args:
+        collection_name: The name of the collection.
+        where: The compiled query conditions.
+        parameters: The parameters of the conditions.
+        tensor_fields: The tensor fields to aggregate.
+        group_expressions: The sql expressions whose values define the groups.
+        collection_fields: The fields of the collection.
+        backend: The backend to read tensors with.
+        cursor: The cursor to use to execute the command.
+
+    Returns:
+        accumulators: Mapping from the values of the group expressions to the accumulator of every field.
+    """
+    columns = [column for field in tensor_fields for column in field_select_columns(field, collection_fields[field])]
+    num_groups = len(group_expressions)
+    num_location_columns = len(TENSOR_LOCATION_COLUMN_TYPES)
+
+    with backend.profiler.zone(SQL_EXECUTE_ZONE):
+        cursor.execute(
+            f"select {', '.join([*group_expressions, *columns])} from {collection_name} where {where}", parameters
+        )
+
+    accumulators: dict[tuple, dict[str, TensorAccumulator]] = {}
+    while True:
+        with backend.profiler.zone(SQL_EXECUTE_ZONE):
+            rows = cursor.fetchmany(AGGREGATE_BATCH_SIZE)
+
+        if not rows:
+            break
+
+        groups: dict[tuple, list[tuple]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row[:num_groups]), []).append(row)
+
+        with backend.profiler.zone(DECODE_ZONE) as zone:
+            for key, group_rows in groups.items():
+                group_accumulators = accumulators.setdefault(
+                    key, {field: TensorAccumulator(field) for field in tensor_fields}
+                )
+
+                for field_index, field in enumerate(tensor_fields):
+                    start = num_groups + field_index * num_location_columns
+                    locations = [row[start : start + num_location_columns] for row in group_rows]
+                    tensors = read_tensors(collection_name, collection_fields[field], locations, backend.store)
+                    group_accumulators[field].update(tensors)
+                    zone.nbytes += sum(tensor.nbytes for tensor in tensors)
+
+    return accumulators
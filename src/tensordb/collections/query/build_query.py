@@ -2,6 +2,9 @@ import sqlite3
 from typing import Any
 
 from tensordb.backend import Backend
+from tensordb.collections.query.conditions import compile_conditions, condition_shape
+from tensordb.collections.query.ordering import compile_keyset, compile_ordering
+from tensordb.storage import field_select_columns
 
 
 def build_query(
@@ -11,12 +14,22 @@ def build_query(
     backend: Backend,
     collection_fields: dict[str, Any],
     cursor: sqlite3.Cursor | None = None,
+    order_by: list[str] | None = None,
+    descending: bool = False,
+    limit: int | None = None,
+    after: list[Any] | None = None,
+    select_keys: bool = False,
 ) -> tuple[list[str], str, tuple[Any]]:
     """Build a query to execute.
 
+    Queries are cached by their collection, selected fields, the shape of their
+    conditions and their ordering, so repeated queries only collect their parameters.
+    The limit and the position to read after are parameters too, so all pages of a
+    query share one statement.
+
     Args:
         collection_name: The name of the collection.
-        query_conditions: The query conditions.
+        query_conditions: The query conditions, see compile_conditions.
             If None, all rows will be selected.
         fields: The fields to select.
             If None, all fields will be selected.
@@ -24,9 +37,44 @@ def build_query(
         collection_fields: The fields of the collection.
         cursor: The cursor to use to execute the command.
             If None, a new cursor will be created.
+        order_by: The fields, or statistics of tensor fields, to order by, see compile_ordering.
+            If None, rows are not ordered unless after is given or select_keys is set.
+        descending: Whether to order from the largest to the smallest keys.
+        limit: The maximum number of rows to select. If None, all rows are selected.
+        after: The sort keys of the row after which to select rows, see order_keys.
+        select_keys: Whether to select the sort keys after the columns of the fields.
 
-
+    Returns:
+        fields: The selected fields, in the order their columns are selected.
+        sql_query: The sql query to execute.
+        substitutions: The parameters to bind to the query.
     """
+    shape, parameters = condition_shape(query_conditions) if query_conditions is not None else (None, [])
+    ordered = order_by is not None or after is not None or select_keys
+    key = (
+        collection_name,
+        backend.catalog.version,
+        tuple(fields) if fields is not None else None,
+        shape,
+        tuple(order_by or ()) if ordered else None,
+        descending,
+        limit is not None,
+        # Positions with nulls are compiled differently, see compile_keyset
+        tuple(value is None for value in after) if after is not None else None,
+        select_keys,
+    )
+
+    keyset = []
+    if ordered:
+        expressions, order_sql = compile_ordering(order_by, descending, collection_fields)
+        if after is not None:
+            keyset = compile_keyset(expressions, after, descending)
+
+    plan = backend.plans.get(key)
+    if plan is not None:
+        selected_fields, sql_query = plan
+        return list(selected_fields), sql_query, bind_parameters(parameters, keyset, limit)
+
     sql_query = f"""
         select
             {{fields}}
@@ -34,6 +82,7 @@ def build_query(
             {collection_name}
         where
             {{conditions}}
+        {{order}}
     """
     fmt_params = {}
 
@@ -45,25 +94,66 @@ def build_query(
     else:
         assert all(field in collection_fields for field in fields), "Invalid field selected"
 
-    fmt_params["fields"] = ", ".join(fields)
+    columns = [column for field in fields for column in field_select_columns(field, collection_fields[field])]
+    if select_keys:
+        columns.extend(expressions)
+    fmt_params["fields"] = ", ".join(columns)
 
     substitutions = []
     if query_conditions is None:
         fmt_params["conditions"] = "1"
     else:
-        fields_to_query = []
-        field_query_values = []
-        for field, value in query_conditions.items():
-            assert field in collection_fields, "Invalid field in query"
-            fields_to_query.append(field)
-            field_query_values.append(value)
+        fmt_params["conditions"], substitutions = compile_conditions(query_conditions, collection_fields)
+
+    fmt_params["order"] = order_sql if ordered else ""
+    if limit is not None:
+        fmt_params["order"] += " limit ?"
+
+    if len(keyset) == 1:
+        fmt_params["conditions"] = f"({fmt_params['conditions']}) and {keyset[0][0]}"
+    elif len(keyset) > 1:
+        # Every part of the keyset is read in order with its own range search, and the parts are merged
+        assert select_keys, "The sort keys must be selected to merge the parts of a keyset"
+        parts = [
+            "select * from ("
+            + sql_query.format_map({**fmt_params, "conditions": f"({fmt_params['conditions']}) and {condition}"})
+            + ")"
+            for condition, _ in keyset
+        ]
+        direction = "desc" if descending else "asc"
+        first_key = len(columns) - len(expressions) + 1
+        fmt_params["order"] = "order by " + ", ".join(
+            f"{position} {direction}" for position in range(first_key, len(columns) + 1)
+        )
+        if limit is not None:
+            fmt_params["order"] += " limit ?"
+        sql_query = " union all ".join(parts) + f" {fmt_params['order']}"
 
-        conditions = " and ".join(f"{field} = ?" for field in fields_to_query)
+    if len(keyset) <= 1:
+        sql_query = sql_query.format_map(fmt_params)
 
-        fmt_params["conditions"] = conditions
+    backend.plans.put(key, (tuple(fields), sql_query))
+
+    return fields, sql_query, bind_parameters(substitutions, keyset, limit)
+
+
+def bind_parameters(
+    condition_parameters: list[Any], keyset: list[tuple[str, list[Any]]], limit: int | None
+) -> tuple[Any, ...]:
+    """Get the parameters of a query built by build_query.
+
+    Args:
+        condition_parameters: The parameters of the query conditions.
+        keyset: The conditions selecting the rows after a position, with their parameters, see compile_keyset.
+        limit: The maximum number of rows to select.
+    """
+    limit_parameters = [limit] if limit is not None else []
 
-        substitutions.extend(field_query_values)
+    if len(keyset) <= 1:
+        keyset_parameters = keyset[0][1] if keyset else []
+        return (*condition_parameters, *keyset_parameters, *limit_parameters)
 
-    sql_query = sql_query.format_map(fmt_params)
+    # Every part is limited, and so is their union
+    parts = [(*condition_parameters, *parameters, *limit_parameters) for _, parameters in keyset]
 
-    return fields, sql_query, tuple(substitutions)
+    return (*(parameter for part in parts for parameter in part), *limit_parameters)
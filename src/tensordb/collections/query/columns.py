@@ -0,0 +1,127 @@
+from typing import Any
+
+import numpy as np
+
+from tensordb.collections.query.decode import column_layout
+from tensordb.storage import (
+    TENSOR_LOCATION_COLUMN_TYPES,
+    SegmentStore,
+    decode_shape,
+    read_tensors,
+    read_tensors_into,
+)
+
+TYPE_TO_NUMPY_DTYPE = {
+    int: np.int64,
+    float: np.float64,
+    str: np.str_,
+}
+
+
+def rows_to_columns(
+    collection_name: str,
+    fields: list[str],
+    collection_fields: dict[str, Any],
+    rows: list[tuple],
+    store: SegmentStore,
+    stack_variable_shapes: bool,
+    indices: dict[str, Any] | None = None,
+) -> dict[str, np.ndarray | list[np.ndarray]]:
+    """Turn selected sql rows into one column per field.
+
+    Scalar fields become one numpy array each, see scalar_column. Tensor fields with a fixed shape
+    are stacked into a single (N, *shape) array that is filled directly from storage.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The selected fields, in the order their columns were selected.
+        collection_fields: The fields of the collection.
+        rows: The selected rows.
+        store: The segment store to read tensors from.
+        stack_variable_shapes: Whether to also stack tensor fields without a fixed shape.
+            If True, their tensors must all have the same shape.
+            If False, they are returned as a list of arrays.
+        indices: Mapping from tensor field name to a numpy index applied to its tensors.
+            Indexed fields are stacked like fields without a fixed shape.
+
+    Returns:
+        columns: Mapping from field name to the values of that field.
+    """
+    values = list(zip(*rows)) if rows else None
+    indices = indices or {}
+
+    columns: dict[str, np.ndarray | list[np.ndarray]] = {}
+    for field_name, tensor_field, index in column_layout(fields, collection_fields):
+        if tensor_field is None:
+            columns[field_name] = scalar_column(values[index] if values else (), collection_fields[field_name])
+            continue
+
+        dtype = np.dtype(tensor_field.dtype)
+
+        if values is None:
+            if not tensor_field.has_fixed_shape:
+                columns[field_name] = []
+                continue
+
+            empty = np.empty((0, *tensor_field.shape), dtype=dtype)
+            if field_name in indices:
+                # Index every (missing) tensor, to get the shape of the result
+                empty = empty[(slice(None), *np.index_exp[indices[field_name]])]
+            columns[field_name] = empty
+            continue
+
+        segments, offsets, stored_nbytes, shapes = values[index : index + len(TENSOR_LOCATION_COLUMN_TYPES)]
+
+        if field_name in indices:
+            locations = list(zip(segments, offsets, stored_nbytes, shapes))
+            tensors = read_tensors(collection_name, tensor_field, locations, store, indices[field_name])
+            stack = tensor_field.has_fixed_shape or stack_variable_shapes
+            if stack and len({tensor.shape for tensor in tensors}) != 1:
+                raise ValueError(f"Cannot stack tensors of field {field_name} with different shapes")
+            columns[field_name] = np.stack(tensors) if stack else tensors
+            continue
+
+        if tensor_field.has_fixed_shape:
+            shape = tuple(tensor_field.shape)
+        elif stack_variable_shapes:
+            unique_shapes = set(shapes)
+            if len(unique_shapes) != 1:
+                raise ValueError(f"Cannot stack tensors of field {field_name} with different shapes")
+            shape = decode_shape(unique_shapes.pop())
+        else:
+            locations = list(zip(segments, offsets, stored_nbytes, shapes))
+            columns[field_name] = read_tensors(collection_name, tensor_field, locations, store)
+            continue
+
+        out = np.empty((len(rows), *shape), dtype=dtype)
+        read_tensors_into(
+            collection_name,
+            tensor_field,
+            np.array(segments),
+            np.array(offsets),
+            np.array(stored_nbytes),
+            out,
+            store,
+        )
+        columns[field_name] = out
+
+    return columns
+
+
+def scalar_column(values: tuple | list, field_type: type) -> np.ndarray:
+    """Turn the values of a scalar field into a numpy array.
+
+    Missing values are NaN in numeric columns, so int columns with missing values
+    are float64 instead, and None in str columns, which are then object arrays.
+
+    Args:
+        values: The value of every row.
+        field_type: The type of the field.
+    """
+    if not any(value is None for value in values):
+        return np.array(values, dtype=TYPE_TO_NUMPY_DTYPE[field_type])
+
+    if field_type is str:
+        return np.array(values, dtype=object)
+
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
@@ -0,0 +1,303 @@
+import json
+from typing import Any, Hashable
+
+from tensordb.fields import TensorField
+from tensordb.storage import TENSOR_STATISTIC_COLUMN_TYPES, tensor_column_name
+from tensordb.utils.sqlite import to_sql_value
+
+COMPARISON_OPERATORS = {
+    "$eq": "=",
+    "$ne": "!=",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+
+SET_OPERATORS = {
+    "$in": "in",
+    "$nin": "not in",
+}
+
+LOGICAL_OPERATORS = {
+    "$and": "and",
+    "$or": "or",
+}
+
+# Lists longer than this are bound as a single json parameter instead of one parameter per value
+MAX_INLINE_SET_SIZE = 64
+
+
+def compile_conditions(conditions: dict, collection_fields: dict[str, Any]) -> tuple[str, list[Any]]:
+    """Compile query conditions into a parameterized sql expression.
+
+    Conditions map fields to either a value, which must match exactly, or to a
+    dict of operators such as {"$gte": 1, "$lt": 5}. Conditions on different
+    fields must all hold. "$or" and "$and" map to a list of conditions.
+
+    Missing values match None with "$eq", and match "$ne" and "$nin" with any
+    other value. Like in sql, they never match the other operators.
+
+    Args:
+        conditions: The query conditions.
+        collection_fields: The fields of the collection.
+
+    Returns:
+        expression: The sql expression.
+        parameters: The parameters to bind to the expression.
+    """
+    expressions = []
+    parameters: list[Any] = []
+
+    for key, value in conditions.items():
+        if key in LOGICAL_OPERATORS:
+            expression, key_parameters = compile_logical(key, value, collection_fields)
+        elif key.startswith("$"):
+            raise ValueError(f"Unknown operator {key}")
+        else:
+            expression, key_parameters = compile_field_condition(key, value, collection_fields)
+
+        expressions.append(expression)
+        parameters.extend(key_parameters)
+
+    if len(expressions) == 0:
+        return "1", parameters
+
+    return " and ".join(expressions), parameters
+
+
+def compile_logical(operator: str, value: list[dict], collection_fields: dict[str, Any]) -> tuple[str, list[Any]]:
+    """Compile a logical operator over a list of conditions.
+
+    Args:
+        operator: The logical operator, "$and" or "$or".
+        value: The list of conditions to combine.
+        collection_fields: The fields of the collection.
+
+    Returns:
+        expression: The sql expression.
+        parameters: The parameters to bind to the expression.
+    """
+    if not isinstance(value, (list, tuple)) or len(value) == 0:
+        raise ValueError(f"{operator} needs a non-empty list of conditions")
+
+    expressions = []
+    parameters: list[Any] = []
+    for conditions in value:
+        expression, condition_parameters = compile_conditions(conditions, collection_fields)
+        expressions.append(f"({expression})")
+        parameters.extend(condition_parameters)
+
+    return f"({f' {LOGICAL_OPERATORS[operator]} '.join(expressions)})", parameters
+
+
+def compile_field_condition(field: str, value: Any, collection_fields: dict[str, Any]) -> tuple[str, list[Any]]:
+    """Compile the condition on a single field.
+
+    Args:
+        field: The field the condition applies to.
+        value: The value to match, or a dict of operators.
+        collection_fields: The fields of the collection.
+
+    Returns:
+        expression: The sql expression.
+        parameters: The parameters to bind to the expression.
+    """
+    column = field_expression(field, collection_fields)
+
+    if not isinstance(value, dict):
+        value = {"$eq": value}
+
+    if len(value) == 0:
+        raise ValueError(f"Empty condition on field {field}")
+
+    expressions = []
+    parameters: list[Any] = []
+    for operator, operand in value.items():
+        if operator in COMPARISON_OPERATORS:
+            expression, operator_parameters = compile_comparison(column, operator, operand)
+        elif operator in SET_OPERATORS:
+            expression, operator_parameters = compile_set(column, operator, operand)
+        else:
+            raise ValueError(f"Unknown operator {operator} on field {field}")
+
+        expressions.append(expression)
+        parameters.extend(operator_parameters)
+
+    return " and ".join(expressions), parameters
+
+
+def field_expression(field: str, collection_fields: dict[str, Any]) -> str:
+    """Get the sql expression for a field used in a condition.
+
+    Tensor fields can not be compared directly, but their summary statistics can:
+    "tensor.$min", "tensor.$max", "tensor.$mean", "tensor.$norm" and "tensor.$nbytes",
+    as well as "tensor.$ndim" and the size of a dimension, e.g. "tensor.$shape.0".
+    Fields with dedup can also be compared by "tensor.$hash", see tensor_hash.
+
+    Args:
+        field: The field, or a statistic of a tensor field.
+        collection_fields: The fields of the collection.
+    """
+    field_name, _, statistic = field.partition(".")
+
+    assert field_name in collection_fields, "Invalid field in query"
+
+    if not isinstance(collection_fields[field_name], TensorField):
+        assert statistic == "", f"Field {field_name} has no statistic {statistic}"
+        return field_name
+
+    if statistic == "":
+        raise ValueError(f"Cannot query on tensor field {field_name}, query on one of its statistics instead")
+
+    if statistic.startswith("$") and statistic[1:] in TENSOR_STATISTIC_COLUMN_TYPES:
+        return tensor_column_name(field_name, statistic[1:])
+
+    if statistic == "$hash":
+        if not collection_fields[field_name].dedup:
+            raise ValueError(f"Tensor field {field_name} has no hashes, only fields with dedup do")
+        return tensor_column_name(field_name, "hash")
+
+    shape_column = tensor_column_name(field_name, "shape")
+
+    if statistic == "$ndim":
+        return f"json_array_length({shape_column})"
+
+    statistic, _, dim = statistic.partition(".")
+    if statistic == "$shape" and dim.isdigit():
+        return f"json_extract({shape_column}, '$[{int(dim)}]')"
+
+    raise ValueError(f"Unknown statistic {field} of tensor field {field_name}")
+
+
+def compile_comparison(column: str, operator: str, operand: Any) -> tuple[str, list[Any]]:
+    """Compile a comparison of a column with a value.
+
+    Args:
+        column: The sql expression of the compared column.
+        operator: The comparison operator, e.g. "$gt".
+        operand: The value to compare with.
+
+    Returns:
+        expression: The sql expression.
+        parameters: The parameters to bind to the expression.
+    """
+    operand = to_sql_value(operand)
+
+    if operand is None:
+        if operator == "$eq":
+            return f"{column} is null", []
+        if operator == "$ne":
+            return f"{column} is not null", []
+        raise ValueError(f"Cannot compare with None using {operator}")
+
+    if operator == "$ne":
+        # Missing values are not equal to any value
+        return f"({column} != ? or {column} is null)", [operand]
+
+    return f"{column} {COMPARISON_OPERATORS[operator]} ?", [operand]
+
+
+def compile_set(column: str, operator: str, operand: Any) -> tuple[str, list[Any]]:
+    """Compile a set membership test of a column.
+
+    Small sets use one parameter per value. Large sets are bound as a single
+    json array that is expanded with json_each, which keeps the statement short
+    and still lets sqlite use an index on the column.
+
+    Args:
+        column: The sql expression of the tested column.
+        operator: The set operator, "$in" or "$nin".
+        operand: The values of the set.
+
+    Returns:
+        expression: The sql expression.
+        parameters: The parameters to bind to the expression.
+    """
+    if not isinstance(operand, (list, tuple, set, frozenset)):
+        raise ValueError(f"{operator} needs a list of values")
+
+    values = [to_sql_value(value) for value in operand]
+
+    if len(values) == 0:
+        return ("0" if operator == "$in" else "1"), []
+
+    if len(values) > MAX_INLINE_SET_SIZE:
+        placeholders, parameters = "select value from json_each(?)", [json.dumps(values)]
+    else:
+        placeholders, parameters = ", ".join(["?"] * len(values)), values
+
+    expression = f"{column} {SET_OPERATORS[operator]} ({placeholders})"
+
+    if operator == "$nin":
+        # Missing values are not in any set
+        expression = f"({expression} or {column} is null)"
+
+    return expression, parameters
+
+
+def condition_shape(conditions: dict) -> tuple[Hashable, list[Any]]:
+    """Split query conditions into their shape and their parameters.
+
+    Conditions with the same shape compile to the same sql expression, see
+    compile_conditions, and the parameters are in the order it binds them.
+    Invalid conditions are only rejected when they are compiled.
+
+    Args:
+        conditions: The query conditions.
+
+    Returns:
+        shape: A hashable description of everything in the conditions but the values.
+        parameters: The parameters to bind to the compiled expression.
+    """
+    shape = []
+    parameters: list[Any] = []
+
+    for key, value in conditions.items():
+        if key in LOGICAL_OPERATORS and isinstance(value, (list, tuple)):
+            shapes = []
+            for sub_conditions in value:
+                sub_shape, sub_parameters = condition_shape(sub_conditions)
+                shapes.append(sub_shape)
+                parameters.extend(sub_parameters)
+            shape.append((key, tuple(shapes)))
+        elif isinstance(value, dict):
+            operators = []
+            for operator, operand in value.items():
+                operators.append((operator, operand_shape(operator, operand, parameters)))
+            shape.append((key, tuple(operators)))
+        else:
+            shape.append((key, (("$eq", operand_shape("$eq", value, parameters)),)))
+
+    return tuple(shape), parameters
+
+
+def operand_shape(operator: str, operand: Any, parameters: list[Any]) -> Hashable:
+    """Get what the sql of an operator depends on, and collect the parameters of its operand.
+
+    Args:
+        operator: The operator, e.g. "$gt" or "$in".
+        operand: The value the operator is applied with.
+        parameters: The parameters collected so far, which the operand's parameters are added to.
+    """
+    if operator in COMPARISON_OPERATORS:
+        operand = to_sql_value(operand)
+        if operand is None:
+            return None
+
+        parameters.append(operand)
+        return "?"
+
+    if operator in SET_OPERATORS and isinstance(operand, (list, tuple, set, frozenset)):
+        values = [to_sql_value(value) for value in operand]
+
+        if len(values) > MAX_INLINE_SET_SIZE:
+            # Bound as a single json parameter, compiled once for all sizes
+            parameters.append(json.dumps(values))
+            return "json"
+
+        parameters.extend(values)
+        return len(values)
+
+    # Invalid operators and operands never compile, so their queries are never cached
+    return ("invalid", id(operand))
@@ -0,0 +1,113 @@
+from typing import Any, Callable
+
+import numpy as np
+
+from tensordb.fields import TensorField
+from tensordb.storage import TENSOR_LOCATION_COLUMN_TYPES, SegmentStore, TensorCache, TensorRef, read_tensors
+
+
+def column_layout(
+    fields: list[str],
+    collection_fields: dict[str, Any],
+) -> list[tuple[str, TensorField | None, int]]:
+    """Get where every selected field starts in a selected sql row.
+
+    Args:
+        fields: The selected fields, in the order their columns were selected.
+        collection_fields: The fields of the collection.
+
+    Returns:
+        layout: (field name, tensor field or None for scalars, index of the first column) per field.
+    """
+    layout = []
+    index = 0
+    for field_name in fields:
+        field_type = collection_fields[field_name]
+        if isinstance(field_type, TensorField):
+            layout.append((field_name, field_type, index))
+            index += len(TENSOR_LOCATION_COLUMN_TYPES)
+        else:
+            layout.append((field_name, None, index))
+            index += 1
+
+    return layout
+
+
+def make_row_decoder(
+    collection_name: str,
+    fields: list[str],
+    collection_fields: dict[str, Any],
+    store: SegmentStore,
+    indices: dict[str, Any] | None = None,
+    lazy: bool = False,
+    cache: TensorCache | None = None,
+    epoch: int = 0,
+    return_id: bool = True,
+    workers: int | None = None,
+) -> Callable[[list[tuple]], list[dict[str, Any]]]:
+    """Make a function that turns selected sql rows into result dicts.
+
+    Rows are decoded a batch at a time, so that compressed tensors of the batch
+    can be decompressed in parallel.
+
+    Args:
+        collection_name: The name of the collection.
+        fields: The selected fields, in the order their columns were selected.
+        collection_fields: The fields of the collection.
+        store: The segment store to read tensors from.
+        indices: Mapping from tensor field name to a numpy index applied to its tensors.
+        lazy: Whether to return tensors as TensorRefs, that are only read when loaded.
+        cache: The cache to look up and store whole tensors in, by the id of their row.
+            The id field must be selected.
+        epoch: The epoch of the collection in the cache, read before the rows were selected.
+        return_id: Whether to include the id field in the results.
+        workers: The number of threads to decompress the tensors of a batch with, see parallel_map.
+
+    Returns:
+        decode: Function mapping rows of column values to dicts of field values.
+    """
+    layout = column_layout(fields, collection_fields)
+    num_location_columns = len(TENSOR_LOCATION_COLUMN_TYPES)
+    indices = indices or {}
+    id_index = next((index for field_name, _, index in layout if field_name == "id"), None)
+    output_layout = [entry for entry in layout if return_id or entry[0] != "id"]
+
+    def read(
+        field_name: str, tensor_field: TensorField, rows: list[tuple], index: int
+    ) -> list[np.ndarray] | list[TensorRef]:
+        locations = [row[index : index + num_location_columns] for row in rows]
+        tensor_index = indices.get(field_name)
+
+        if lazy:
+            return [TensorRef(collection_name, tensor_field, location, store, tensor_index) for location in locations]
+
+        if cache is None or id_index is None or tensor_index is not None:
+            return read_tensors(collection_name, tensor_field, locations, store, tensor_index, workers)
+
+        keys = [(collection_name, row[id_index], field_name) for row in rows]
+        tensors = [cache.get(key) for key in keys]
+        missing = [row_index for row_index, tensor in enumerate(tensors) if tensor is None]
+
+        missing_locations = [locations[row_index] for row_index in missing]
+        loaded = read_tensors(collection_name, tensor_field, missing_locations, store, workers=workers)
+        for row_index, tensor in zip(missing, loaded):
+            tensors[row_index] = cache.put(keys[row_index], tensor, epoch)
+
+        return tensors
+
+    def decode(rows: list[tuple]) -> list[dict[str, Any]]:
+        tensors = {
+            field_name: read(field_name, tensor_field, rows, index)
+            for field_name, tensor_field, index in output_layout
+            if tensor_field is not None
+        }
+
+        return [
+            {
+                field_name: row[index] if tensor_field is None else tensors[field_name][row_index]
+                for field_name, tensor_field, index in output_layout
+            }
+            for row_index, row in enumerate(rows)
+        ]
+
+    return decode
@@ -0,0 +1,152 @@
+"""Ordering of query results, and keyset pagination.
+
+A page is read by seeking past the sort key of the last row of the previous page,
+rather than by skipping rows with an offset, so that with an index on the sort key
+reading any page costs the same. The id of a row breaks ties between equal sort
+keys, so every row has a distinct position in the order.
+
+The position of the last row is handed to the caller as an opaque page token.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from tensordb.collections.query.conditions import field_expression
+
+
+@dataclass(frozen=True)
+class Page:
+    """A page of query results.
+
+    Attributes:
+        rows: The rows of the page.
+        next: The token of the next page, see Query.page, or None if this is the last page.
+    """
+
+    rows: list[dict[str, Any]]
+    next: str | None
+
+
+def order_keys(order_by: list[str] | None) -> list[str]:
+    """Get the sort keys of an ordering, ending with the id of the row.
+
+    Args:
+        order_by: The fields, or statistics of tensor fields, to order by. If None, rows are ordered by id.
+    """
+    if order_by and order_by[-1] == "id":
+        return list(order_by)
+
+    return [*(order_by or []), "id"]
+
+
+def compile_ordering(
+    order_by: list[str] | None, descending: bool, collection_fields: dict[str, Any]
+) -> tuple[list[str], str]:
+    """Compile an ordering into sql.
+
+    Args:
+        order_by: The fields, or statistics of tensor fields, to order by.
+        descending: Whether to order from the largest to the smallest keys.
+        collection_fields: The fields of the collection.
+
+    Returns:
+        expressions: The sql expression of every sort key.
+        order: The order by clause.
+    """
+    expressions = [field_expression(key, collection_fields) for key in order_keys(order_by)]
+    direction = "desc" if descending else "asc"
+
+    return expressions, "order by " + ", ".join(f"{expression} {direction}" for expression in expressions)
+
+
+def compile_keyset(expressions: list[str], after: list[Any], descending: bool) -> list[tuple[str, list[Any]]]:
+    """Compile the conditions selecting the rows ordered after a position.
+
+    The rows after the position are the union of the rows selected by every condition,
+    and every condition can be resolved with a range search on an index of the sort keys.
+    Without missing values, the position is compared as a row value. sqlite orders missing
+    values first, and comparisons with them are never true, so they are selected by
+    separate conditions: those after the position in descending order, and all positions
+    with missing values, whose keys are compared one at a time.
+
+    Args:
+        expressions: The sql expression of every sort key, the last being the id.
+        after: The sort keys of the last row before the selected ones.
+        descending: Whether rows are ordered from the largest to the smallest keys.
+
+    Returns:
+        conditions: Every sql condition, with its parameters.
+    """
+    assert len(expressions) == len(after), "Invalid position"
+
+    operator = "<" if descending else ">"
+    conditions = []
+
+    # Without missing values, the keys after the position are compared at once
+    row_value = all(value is not None for value in after)
+    if row_value:
+        if len(expressions) == 1:
+            conditions.append((f"{expressions[0]} {operator} ?", list(after)))
+        else:
+            placeholders = ", ".join("?" * len(after))
+            conditions.append((f"({', '.join(expressions)}) {operator} ({placeholders})", list(after)))
+
+    for position, (expression, value) in enumerate(zip(expressions, after)):
+        # Equal to the position in all keys before, and after it in this one
+        equal = [
+            f"{previous} is null" if previous_value is None else f"{previous} = ?"
+            for previous, previous_value in zip(expressions[:position], after[:position])
+        ]
+        equal_parameters = [previous_value for previous_value in after[:position] if previous_value is not None]
+
+        beyond = []
+        if value is None and not descending:
+            beyond.append((f"{expression} is not null", []))
+        elif value is not None and not row_value:
+            beyond.append((f"{expression} {operator} ?", [value]))
+
+        # Ids are never missing
+        if value is not None and descending and position < len(expressions) - 1:
+            beyond.append((f"{expression} is null", []))
+
+        for condition, parameters in beyond:
+            conditions.append((" and ".join([*equal, condition]), [*equal_parameters, *parameters]))
+
+    return conditions
+
+
+def encode_page_token(order_by: list[str] | None, descending: bool, after: list[Any]) -> str:
+    """Encode the position of the last row of a page as a page token.
+
+    Args:
+        order_by: The ordering of the query.
+        descending: Whether the query is in descending order.
+        after: The sort keys of the last row, see order_keys.
+    """
+    payload = json.dumps([order_keys(order_by), descending, list(after)], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_page_token(token: str, order_by: list[str] | None, descending: bool) -> list[Any]:
+    """Decode a page token into the position of the last row of a page, see encode_page_token.
+
+    Args:
+        token: The page token.
+        order_by: The ordering of the query, which must be the ordering the token was created with.
+        descending: Whether the query is in descending order.
+
+    Returns:
+        after: The sort keys of the last row of the page.
+    """
+    try:
+        keys, token_descending, after = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError) as error:
+        raise ValueError("Invalid page token") from error
+
+    if keys != order_keys(order_by) or token_descending != descending or len(after) != len(keys):
+        raise ValueError("The page token was created by a query with a different ordering")
+
+    return after
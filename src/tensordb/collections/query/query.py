@@ -1,14 +1,35 @@
-from typing import Any
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+import numpy as np
 
 from tensordb.backend import Backend
-from tensordb.collections.functions import get_collection_fields
+from tensordb.collections.query.aggregate import aggregate_rows, count_rows
 from tensordb.collections.query.build_query import build_query
+from tensordb.collections.query.columns import rows_to_columns
+from tensordb.collections.query.decode import make_row_decoder
+from tensordb.collections.query.ordering import Page, decode_page_token, encode_page_token, order_keys
+from tensordb.fields import TensorField
+from tensordb.profiling import CATALOG_ZONE, DECODE_ZONE, SQL_BUILD_ZONE, SQL_EXECUTE_ZONE
+
+DEFAULT_BATCH_SIZE = 1024
+
+# Number of batches decoded ahead of the caller when streaming with workers
+DEFAULT_IN_FLIGHT_BATCHES = 2
 
 
 class Query:
     __collection_name: str
     __conditions: dict | None
     __fields: list[str] | None
+    # field name -> numpy index applied to the tensors of the field
+    __indices: dict[str, Any]
+    __lazy: bool
+    __order_by: list[str] | None
+    __descending: bool
+    __limit: int | None
     __backend: Backend
 
     def __init__(self, collection_name: str, query: dict | None, backend: Backend) -> None:
@@ -23,40 +44,497 @@ class Query:
         self.__conditions = query
         self.__backend = backend
         self.__fields = None
+        self.__indices = {}
+        self.__lazy = False
+        self.__order_by = None
+        self.__descending = False
+        self.__limit = None
 
-    def select(self, fields: list[str]) -> "Query":
+    def select(self, fields: list[str] | dict[str, Any]) -> "Query":
         """Select fields from the collection.
 
         Args:
-            fields: The fields to select.
+            fields: The fields to select. Can also map fields to a numpy index, e.g.
+                {"tensor": np.s_[1000:2000]}, to only read part of every tensor of a tensor
+                field. For fields with chunk_rows, only the chunks covering the index are read.
+                None selects the whole field.
 
         Returns:
             The query.
         """
         assert self.__fields is None, "Fields have already been selected"
 
-        self.__fields = fields
+        self.__fields = list(fields)
+
+        if isinstance(fields, dict):
+            self.__indices = {field: index for field, index in fields.items() if index is not None}
+
+        return self
+
+    def lazy(self) -> "Query":
+        """Return tensors as TensorRefs, that are only read from storage when loaded.
+
+        Applies to execute, iter and iter_batches. The shape and dtype of every tensor
+        are available without reading it, which makes browsing results by their scalar
+        fields cheap. Use ref.load() or np.asarray(ref) to read a tensor.
+
+        Returns:
+            The query.
+        """
+        self.__lazy = True
 
         return self
 
-    def execute(self) -> list[dict[str, Any]]:
+    def order_by(self, fields: str | list[str], descending: bool = False) -> "Query":
+        """Order the result by fields.
+
+        Rows with equal fields are ordered by id. Ordering by indexed fields, or by
+        a prefix of the fields of an index, reads the rows in index order without sorting.
+
+        Args:
+            fields: A field or list of fields, or statistics of tensor fields such as "tensor.$norm",
+                to order by. Missing values come first.
+            descending: Whether to order from the largest to the smallest values.
+
+        Returns:
+            The query.
+        """
+        assert self.__order_by is None, "The order has already been set"
+
+        self.__order_by = [fields] if isinstance(fields, str) else list(fields)
+        self.__descending = descending
+
+        return self
+
+    def limit(self, n: int) -> "Query":
+        """Limit the number of rows in the result, or the number of rows per page, see page.
+
+        Does not apply to count and aggregate.
+
+        Args:
+            n: The maximum number of rows.
+
+        Returns:
+            The query.
+        """
+        assert n > 0, "Limit must be positive"
+
+        self.__limit = n
+
+        return self
+
+    def page(self, after: str | None = None, workers: int | None = None) -> Page:
+        """Execute the query, and return a page of at most limit rows, see limit.
+
+        Pages continue from the position of the last row of the previous page, given by
+        its token, instead of skipping the rows before. With an index on the fields the
+        query is ordered by, or with no order, which orders by id, every page costs the
+        same to read. Rows inserted or deleted between pages do not shift later pages.
+
+        Args:
+            after: The token of the page to read, page.next of the previous page.
+                If None, the first page is read.
+            workers: The number of threads to decompress tensors with, see execute.
+
+        Returns:
+            page: The rows of the page, and the token of the next page.
+        """
+        assert self.__limit is not None, "Set the number of rows per page with limit"
+
+        position = decode_page_token(after, self.__order_by, self.__descending) if after is not None else None
+        cursor, decode = self.__run(workers, paging=True, after=position)
+
+        with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+            rows = cursor.fetchall()
+
+        # One row more than the page is selected to know whether there is a next page,
+        # and the sort keys are selected after the fields
+        num_keys = len(order_keys(self.__order_by))
+        next_token = None
+        if len(rows) > self.__limit:
+            rows = rows[: self.__limit]
+            next_token = encode_page_token(self.__order_by, self.__descending, list(rows[-1][-num_keys:]))
+
+        return Page(self.__decode([row[:-num_keys] for row in rows], decode), next_token)
+
+    def execute(self, workers: int | None = None) -> list[dict[str, Any]]:
         """Execute the query.
 
+        Args:
+            workers: The number of threads to decompress tensors with, in result order.
+                If None, all threads of the shared codec pool. 1 decompresses on the calling thread.
+
         Returns:
             The result of the query.
         """
+        cursor, decode = self.__run(workers)
+
+        with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+            rows = cursor.fetchall()
+
+        return self.__decode(rows, decode)
+
+    def count(self) -> int:
+        """Count the rows matching the query, without reading them.
+
+        Returns:
+            num_rows: The number of matching rows.
+        """
+        cursor = self.__backend.cursor()
+
+        with self.__backend.profiler.zone(CATALOG_ZONE):
+            collection_fields = self.__backend.catalog.fields(self.__collection_name, cursor)
+
+        with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+            return count_rows(self.__collection_name, self.__conditions, collection_fields, cursor)
+
+    def aggregate(
+        self, aggregates: dict[str, str | list[str]], group_by: str | list[str] | None = None
+    ) -> dict[str, Any] | list[dict[str, Any]]:
+        """Aggregate the rows matching the query.
+
+        The aggregates are "count", "sum", "mean", "min", "max" and "std" (the population
+        standard deviation). Aggregates of scalar fields and of statistics of tensor fields,
+        e.g. "tensor.$norm", are computed by sqlite. Tensor fields are aggregated elementwise,
+        e.g. {"image": "mean"} is the mean image, by streaming the matching rows in batches.
+        Their tensors must all have the same shape.
+
+        Args:
+            aggregates: Mapping from field to an aggregate, or to a list of aggregates.
+            group_by: A field or list of fields, or statistics of tensor fields, to aggregate
+                every group of equal values of separately.
+
+        Returns:
+            result: Mapping from field to its aggregate, or to a dict from aggregate to value if a
+                list was given. Empty tensor aggregates are None. With group_by, a list of such
+                mappings, one per group in the order of its values, that also hold the group fields.
+        """
+        cursor = self.__backend.cursor()
+
+        with self.__backend.profiler.zone(CATALOG_ZONE):
+            collection_fields = self.__backend.catalog.fields(self.__collection_name, cursor)
+
+        if isinstance(group_by, str):
+            group_by = [group_by]
+
+        groups = aggregate_rows(
+            self.__collection_name,
+            self.__conditions,
+            aggregates,
+            group_by or [],
+            collection_fields,
+            self.__backend,
+            cursor,
+        )
+
+        return groups if group_by else groups[0]
+
+    def to_columns(self) -> dict[str, np.ndarray | list[np.ndarray]]:
+        """Execute the query, and return the result as one column per field.
+
+        Scalar fields are returned as numpy arrays. Missing values are NaN, so int fields
+        with missing values are float64, or None in str fields, which are then object arrays.
+        Tensor fields with a fixed shape are returned as a single (N, *shape) array filled directly from storage,
+        and other tensor fields as a list of arrays.
+
+        Returns:
+            columns: Mapping from field name to the values of that field.
+        """
+        return self.__columns(stack_variable_shapes=False)
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Execute the query, and return the result as one numpy array per field.
+
+        Like to_columns, but tensor fields without a fixed shape are stacked too,
+        which requires all of their tensors in the result to have the same shape.
+
+        Returns:
+            columns: Mapping from field name to the values of that field.
+        """
+        return self.__columns(stack_variable_shapes=True)
+
+    def explain(self) -> list[str]:
+        """Explain how sqlite executes the query.
+
+        Useful to check that a query uses an index, e.g. "SEARCH test USING INDEX ...".
+
+        Returns:
+            plan: The steps of the query plan.
+        """
         cursor = self.__backend.cursor()
-        collection_fields = get_collection_fields(self.__collection_name, cursor=cursor)
-
-        fields, sql_query, substitutions = build_query(
-            collection_name=self.__collection_name,
-            query_conditions=self.__conditions,
-            fields=self.__fields,
-            backend=self.__backend,
-            collection_fields=collection_fields,
-            cursor=cursor,
+        _, sql_query, substitutions, _ = self.__build(cursor)
+
+        # sqlite does not re-plan cached explain statements after schema changes,
+        # so the schema version is part of the statement text.
+        version = self.__backend.catalog.version
+        cursor.execute(f"explain query plan {sql_query} -- schema version {version}", substitutions)
+
+        return [row[3] for row in cursor.fetchall()]
+
+    def iter_batches(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int | None = None,
+        in_flight: int = DEFAULT_IN_FLIGHT_BATCHES,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Execute the query, and stream the result in batches.
+
+        Only one batch of rows is fetched and decoded at a time, so memory use
+        is bounded by the batch size rather than the size of the result.
+
+        With workers, the next batches are decoded on background threads while
+        the caller processes the current one, and are still yielded in order.
+        At most in_flight batches are decoded ahead of the caller. Without workers,
+        every batch is decoded when the caller asks for it.
+
+        Args:
+            batch_size: The maximum number of rows in a batch.
+            workers: The number of threads to decompress the tensors of a batch with, as in execute.
+                If None, all threads of the shared codec pool, without decoding ahead.
+                1 decompresses on the decoding thread only.
+            in_flight: The maximum number of batches decoded ahead, when workers are given.
+
+        Yields:
+            batch: The next rows of the result.
+        """
+        assert batch_size > 0, "Batch size must be positive"
+        assert in_flight > 0, "The number of batches in flight must be positive"
+
+        cursor, decode = self.__run(workers)
+
+        if workers is not None:
+            try:
+                yield from self.__decode_ahead(cursor, decode, batch_size, in_flight)
+            finally:
+                cursor.close()
+            return
+
+        try:
+            while True:
+                with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+                    rows = cursor.fetchmany(batch_size)
+
+                if not rows:
+                    break
+
+                yield self.__decode(rows, decode)
+        finally:
+            cursor.close()
+
+    def iter(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int | None = None,
+        in_flight: int = DEFAULT_IN_FLIGHT_BATCHES,
+    ) -> Iterator[dict[str, Any]]:
+        """Execute the query, and stream the result row by row.
+
+        Rows are fetched and decoded in batches of batch_size, see iter_batches.
+
+        Args:
+            batch_size: The number of rows to fetch at a time.
+            workers: The number of threads to decompress the tensors of a batch with, see iter_batches.
+            in_flight: The maximum number of batches decoded ahead, when workers are given.
+
+        Yields:
+            row: The next row of the result.
+        """
+        for batch in self.iter_batches(batch_size, workers, in_flight):
+            yield from batch
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Stream the result of the query row by row."""
+        return self.iter()
+
+    def __columns(self, stack_variable_shapes: bool) -> dict[str, np.ndarray | list[np.ndarray]]:
+        """Execute the query, and return the result as one column per field.
+
+        Args:
+            stack_variable_shapes: Whether to stack tensor fields without a fixed shape.
+        """
+        cursor, fields, collection_fields = self.__execute()
+
+        with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+            rows = cursor.fetchall()
+
+        with self.__backend.profiler.zone(DECODE_ZONE) as zone:
+            columns = rows_to_columns(
+                self.__collection_name,
+                fields,
+                collection_fields,
+                rows,
+                self.__backend.store,
+                stack_variable_shapes=stack_variable_shapes,
+                indices=self.__indices,
+            )
+
+            for field in fields:
+                if isinstance(collection_fields[field], TensorField):
+                    values = columns[field]
+                    zone.nbytes += values.nbytes if isinstance(values, np.ndarray) else sum(v.nbytes for v in values)
+
+        return columns
+
+    def __decode_ahead(
+        self,
+        cursor: sqlite3.Cursor,
+        decode: Callable[[list[tuple]], list[dict[str, Any]]],
+        batch_size: int,
+        in_flight: int,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Fetch batches of rows, and decode them on background threads.
+
+        Args:
+            cursor: The cursor holding the result rows.
+            decode: Function that turns result rows into dicts.
+            batch_size: The maximum number of rows in a batch.
+            in_flight: The maximum number of batches decoded ahead of the caller.
+
+        Yields:
+            batch: The next decoded rows of the result, in order.
+        """
+        pending: deque[Future[list[dict[str, Any]]]] = deque()
+
+        with ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="tensordb-decode") as executor:
+            try:
+                while True:
+                    with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+                        rows = cursor.fetchmany(batch_size)
+
+                    if rows:
+                        pending.append(executor.submit(self.__decode, rows, decode))
+
+                    if not pending:
+                        break
+
+                    # Only fetch more once the window is full, or wait out the last batches
+                    if not rows or len(pending) >= in_flight:
+                        yield pending.popleft().result()
+            finally:
+                # Batches that were not started are dropped when iteration stops early
+                for future in pending:
+                    future.cancel()
+
+    def __decode(
+        self, rows: list[tuple], decode: Callable[[list[tuple]], list[dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """Decode result rows into dicts.
+
+        Args:
+            rows: The result rows.
+            decode: Function that turns result rows into dicts.
+        """
+        with self.__backend.profiler.zone(DECODE_ZONE) as zone:
+            decoded = decode(rows)
+
+            if decoded:
+                tensor_fields = [field for field, value in decoded[0].items() if isinstance(value, np.ndarray)]
+                zone.nbytes += sum(row[field].nbytes for row in decoded for field in tensor_fields)
+
+        return decoded
+
+    def __run(
+        self, workers: int | None = None, paging: bool = False, after: list[Any] | None = None
+    ) -> tuple[sqlite3.Cursor, Callable[[list[tuple]], list[dict[str, Any]]]]:
+        """Run the query.
+
+        Args:
+            workers: The number of threads to decompress tensors with, see parallel_map.
+            paging: Whether to select a page, see __build.
+            after: The sort keys of the last row of the previous page.
+
+        Returns:
+            cursor: The cursor holding the result rows.
+            decode: Function that turns result rows into dicts.
+        """
+        cache = self.__backend.cache if self.__backend.cache.enabled and not self.__lazy else None
+        # Read before the rows are selected, so tensors changed in the meantime are not cached
+        epoch = cache.epoch(self.__collection_name) if cache is not None else 0
+        # Cached tensors are looked up by the id of their row
+        return_id = self.__fields is None or "id" in self.__fields
+
+        cursor, fields, collection_fields = self.__execute(select_id=cache is not None, paging=paging, after=after)
+
+        decode = make_row_decoder(
+            self.__collection_name,
+            fields,
+            collection_fields,
+            self.__backend.store,
+            self.__indices,
+            self.__lazy,
+            cache,
+            epoch,
+            return_id,
+            workers,
         )
 
-        cursor.execute(sql_query, substitutions)
+        return cursor, decode
+
+    def __execute(
+        self, select_id: bool = False, paging: bool = False, after: list[Any] | None = None
+    ) -> tuple[sqlite3.Cursor, list[str], dict[str, Any]]:
+        """Execute the sql query.
+
+        Args:
+            select_id: Whether to select the id field, even if it was not selected.
+            paging: Whether to select a page, see __build.
+            after: The sort keys of the last row of the previous page.
+
+        Returns:
+            cursor: The cursor holding the result rows.
+            fields: The selected fields, in the order their columns are selected.
+            collection_fields: The fields of the collection.
+        """
+        cursor = self.__backend.cursor()
+        fields, sql_query, substitutions, collection_fields = self.__build(cursor, select_id, paging, after)
+
+        with self.__backend.profiler.zone(SQL_EXECUTE_ZONE):
+            cursor.execute(sql_query, substitutions)
+
+        return cursor, fields, collection_fields
+
+    def __build(
+        self, cursor: sqlite3.Cursor, select_id: bool = False, paging: bool = False, after: list[Any] | None = None
+    ) -> tuple[list[str], str, tuple[Any], dict[str, Any]]:
+        """Build the sql query.
+
+        Args:
+            cursor: The cursor to use to execute the command.
+            select_id: Whether to select the id field, even if it was not selected.
+            paging: Whether to select a page: one row more than the limit, in order,
+                with the sort keys selected after the fields.
+            after: The sort keys of the last row of the previous page.
+
+        Returns:
+            fields: The selected fields, in the order their columns are selected.
+            sql_query: The sql query to execute.
+            substitutions: The parameters to bind to the query.
+            collection_fields: The fields of the collection.
+        """
+        with self.__backend.profiler.zone(CATALOG_ZONE):
+            collection_fields = self.__backend.catalog.fields(self.__collection_name, cursor)
+
+        for field in self.__indices:
+            if not isinstance(collection_fields.get(field), TensorField):
+                raise ValueError(f"Only tensor fields can be indexed, {field} is not a tensor field")
+
+        fields = self.__fields
+        if select_id and fields is not None and "id" not in fields:
+            fields = [*fields, "id"]
+
+        with self.__backend.profiler.zone(SQL_BUILD_ZONE):
+            fields, sql_query, substitutions = build_query(
+                collection_name=self.__collection_name,
+                query_conditions=self.__conditions,
+                fields=fields,
+                backend=self.__backend,
+                collection_fields=collection_fields,
+                cursor=cursor,
+                order_by=self.__order_by,
+                descending=self.__descending,
+                limit=self.__limit + 1 if paging else self.__limit,
+                after=after,
+                select_keys=paging,
+            )
 
-        return [dict(zip(fields, row)) for row in cursor.fetchall()]
+        return fields, sql_query, substitutions, collection_fields
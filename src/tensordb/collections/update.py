@@ -0,0 +1,138 @@
+import json
+import sqlite3
+from typing import Any
+
+from tensordb.catalog import CollectionSchema
+from tensordb.collections.dedup import add_references, remove_references, write_deduplicated_tensors
+from tensordb.collections.query.conditions import compile_conditions
+from tensordb.fields import TensorField
+from tensordb.profiling import ENCODE_ZONE, SQL_EXECUTE_ZONE, Profiler
+from tensordb.storage import (
+    SegmentStore,
+    field_columns,
+    prepare_tensor,
+    tensor_column_name,
+    tensor_statistics,
+    write_tensor,
+)
+from tensordb.utils.sqlite import to_sql_value
+
+
+def select_ids(collection_name: str, schema: CollectionSchema, query: dict, cursor: sqlite3.Cursor) -> list[int]:
+    """Get the ids of the rows matching a query.
+
+    Args:
+        collection_name: The name of the collection.
+        schema: The schema of the collection.
+        query: The query conditions, as in find.
+        cursor: The cursor to use to execute the command.
+    """
+    conditions, parameters = compile_conditions(query, schema.fields)
+    cursor.execute(f"select id from {collection_name} where {conditions}", parameters)
+
+    return [row[0] for row in cursor.fetchall()]
+
+
+def delete_data(collection_name: str, schema: CollectionSchema, query: dict, cursor: sqlite3.Cursor) -> list[int]:
+    """Delete the rows matching a query.
+
+    The tensors of deleted rows stay in the append-only segment store. Their
+    references to the payloads of fields with dedup are removed.
+
+    Args:
+        collection_name: The name of the collection.
+        schema: The schema of the collection.
+        query: The query conditions, as in find.
+        cursor: The cursor to use to execute the command.
+
+    Returns:
+        ids: The ids of the deleted rows.
+    """
+    ids = select_ids(collection_name, schema, query, cursor)
+
+    remove_references(schema, schema.fields, ids, cursor)
+
+    cursor.execute(f"delete from {collection_name} where id in (select value from json_each(?))", (json.dumps(ids),))
+
+    return ids
+
+
+def update_data(
+    collection_name: str,
+    schema: CollectionSchema,
+    query: dict,
+    values: dict[str, Any],
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+    profiler: Profiler,
+) -> list[int]:
+    """Set fields of the rows matching a query to new values.
+
+    New tensors are appended to the segment store once, and all updated rows point to them.
+    For fields with dedup, the rows reference the payload of the new tensor instead of their old one.
+
+    Args:
+        collection_name: The name of the collection.
+        schema: The schema of the collection.
+        query: The query conditions, as in find.
+        values: Mapping from field name to its new value.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to write tensors to.
+        profiler: The profiler to time encoding and executing in.
+
+    Returns:
+        ids: The ids of the updated rows.
+    """
+    if "id" in values:
+        raise ValueError("The id of a row can not be updated")
+
+    unknown = values.keys() - schema.fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields {sorted(unknown)}")
+
+    ids = select_ids(collection_name, schema, query, cursor)
+    if len(ids) == 0 or len(values) == 0:
+        return ids
+
+    remove_references(schema, values, ids, cursor)
+
+    columns = []
+    column_values = []
+    with profiler.zone(ENCODE_ZONE) as zone:
+        for field_name, value in values.items():
+            field_type = schema.fields[field_name]
+            columns.extend(field_columns(field_name, field_type))
+
+            if not isinstance(field_type, TensorField):
+                column_values.append(to_sql_value(value))
+                continue
+
+            array = prepare_tensor(field_name, value, field_type)
+
+            if field_type.dedup:
+                locations, hashes = write_deduplicated_tensors(
+                    collection_name, field_name, field_type, [array], cursor, store
+                )
+                # Every updated row references the payload, which was counted once
+                add_references(schema.id, field_name, {hashes[0]: len(ids) - 1}, cursor)
+                column_values.extend((*locations[0], *tensor_statistics(array), hashes[0]))
+            else:
+                column_values.extend(
+                    (*write_tensor(collection_name, array, field_type, store), *tensor_statistics(array))
+                )
+            zone.nbytes += array.nbytes
+
+            if field_name in schema.vector_indexes:
+                # The rows are assigned to the inverted list of their new vector after the update
+                columns.append(tensor_column_name(field_name, "ivf_list"))
+                column_values.append(None)
+
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+
+    with profiler.zone(SQL_EXECUTE_ZONE):
+        cursor.execute(
+            f"update {collection_name} set {assignments} where id in (select value from json_each(?))",
+            (*column_values, json.dumps(ids)),
+        )
+
+    return ids
@@ -0,0 +1,443 @@
+import json
+import sqlite3
+from typing import Any, Iterator
+
+import numpy as np
+
+from tensordb.backend import Backend
+from tensordb.catalog import CollectionSchema, VectorIndex
+from tensordb.catalog.functions import bump_schema_version
+from tensordb.collections.query.conditions import compile_conditions
+from tensordb.config import CONFIG
+from tensordb.fields import TensorField
+from tensordb.storage import SegmentStore, read_tensors_into, tensor_column_name
+
+METRICS = ("l2", "cosine", "ip")
+
+# Number of vectors read and compared at a time
+SCAN_CHUNK_SIZE = 16384
+
+# Upper bound on the number of vectors used to train the centroids of a vector index
+MAX_TRAINING_VECTORS = 100_000
+
+KMEANS_ITERATIONS = 10
+
+
+def nearest(
+    collection_name: str,
+    field_name: str,
+    query_vector: np.ndarray,
+    k: int,
+    metric: str,
+    where: dict | None,
+    n_probe: int,
+    backend: Backend,
+) -> list[tuple[int, float]]:
+    """Find the rows whose vectors are closest to a query vector.
+
+    Scans the candidate vectors in chunks, straight from storage. If the field has a
+    vector index built for the metric, only the n_probe closest inverted lists are scanned.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The 1-D tensor field holding the vectors.
+        query_vector: The vector to compare with.
+        k: The number of neighbors to return.
+        metric: The distance metric, one of "l2", "cosine" and "ip".
+        where: Conditions the rows must satisfy, as in find.
+        n_probe: The number of inverted lists to scan when a vector index is used.
+        backend: The backend to use.
+
+    Returns:
+        neighbors: (id, distance) of the k nearest rows, closest first.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric}, must be one of {METRICS}")
+
+    assert k > 0, "k must be positive"
+
+    cursor = backend.cursor()
+    schema = backend.catalog.schema(collection_name, cursor)
+    field = vector_field(schema, field_name)
+
+    query_vector = np.asarray(query_vector, dtype=np.float64)
+    if query_vector.shape != tuple(field.shape):
+        raise ValueError(f"Query vector of shape {query_vector.shape} does not match field shape {field.shape}")
+
+    conditions, parameters = compile_conditions(where or {}, schema.fields)
+
+    vector_index = schema.vector_indexes.get(field_name)
+    if vector_index is not None and vector_index.metric == metric:
+        lists = closest_centroids(vector_index, query_vector[None], n_probe)[0]
+        list_column = tensor_column_name(field_name, "ivf_list")
+        conditions = f"({conditions}) and {list_column} in ({', '.join(['?'] * len(lists))})"
+        parameters.extend(lists.tolist())
+
+    best_ids = np.empty(0, dtype=np.int64)
+    best_distances = np.empty(0, dtype=np.float64)
+
+    for ids, vectors in scan_vectors(collection_name, field_name, field, conditions, parameters, cursor, backend.store):
+        ids = np.concatenate([best_ids, ids])
+        distances = np.concatenate([best_distances, compute_distances(vectors, query_vector, metric)])
+
+        if len(ids) > k:
+            keep = np.argpartition(distances, k - 1)[:k]
+            ids, distances = ids[keep], distances[keep]
+
+        best_ids, best_distances = ids, distances
+
+    order = np.argsort(best_distances, kind="stable")
+
+    return list(zip(best_ids[order].tolist(), best_distances[order].tolist()))
+
+
+def vector_field(schema: CollectionSchema, field_name: str) -> TensorField:
+    """Get a field of a collection that holds fixed-size vectors.
+
+    Args:
+        schema: The schema of the collection.
+        field_name: The name of the field.
+    """
+    field = schema.fields.get(field_name)
+
+    if not isinstance(field, TensorField) or not field.has_fixed_shape or len(field.shape) != 1:
+        raise ValueError(f"Field {field_name} must be a tensor field with a fixed 1-D shape")
+
+    if np.dtype(field.dtype).kind not in "biuf":
+        raise ValueError(f"Field {field_name} must have a numeric dtype")
+
+    return field
+
+
+def scan_vectors(
+    collection_name: str,
+    field_name: str,
+    field: TensorField,
+    conditions: str,
+    parameters: list[Any],
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Read the vectors of all rows matching a condition, one chunk at a time.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The 1-D tensor field holding the vectors.
+        field: The tensor field.
+        conditions: The sql expression rows must satisfy.
+        parameters: The parameters of the expression.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to read vectors from.
+
+    Yields:
+        ids: The ids of the rows in the chunk.
+        vectors: Their vectors, of shape (len(ids), D).
+    """
+    cursor.execute(
+        f"""
+        select
+            id,
+            {tensor_column_name(field_name, "segment")},
+            {tensor_column_name(field_name, "offset")},
+            {tensor_column_name(field_name, "stored_nbytes")}
+        from
+            {collection_name}
+        where
+            {conditions}
+    """,
+        parameters,
+    )
+
+    while rows := cursor.fetchmany(SCAN_CHUNK_SIZE):
+        ids, segments, offsets, stored_nbytes = (np.array(column, dtype=np.int64) for column in zip(*rows))
+        vectors = np.empty((len(rows), *field.shape), dtype=field.dtype)
+        read_tensors_into(collection_name, field, segments, offsets, stored_nbytes, vectors, store)
+        yield ids, vectors
+
+
+def compute_distances(vectors: np.ndarray, query_vector: np.ndarray, metric: str) -> np.ndarray:
+    """Compute the distance of every vector to a query vector.
+
+    Args:
+        vectors: The vectors, of shape (N, D).
+        query_vector: The query vector, of shape (D,).
+        metric: "l2" for the euclidean distance, "cosine" for one minus the cosine
+            similarity, and "ip" for the negative inner product.
+
+    Returns:
+        distances: The distances, of shape (N,).
+    """
+    vectors = vectors.astype(np.float64, copy=False)
+    products = vectors @ query_vector
+
+    if metric == "ip":
+        return -products
+
+    squared_norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    if metric == "l2":
+        return np.sqrt(np.maximum(squared_norms - 2 * products + query_vector @ query_vector, 0))
+
+    norms = np.sqrt(squared_norms) * np.linalg.norm(query_vector)
+    return 1 - np.divide(products, norms, out=np.zeros_like(products), where=norms > 0)
+
+
+def closest_centroids(vector_index: VectorIndex, vectors: np.ndarray, n: int) -> np.ndarray:
+    """Find the closest centroids of a vector index for every vector.
+
+    Args:
+        vector_index: The vector index.
+        vectors: The vectors, of shape (N, D).
+        n: The number of centroids to find per vector.
+
+    Returns:
+        lists: The indices of the closest centroids, of shape (N, n), closest first.
+    """
+    vectors = prepare_for_clustering(vectors, vector_index.metric)
+    n = min(n, len(vector_index.centroids))
+
+    distances = squared_l2_distances(vectors, vector_index.centroids)
+    closest = np.argpartition(distances, n - 1, axis=1)[:, :n]
+    order = np.argsort(np.take_along_axis(distances, closest, axis=1), axis=1)
+
+    return np.take_along_axis(closest, order, axis=1)
+
+
+def prepare_for_clustering(vectors: np.ndarray, metric: str) -> np.ndarray:
+    """Transform vectors so the l2 clustering of the index matches the metric.
+
+    Args:
+        vectors: The vectors, of shape (N, D).
+        metric: The metric of the index.
+    """
+    vectors = vectors.astype(np.float64, copy=False)
+
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    return vectors
+
+
+def squared_l2_distances(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Compute the squared euclidean distance between every vector and every centroid.
+
+    Args:
+        vectors: The vectors, of shape (N, D).
+        centroids: The centroids, of shape (C, D).
+
+    Returns:
+        distances: The squared distances, of shape (N, C).
+    """
+    return (
+        np.einsum("ij,ij->i", vectors, vectors)[:, None]
+        - 2 * vectors @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+    )
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Cluster vectors with Lloyd's algorithm.
+
+    Args:
+        vectors: The vectors, of shape (N, D).
+        n_clusters: The number of clusters.
+        rng: The random generator used to pick the initial centroids.
+
+    Returns:
+        centroids: The cluster centroids, of shape (n_clusters, D).
+    """
+    centroids = vectors[rng.choice(len(vectors), size=n_clusters, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = squared_l2_distances(vectors, centroids).argmin(axis=1)
+        counts = np.bincount(assignment, minlength=n_clusters)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+        # Restart empty clusters from random vectors
+        centroids[~filled] = vectors[rng.choice(len(vectors), size=int((~filled).sum()))]
+
+    return centroids
+
+
+def create_vector_index(
+    collection_name: str,
+    field_name: str,
+    n_lists: int | None,
+    metric: str,
+    backend: Backend,
+) -> None:
+    """Build an IVF index on a 1-D tensor field, and assign all rows to its inverted lists.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The 1-D tensor field holding the vectors.
+        n_lists: The number of inverted lists. If None, the square root of the number of rows.
+        metric: The metric the index is built for.
+        backend: The backend to use.
+    """
+    with backend.transaction() as cursor:
+        add_vector_index(
+            backend.catalog.schema(collection_name, cursor), field_name, n_lists, metric, cursor, backend.store
+        )
+
+
+def add_vector_index(
+    schema: CollectionSchema,
+    field_name: str,
+    n_lists: int | None,
+    metric: str,
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+) -> None:
+    """Build an IVF index in an open transaction, see create_vector_index.
+
+    Args:
+        schema: The schema of the collection.
+        field_name: The 1-D tensor field holding the vectors.
+        n_lists: The number of inverted lists. If None, the square root of the number of rows.
+        metric: The metric the index is built for.
+        cursor: The cursor of the transaction, which also reads the vectors the centroids are trained on.
+        store: The segment store to read vectors from.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric}, must be one of {METRICS}")
+
+    collection_name = schema.name
+    field = vector_field(schema, field_name)
+
+    if field_name in schema.vector_indexes:
+        raise ValueError(f"Field {field_name} already has a vector index")
+
+    cursor.execute(f"select id from {collection_name}")
+    ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+
+    if len(ids) == 0:
+        raise ValueError("Cannot build a vector index on an empty collection")
+
+    n_lists = n_lists or max(1, int(np.sqrt(len(ids))))
+    n_lists = min(n_lists, len(ids))
+
+    rng = np.random.default_rng(0)
+    num_training = min(len(ids), max(MAX_TRAINING_VECTORS, n_lists))
+    training_ids = np.sort(rng.choice(ids, size=num_training, replace=False))
+    training_vectors = np.concatenate(
+        [
+            vectors
+            for _, vectors in scan_vectors(
+                collection_name,
+                field_name,
+                field,
+                "id in (select value from json_each(?))",
+                [json.dumps(training_ids.tolist())],
+                cursor,
+                store,
+            )
+        ]
+    )
+
+    centroids = kmeans(prepare_for_clustering(training_vectors, metric), n_lists, rng)
+    vector_index = VectorIndex(field_name=field_name, metric=metric, centroids=centroids)
+
+    # Record the index first, so the schema changes below are part of the transaction
+    cursor.execute(
+        f"""
+        insert into {CONFIG.reserved_table_names.collection_vector_indexes}
+        (collection_id, field_name, metric, centroids)
+        values (?, ?, ?, ?)
+    """,
+        (schema.id, field_name, metric, centroids.astype(np.float64).tobytes()),
+    )
+
+    list_column = tensor_column_name(field_name, "ivf_list")
+    cursor.execute(f"alter table {collection_name} add column {list_column} integer")
+    cursor.execute(
+        f"create index {vector_index_name(collection_name, field_name)} on {collection_name} ({list_column})"
+    )
+
+    assign_inverted_lists(collection_name, field, vector_index, cursor, store)
+
+    bump_schema_version(cursor)
+
+
+def drop_vector_index(collection_name: str, field_name: str, backend: Backend) -> None:
+    """Drop the vector index on a field.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The indexed field.
+        backend: The backend to use.
+    """
+    with backend.transaction() as cursor:
+        schema = backend.catalog.schema(collection_name, cursor)
+
+        if field_name not in schema.vector_indexes:
+            raise ValueError(f"Field {field_name} has no vector index")
+
+        cursor.execute(
+            f"""
+            delete from {CONFIG.reserved_table_names.collection_vector_indexes}
+            where collection_id = ? and field_name = ?
+        """,
+            (schema.id, field_name),
+        )
+
+        cursor.execute(f"drop index {vector_index_name(collection_name, field_name)}")
+        cursor.execute(f"alter table {collection_name} drop column {tensor_column_name(field_name, 'ivf_list')}")
+
+        bump_schema_version(cursor)
+
+
+def update_vector_indexes(schema: CollectionSchema, cursor: sqlite3.Cursor, store: SegmentStore) -> None:
+    """Assign newly inserted rows to the inverted lists of all vector indexes of a collection.
+
+    Args:
+        schema: The schema of the collection.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to read vectors from.
+    """
+    for field_name, vector_index in schema.vector_indexes.items():
+        assign_inverted_lists(schema.name, schema.fields[field_name], vector_index, cursor, store)
+
+
+def assign_inverted_lists(
+    collection_name: str,
+    field: TensorField,
+    vector_index: VectorIndex,
+    cursor: sqlite3.Cursor,
+    store: SegmentStore,
+) -> None:
+    """Assign all rows that are not in an inverted list yet to the list of their closest centroid.
+
+    Args:
+        collection_name: The name of the collection.
+        field: The indexed tensor field.
+        vector_index: The vector index.
+        cursor: The cursor to use to execute the command.
+        store: The segment store to read vectors from.
+    """
+    list_column = tensor_column_name(vector_index.field_name, "ivf_list")
+
+    assignments = []
+    for ids, vectors in scan_vectors(
+        collection_name, vector_index.field_name, field, f"{list_column} is null", [], cursor, store
+    ):
+        lists = closest_centroids(vector_index, vectors, 1)[:, 0]
+        assignments.extend(zip(lists.tolist(), ids.tolist()))
+
+    cursor.executemany(f"update {collection_name} set {list_column} = ? where id = ?", assignments)
+
+
+def vector_index_name(collection_name: str, field_name: str) -> str:
+    """Get the name of the sqlite index on the inverted list column of a vector index.
+
+    Args:
+        collection_name: The name of the collection.
+        field_name: The indexed field.
+    """
+    return f"__ivf__{collection_name}__{field_name}"
@@ -0,0 +1,212 @@
+import atexit
+import threading
+import time
+from types import TracebackType
+from typing import Any, Callable
+
+# Writes block while this many groups of rows are waiting to be committed
+MAX_PENDING_GROUPS = 4
+
+
+class BufferedWriter:
+    """Buffers rows written from any number of threads, and inserts them in groups.
+
+    A background thread encodes the buffered rows and commits them in a single
+    transaction once max_rows rows are waiting, or once the oldest of them has
+    waited for max_latency_ms. Committing groups instead of single rows amortizes
+    the cost of syncing to disk.
+
+    Rows are validated by write, so invalid rows fail on the thread that writes them.
+    Rows are durable once flush or close returns. If inserting a group still fails,
+    e.g. on a unique index, its rows are inserted one by one, so that only the rows
+    that fail are discarded. The first error is raised by the next call to write,
+    flush or close.
+    """
+
+    __insert: Callable[[list[dict[str, Any]]], Any]
+    __prepare: Callable[[dict[str, Any]], dict[str, Any]] | None
+    __max_rows: int
+    __max_latency: float
+    __condition: threading.Condition
+    __pending: list[dict[str, Any]]
+    # time.monotonic() when the oldest pending row was written
+    __pending_since: float
+    # number of rows written, and number of rows whose group has been committed or discarded
+    __num_written: int
+    __num_done: int
+    __flush_requested: bool
+    __closed: bool
+    __error: BaseException | None
+    __thread: threading.Thread
+
+    def __init__(
+        self,
+        insert: Callable[[list[dict[str, Any]]], Any],
+        max_rows: int = 1024,
+        max_latency_ms: float = 100,
+        prepare: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    ) -> None:
+        """Start the background thread of the writer.
+
+        Args:
+            insert: Inserts a group of rows in a single transaction.
+            max_rows: The maximum number of rows committed at once.
+            max_latency_ms: The maximum time a row waits before its group is committed, in milliseconds.
+            prepare: Validates a row and converts it for insert, on the thread that writes it.
+                If None, rows are inserted as written.
+        """
+        assert max_rows > 0, "max_rows must be positive"
+        assert max_latency_ms >= 0, "max_latency_ms can not be negative"
+
+        self.__insert = insert
+        self.__prepare = prepare
+        self.__max_rows = max_rows
+        self.__max_latency = max_latency_ms / 1000
+        self.__condition = threading.Condition()
+        self.__pending = []
+        self.__pending_since = 0.0
+        self.__num_written = 0
+        self.__num_done = 0
+        self.__flush_requested = False
+        self.__closed = False
+        self.__error = None
+
+        self.__thread = threading.Thread(target=self.__run, name="tensordb-writer", daemon=True)
+        self.__thread.start()
+
+        # Buffered rows are committed if the interpreter exits before the writer is closed
+        atexit.register(self.close)
+
+    def write(self, data: dict[str, Any] | list[dict[str, Any]]) -> None:
+        """Buffer rows to be inserted.
+
+        Blocks while too many rows are waiting to be committed. If any row is invalid,
+        none of the rows are written.
+
+        Args:
+            data: The row or rows to insert.
+        """
+        if isinstance(data, dict):
+            data = [data]
+
+        if self.__prepare is not None:
+            data = [self.__prepare(row) for row in data]
+
+        with self.__condition:
+            self.__raise_error()
+            assert not self.__closed, "The writer is closed"
+
+            self.__condition.wait_for(
+                lambda: len(self.__pending) < MAX_PENDING_GROUPS * self.__max_rows or self.__error is not None
+            )
+            self.__raise_error()
+
+            if len(self.__pending) == 0:
+                self.__pending_since = time.monotonic()
+
+            self.__pending.extend(data)
+            self.__num_written += len(data)
+            self.__condition.notify_all()
+
+    def flush(self) -> None:
+        """Commit all rows written so far, and wait until they are durable."""
+        with self.__condition:
+            target = self.__num_written
+            self.__flush_requested = True
+            self.__condition.notify_all()
+
+            self.__condition.wait_for(lambda: self.__num_done >= target)
+            self.__raise_error()
+
+    def close(self) -> None:
+        """Commit all rows written so far, and stop the background thread."""
+        with self.__condition:
+            if self.__closed:
+                return
+
+            self.__closed = True
+            self.__condition.notify_all()
+
+        self.__thread.join()
+        atexit.unregister(self.close)
+
+        with self.__condition:
+            self.__raise_error()
+
+    def __enter__(self) -> "BufferedWriter":
+        """Use the writer in a with block, which closes it on exit."""
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Close the writer."""
+        self.close()
+
+    def __run(self) -> None:
+        """Commit groups of pending rows until the writer is closed."""
+        while True:
+            with self.__condition:
+                while not self.__group_ready():
+                    self.__condition.wait(timeout=self.__time_left())
+
+                if len(self.__pending) == 0:
+                    # Only reached when flushing or closing with nothing left to commit
+                    self.__flush_requested = False
+                    if self.__closed:
+                        return
+                    continue
+
+                group = self.__pending[: self.__max_rows]
+                # Rows left pending are newer than the committed ones, so keeping
+                # the time of the oldest row only commits them earlier
+                del self.__pending[: self.__max_rows]
+
+            self.__insert_group(group)
+
+            with self.__condition:
+                self.__num_done += len(group)
+                self.__condition.notify_all()
+
+    def __insert_group(self, group: list[dict[str, Any]]) -> None:
+        """Insert a group of rows, or every row on its own if the group fails."""
+        try:
+            self.__insert(group)
+            return
+        except BaseException as error:
+            if len(group) == 1 or not isinstance(error, Exception):
+                self.__fail(error)
+                return
+
+        for row in group:
+            try:
+                self.__insert([row])
+            except BaseException as error:
+                self.__fail(error)
+
+    def __fail(self, error: BaseException) -> None:
+        """Record the error of rows that were discarded."""
+        with self.__condition:
+            self.__error = self.__error or error
+
+    def __group_ready(self) -> bool:
+        """Check if pending rows should be committed now. Must hold the condition."""
+        return (
+            len(self.__pending) >= self.__max_rows
+            or self.__flush_requested
+            or self.__closed
+            or (len(self.__pending) > 0 and self.__time_left() == 0)
+        )
+
+    def __time_left(self) -> float | None:
+        """Seconds until the oldest pending row must be committed, or None without pending rows."""
+        if len(self.__pending) == 0:
+            return None
+
+        return max(0.0, self.__pending_since + self.__max_latency - time.monotonic())
+
+    def __raise_error(self) -> None:
+        """Raise the error of a failed group, once. Must hold the condition."""
+        error, self.__error = self.__error, None
+        if error is not None:
+            raise error
@@ -12,8 +12,34 @@ class Config:
     class _reserved_table_names:
         collections: str = "__collections__"
         collection_tensor_fields: str = "__collection_tensor_fields__"
+        metadata: str = "__metadata__"
+        collection_indexes: str = "__collection_indexes__"
+        collection_vector_indexes: str = "__collection_vector_indexes__"
+        tensor_payloads: str = "__tensor_payloads__"
 
     reserved_table_names: _reserved_table_names = field(init=False, default_factory=_reserved_table_names)
 
+    @dataclass(frozen=True)
+    class _storage:
+        tensor_dir: str = "tensors"
+        segment_max_bytes: int = 1073741824
+        alignment: int = 64
+
+    storage: _storage = field(init=False, default_factory=_storage)
+
+    @dataclass(frozen=True)
+    class _sqlite:
+        journal_mode: str = "wal"
+        busy_timeout: float = 5.0
+        cached_statements: int = 512
+
+    sqlite: _sqlite = field(init=False, default_factory=_sqlite)
+
+    @dataclass(frozen=True)
+    class _cache:
+        max_bytes: int = 0
+
+    cache: _cache = field(init=False, default_factory=_cache)
+
 
 CONFIG = Config()
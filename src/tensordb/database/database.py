@@ -3,15 +3,21 @@ from pathlib import Path
 from typing import Type
 
 from tensordb.backend import Backend, get_backend
+from tensordb.catalog.functions import create_metadata_table
 from tensordb.collections import Collection
+from tensordb.collections.export import import_collection
 from tensordb.config import CONFIG
 from tensordb.database.functions import (
+    create_collection_indexes_table,
     create_collection_tensor_fields_table,
+    create_collection_vector_indexes_table,
     create_collections_table,
-    get_collection_names,
+    create_tensor_payloads_table,
 )
 from tensordb.database.paths import get_database_path
 from tensordb.fields import Field
+from tensordb.profiling import OperationStats
+from tensordb.storage import CacheStats
 from tensordb.utils.naming import check_name_valid
 
 logger = logging.getLogger(__name__)
@@ -24,13 +30,15 @@ class Database:
     __db_name: str
     __backend: Backend
 
-    def __init__(self, db_name: str, base_path: Path | None = None) -> None:
+    def __init__(self, db_name: str, base_path: Path | None = None, cache_bytes: int | None = None) -> None:
         """Create a new TorchDB database.
 
         Args:
             db_name: The name of the database
             base_path: The base path where you want to store TorchDB databases
                 If None, it will use the default path.
+            cache_bytes: The byte budget of the cache of tensors read by queries.
+                If None, cache.max_bytes of the config. 0 disables the cache.
         """
         if not check_name_valid(db_name):
             raise ValueError(f"{db_name} is not a valid name")
@@ -44,14 +52,17 @@ class Database:
         else:
             logger.info(f"Loading existing database at {db_dir}")
 
-        self.__backend = get_backend(db_dir)
+        self.__backend = get_backend(db_dir, CONFIG.cache.max_bytes if cache_bytes is None else cache_bytes)
 
-        cursor = self.__backend.cursor()
+        with self.__backend.transaction() as cursor:
+            create_collections_table(cursor)
+            create_collection_tensor_fields_table(cursor)
+            create_collection_indexes_table(cursor)
+            create_collection_vector_indexes_table(cursor)
+            create_tensor_payloads_table(cursor)
+            create_metadata_table(cursor)
 
-        create_collections_table(cursor)
-        create_collection_tensor_fields_table(cursor)
-
-        self.__backend.commit()
+        self.__backend.catalog.refresh(self.__backend.cursor())
 
     def collection(self, name: str, fields: dict[str, Type | Field] | None = None) -> Collection:
         """Get an existing collection, or create a new one.
@@ -70,10 +81,65 @@ class Database:
 
         return Collection(name=name, backend=self.__backend, fields=fields)
 
+    def import_collection(self, path: Path, name: str | None = None) -> Collection:
+        """Create a collection from an export made with Collection.export.
+
+        The column files are memory mapped and inserted in blocks, in a single
+        transaction. The rows get new ids, in the order they were exported, and
+        the indexes of the exported collection are rebuilt.
+
+        Args:
+            path: The directory of the export.
+            name: The name of the new collection. If None, the name of the exported collection.
+
+        Returns:
+            collection: The new collection.
+        """
+        assert name is None or check_name_valid(name), f"{name} is not a valid name"
+
+        name = import_collection(path, name, self.__backend)
+
+        return Collection(name=name, backend=self.__backend, fields=None)
+
     def collections(self) -> list[str]:
         """Return a list of all the collections in the database."""
-        cursor = self.__backend.cursor()
-        return get_collection_names(cursor)
+        return self.__backend.catalog.names(self.__backend.cursor())
+
+    def stats(self) -> dict[str, OperationStats]:
+        """Get the count, total time and tensor bytes of every kind of operation run on the database.
+
+        Operations are catalog lookups ("catalog.lookup"), building sql ("sql.build"),
+        executing sql and fetching its rows ("sql.execute"), encoding tensors on insert
+        ("tensor.encode"), decoding query results ("tensor.decode") and commits ("commit").
+
+        Returns:
+            stats: Mapping from operation name to its accumulated timings.
+        """
+        return self.__backend.profiler.stats()
+
+    def reset_stats(self) -> None:
+        """Forget the timings of all operations run so far, and reset the cache counters."""
+        self.__backend.profiler.reset()
+        self.__backend.cache.reset_stats()
+
+    def cache_stats(self) -> CacheStats:
+        """Get the hits, misses, evictions and size of the tensor cache.
+
+        The cache holds the most recently read tensors of execute and iter queries, up
+        to the byte budget given by cache_bytes. Use the counters to size the budget.
+
+        Returns:
+            stats: The counters of the cache.
+        """
+        return self.__backend.cache.stats()
+
+    def close(self) -> None:
+        """Close the database.
+
+        All connections are closed, and tensor data is synced to disk. The database
+        and its collections can not be used afterwards.
+        """
+        self.__backend.close()
 
     def __repr__(self) -> str:
         """Returns a string representation of the database.
@@ -37,12 +37,82 @@ def create_collection_tensor_fields_table(cursor: sqlite3.Cursor) -> None:
             field_name text,
             dtype text,
             shape blob,
+            codec text not null default 'none',
+            chunk_rows integer,
+            dedup integer not null default 0,
             unique(collection_id, field_name)
         )
     """
     )
 
 
+def create_collection_indexes_table(cursor: sqlite3.Cursor) -> None:
+    """Create the collection indexes table.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+    """
+    table_name = CONFIG.reserved_table_names.collection_indexes
+
+    cursor.execute(
+        f"""
+        create table if not exists {table_name} (
+            id integer primary key,
+            collection_id integer,
+            name text unique,
+            fields blob,
+            is_unique integer
+        )
+    """
+    )
+
+
+def create_collection_vector_indexes_table(cursor: sqlite3.Cursor) -> None:
+    """Create the collection vector indexes table.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+    """
+    table_name = CONFIG.reserved_table_names.collection_vector_indexes
+
+    cursor.execute(
+        f"""
+        create table if not exists {table_name} (
+            id integer primary key,
+            collection_id integer,
+            field_name text,
+            metric text,
+            centroids blob,
+            unique(collection_id, field_name)
+        )
+    """
+    )
+
+
+def create_tensor_payloads_table(cursor: sqlite3.Cursor) -> None:
+    """Create the table of the stored payloads of deduplicated tensor fields.
+
+    Args:
+        cursor: The cursor to use to execute the command.
+    """
+    table_name = CONFIG.reserved_table_names.tensor_payloads
+
+    cursor.execute(
+        f"""
+        create table if not exists {table_name} (
+            collection_id integer,
+            field_name text,
+            hash text,
+            segment integer,
+            offset integer,
+            stored_nbytes integer,
+            refcount integer,
+            primary key(collection_id, field_name, hash)
+        ) without rowid
+    """
+    )
+
+
 def get_collection_names(cursor: sqlite3.Cursor) -> list[str]:
     """Get the names of all the collections.
 
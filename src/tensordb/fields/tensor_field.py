@@ -5,7 +5,46 @@ import numpy as np
 
 @dataclass
 class TensorField:
-    """Dataclass to define a TensorField."""
+    """Dataclass to define a TensorField.
+
+    Attributes:
+        dtype: The data type of the tensors.
+        shape: The shape of the tensors, where None is a dimension of any size. None for any shape.
+        codec: How every tensor is compressed when stored: "none", "zlib", "lzma",
+            "shuffle+zlib" (bytes grouped by significance) or "delta+zlib" (differences of
+            consecutive values). Tensors are decompressed transparently on read.
+        chunk_rows: Store every tensor in chunks of this many entries along its leading axis,
+            so that slices of it can be read without reading the whole tensor. None to store
+            every tensor in one piece.
+        dedup: Store identical tensors of the field only once. Every tensor is hashed on
+            insert, and rows with equal tensors share one stored payload, which can be
+            found in queries by hash, e.g. {"tensor.$hash": tensor_hash(array)}.
+    """
 
     dtype: np.dtype
     shape: None | tuple[int | None, ...]
+    codec: str = "none"
+    chunk_rows: int | None = None
+    dedup: bool = False
+
+    @property
+    def has_fixed_shape(self) -> bool:
+        """Whether every dimension of the field has a fixed size."""
+        return self.shape is not None and all(dim is not None for dim in self.shape)
+
+    def matches_shape(self, shape: tuple[int, ...]) -> bool:
+        """Check if a concrete shape satisfies the shape constraint of the field.
+
+        Args:
+            shape: The shape to check.
+
+        Returns:
+            matches: True if the shape is allowed by the field, False otherwise.
+        """
+        if self.shape is None:
+            return True
+
+        if len(shape) != len(self.shape):
+            return False
+
+        return all(expected is None or expected == actual for actual, expected in zip(shape, self.shape))
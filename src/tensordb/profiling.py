@@ -0,0 +1,110 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+try:
+    from tensordb.tensordb_cpp import tracy_enabled, tracy_zone_begin, tracy_zone_end
+
+    TRACY_ENABLED = tracy_enabled()
+except ImportError:
+    TRACY_ENABLED = False
+
+# Names of the zones that operations are timed in
+CATALOG_ZONE = "catalog.lookup"
+SQL_BUILD_ZONE = "sql.build"
+SQL_EXECUTE_ZONE = "sql.execute"
+ENCODE_ZONE = "tensor.encode"
+DECODE_ZONE = "tensor.decode"
+COMMIT_ZONE = "commit"
+
+
+@dataclass(frozen=True)
+class OperationStats:
+    """Accumulated timings of one kind of operation.
+
+    Attributes:
+        count: The number of times the operation ran.
+        seconds: The total time spent in the operation.
+        nbytes: The total number of tensor bytes the operation processed.
+    """
+
+    count: int
+    seconds: float
+    nbytes: int
+
+
+class Zone:
+    """A running zone, which the timed code can report the bytes it processed to.
+
+    Attributes:
+        nbytes: The number of tensor bytes processed in the zone.
+    """
+
+    nbytes: int
+
+    def __init__(self, nbytes: int) -> None:
+        """Initialize the zone.
+
+        Args:
+            nbytes: The number of bytes known to be processed when the zone starts.
+        """
+        self.nbytes = nbytes
+
+
+class Profiler:
+    """Accumulates the count, time and bytes of named operations.
+
+    Zones are cheap enough to stay on in production, but are placed around batches
+    of work rather than single rows. When the tensordb_cpp extension is built with
+    TRACY_ENABLE, every zone is also reported to Tracy, next to the zones of the C++ code.
+    """
+
+    __lock: threading.Lock
+    # zone name -> [count, seconds, nbytes]
+    __totals: dict[str, list]
+
+    def __init__(self) -> None:
+        """Initialize a profiler without any recorded operations."""
+        self.__lock = threading.Lock()
+        self.__totals = {}
+
+    @contextmanager
+    def zone(self, name: str, nbytes: int = 0) -> Iterator[Zone]:
+        """Time a block of code as an operation.
+
+        Args:
+            name: The name of the operation.
+            nbytes: The number of tensor bytes the block processes, if known in advance.
+
+        Yields:
+            zone: The running zone, whose nbytes the block can add to.
+        """
+        zone = Zone(nbytes)
+        tracy_zone = tracy_zone_begin(name) if TRACY_ENABLED else None
+        start = time.perf_counter()
+
+        try:
+            yield zone
+        finally:
+            seconds = time.perf_counter() - start
+
+            if tracy_zone is not None:
+                tracy_zone_end(tracy_zone)
+
+            with self.__lock:
+                totals = self.__totals.setdefault(name, [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] += zone.nbytes
+
+    def stats(self) -> dict[str, OperationStats]:
+        """Get the accumulated timings of every operation that has run."""
+        with self.__lock:
+            return {name: OperationStats(*totals) for name, totals in self.__totals.items()}
+
+    def reset(self) -> None:
+        """Forget all recorded operations."""
+        with self.__lock:
+            self.__totals.clear()
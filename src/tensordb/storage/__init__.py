@@ -0,0 +1,61 @@
+from tensordb.storage.cache import CacheStats, TensorCache
+from tensordb.storage.chunks import check_chunk_rows
+from tensordb.storage.codecs import CODECS, check_codec
+from tensordb.storage.native import NATIVE_AVAILABLE
+from tensordb.storage.refs import TensorRef
+from tensordb.storage.segments import SegmentStore
+from tensordb.storage.tensors import (
+    TENSOR_COLUMN_TYPES,
+    TENSOR_HASH_COLUMN_TYPES,
+    TENSOR_LOCATION_COLUMN_TYPES,
+    TENSOR_STATISTIC_COLUMN_TYPES,
+    block_statistics,
+    decode_shape,
+    encode_shape,
+    field_columns,
+    field_select_columns,
+    is_hidden_column,
+    prepare_tensor,
+    prepare_tensor_block,
+    read_tensors,
+    read_tensors_into,
+    tensor_column_field,
+    tensor_column_name,
+    tensor_column_types,
+    tensor_hash,
+    tensor_statistics,
+    write_tensor,
+    write_tensor_block,
+)
+
+__all__ = [
+    "CacheStats",
+    "CODECS",
+    "NATIVE_AVAILABLE",
+    "SegmentStore",
+    "TENSOR_COLUMN_TYPES",
+    "TENSOR_HASH_COLUMN_TYPES",
+    "TENSOR_LOCATION_COLUMN_TYPES",
+    "TENSOR_STATISTIC_COLUMN_TYPES",
+    "TensorCache",
+    "TensorRef",
+    "block_statistics",
+    "check_chunk_rows",
+    "check_codec",
+    "decode_shape",
+    "encode_shape",
+    "field_columns",
+    "field_select_columns",
+    "is_hidden_column",
+    "prepare_tensor",
+    "prepare_tensor_block",
+    "tensor_column_field",
+    "tensor_column_name",
+    "tensor_column_types",
+    "tensor_hash",
+    "tensor_statistics",
+    "read_tensors",
+    "read_tensors_into",
+    "write_tensor",
+    "write_tensor_block",
+]
@@ -0,0 +1,204 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+# (collection name, row id, field name)
+CacheKey = tuple[str, int, str]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Counters of a tensor cache.
+
+    Attributes:
+        hits: The number of lookups that found their tensor.
+        misses: The number of lookups that did not.
+        evictions: The number of tensors dropped to stay within the byte budget.
+        entries: The number of cached tensors.
+        nbytes: The total size of the cached tensors.
+        max_bytes: The byte budget of the cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class TensorCache:
+    """A least recently used cache of decoded tensors, bounded by their total size.
+
+    Tensors are keyed by (collection name, row id, field name), and are cached as
+    read-only in-memory arrays. Writers invalidate the rows they change after
+    committing. Every invalidation also starts a new epoch of its collection, and
+    tensors read in an older epoch are not cached, so that readers that started
+    before a change can not put back tensors it replaced.
+    """
+
+    __max_bytes: int
+    __lock: threading.Lock
+    __entries: OrderedDict[CacheKey, np.ndarray]
+    # (collection name, row id) -> the cached fields of the row
+    __rows: dict[tuple[str, int], set[str]]
+    # collection name -> number of invalidations of the collection
+    __epochs: dict[str, int]
+    __nbytes: int
+    __hits: int
+    __misses: int
+    __evictions: int
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_bytes: The maximum total size of the cached tensors. 0 disables the cache.
+        """
+        assert max_bytes >= 0, "max_bytes can not be negative"
+
+        self.__max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__rows = {}
+        self.__epochs = {}
+        self.__nbytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache can hold any tensor."""
+        return self.__max_bytes > 0
+
+    def epoch(self, collection_name: str) -> int:
+        """Get the current epoch of a collection. Read it before reading the tensors to cache.
+
+        Args:
+            collection_name: The name of the collection.
+        """
+        with self.__lock:
+            return self.__epochs.get(collection_name, 0)
+
+    def get(self, key: CacheKey) -> np.ndarray | None:
+        """Look up a tensor, and mark it as recently used.
+
+        Args:
+            key: The key of the tensor.
+
+        Returns:
+            tensor: The cached tensor, or None if it is not cached.
+        """
+        with self.__lock:
+            tensor = self.__entries.get(key)
+
+            if tensor is None:
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+
+            return tensor
+
+    def put(self, key: CacheKey, tensor: np.ndarray, epoch: int) -> np.ndarray:
+        """Cache a tensor, evicting the least recently used tensors to make room for it.
+
+        Args:
+            key: The key of the tensor.
+            tensor: The tensor.
+            epoch: The epoch of the collection when the tensor was read.
+
+        Returns:
+            tensor: The tensor as cached, or the given tensor if it was not cached.
+        """
+        if tensor.nbytes > self.__max_bytes:
+            return tensor
+
+        # Memory mapped tensors are copied, so that hits do not go back to disk
+        cached = np.array(tensor) if isinstance(tensor, np.memmap) else tensor.view()
+        cached.flags.writeable = False
+
+        collection_name, row_id, field_name = key
+
+        with self.__lock:
+            if self.__epochs.get(collection_name, 0) != epoch:
+                return cached
+
+            previous = self.__entries.pop(key, None)
+            if previous is not None:
+                self.__nbytes -= previous.nbytes
+
+            self.__entries[key] = cached
+            self.__rows.setdefault((collection_name, row_id), set()).add(field_name)
+            self.__nbytes += cached.nbytes
+
+            while self.__nbytes > self.__max_bytes:
+                evicted_key, evicted = self.__entries.popitem(last=False)
+                self.__forget(evicted_key, evicted)
+                self.__evictions += 1
+
+        return cached
+
+    def invalidate(self, collection_name: str, row_ids: Iterable[int] | None = None) -> None:
+        """Drop the cached tensors of rows, and start a new epoch of their collection.
+
+        Args:
+            collection_name: The name of the collection.
+            row_ids: The ids of the rows. If None, all rows of the collection.
+        """
+        with self.__lock:
+            self.__epochs[collection_name] = self.__epochs.get(collection_name, 0) + 1
+
+            if row_ids is None:
+                keys = [key for key in self.__entries if key[0] == collection_name]
+            else:
+                keys = [
+                    (collection_name, row_id, field_name)
+                    for row_id in row_ids
+                    for field_name in self.__rows.get((collection_name, row_id), ())
+                ]
+
+            for key in keys:
+                self.__forget(key, self.__entries.pop(key))
+
+    def clear(self) -> None:
+        """Drop all cached tensors."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__rows.clear()
+            self.__nbytes = 0
+
+    def stats(self) -> CacheStats:
+        """Get the counters of the cache."""
+        with self.__lock:
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                entries=len(self.__entries),
+                nbytes=self.__nbytes,
+                max_bytes=self.__max_bytes,
+            )
+
+    def reset_stats(self) -> None:
+        """Reset the hit, miss and eviction counters."""
+        with self.__lock:
+            self.__hits = 0
+            self.__misses = 0
+            self.__evictions = 0
+
+    def __forget(self, key: CacheKey, tensor: np.ndarray) -> None:
+        """Account for a tensor removed from the entries. Must hold the lock."""
+        collection_name, row_id, field_name = key
+
+        self.__nbytes -= tensor.nbytes
+
+        fields = self.__rows[(collection_name, row_id)]
+        fields.discard(field_name)
+        if not fields:
+            del self.__rows[(collection_name, row_id)]
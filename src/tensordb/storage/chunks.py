@@ -0,0 +1,165 @@
+"""Storage of large tensors in chunks along their leading axis.
+
+A chunked tensor is stored as its encoded chunks, followed by a chunk index: an
+int64 array with the segment, offset and stored size of every chunk. The location
+columns of the tensor point to the chunk index, so that reading a slice of the
+tensor only reads and decodes the chunks that cover the slice.
+"""
+
+import operator
+from typing import Any
+
+import numpy as np
+
+from tensordb.fields import TensorField
+from tensordb.storage.codecs import decode_tensor, encode_tensor, parallel_map
+from tensordb.storage.segments import SegmentStore
+
+
+def check_chunk_rows(field_name: str, field: TensorField) -> None:
+    """Check that a field can be stored in chunks of its chunk_rows.
+
+    Args:
+        field_name: The name of the field, used for error messages.
+        field: The tensor field.
+    """
+    if field.chunk_rows is None:
+        return
+
+    if field.chunk_rows <= 0:
+        raise ValueError(f"chunk_rows of field {field_name} must be positive, got {field.chunk_rows}")
+
+    if field.shape is not None and len(field.shape) == 0:
+        raise ValueError(f"Field {field_name} stores scalars, which have no leading axis to chunk")
+
+
+def num_chunks(length: int, chunk_rows: int) -> int:
+    """Get the number of chunks of a tensor.
+
+    Args:
+        length: The size of the leading axis of the tensor.
+        chunk_rows: The number of entries along the leading axis per chunk.
+    """
+    return -(-length // chunk_rows)
+
+
+def write_chunked_tensor(
+    collection_name: str, array: np.ndarray, field: TensorField, store: SegmentStore
+) -> tuple[int, int, int]:
+    """Encode a tensor in chunks, and append the chunks and their index to the store.
+
+    Args:
+        collection_name: The name of the collection.
+        array: The tensor, with at least one dimension.
+        field: The tensor field the tensor is stored in.
+        store: The segment store to write the tensor to.
+
+    Returns:
+        segment: The segment of the chunk index.
+        offset: The byte offset of the chunk index inside its segment.
+        stored_nbytes: The number of bytes stored for the chunks and the chunk index.
+    """
+    if array.ndim == 0:
+        raise ValueError(f"Cannot store a scalar in chunks, field chunk_rows is {field.chunk_rows}")
+
+    chunks = [array[start : start + field.chunk_rows] for start in range(0, len(array), field.chunk_rows)]
+    encoded = parallel_map(lambda chunk: encode_tensor(chunk, field.codec), chunks)
+
+    chunk_index = np.array(
+        [(*store.append(collection_name, data), data.nbytes) for data in encoded], dtype=np.int64
+    ).reshape(-1, 3)
+    segment, offset = store.append(collection_name, chunk_index)
+
+    return segment, offset, int(chunk_index[:, 2].sum()) + chunk_index.nbytes
+
+
+def read_chunked_tensor(
+    collection_name: str,
+    field: TensorField,
+    segment: int,
+    offset: int,
+    shape: tuple[int, ...],
+    store: SegmentStore,
+    index: Any = None,
+) -> np.ndarray:
+    """Read a chunked tensor, or only the chunks that cover an index into it.
+
+    Args:
+        collection_name: The name of the collection.
+        field: The tensor field the tensor is stored in.
+        segment: The segment of the chunk index.
+        offset: The byte offset of the chunk index inside its segment.
+        shape: The shape of the whole tensor.
+        store: The segment store to read the tensor from.
+        index: A numpy index into the tensor, e.g. np.s_[1000:2000]. None for the whole tensor.
+
+    Returns:
+        tensor: The tensor, or the indexed part of it.
+    """
+    chunk_rows = field.chunk_rows
+    start, stop, local_index = leading_range(index, shape[0])
+
+    first_chunk = start // chunk_rows
+    last_chunk = num_chunks(stop, chunk_rows)
+    chunk_index = store.read(collection_name, segment, offset, np.int64, (num_chunks(shape[0], chunk_rows), 3))
+
+    def read(chunk: int) -> np.ndarray:
+        chunk_segment, chunk_offset, stored_nbytes = chunk_index[chunk].tolist()
+        chunk_shape = (min(chunk_rows, shape[0] - chunk * chunk_rows), *shape[1:])
+        data = store.read(collection_name, chunk_segment, chunk_offset, np.uint8, (stored_nbytes,))
+        return decode_tensor(data, field.codec, field.dtype, chunk_shape)
+
+    chunks = parallel_map(read, range(first_chunk, last_chunk))
+
+    if len(chunks) == 0:
+        block = np.empty((0, *shape[1:]), dtype=field.dtype)
+    elif len(chunks) == 1:
+        block = chunks[0]
+    else:
+        block = np.concatenate(chunks)
+
+    block_start = first_chunk * chunk_rows
+
+    return block[start - block_start : stop - block_start][local_index]
+
+
+def leading_range(index: Any, length: int) -> tuple[int, int, tuple]:
+    """Find the range of the leading axis that a numpy index reads.
+
+    Args:
+        index: A numpy index, or None for the whole array.
+        length: The size of the leading axis.
+
+    Returns:
+        start: The first entry along the leading axis that is read.
+        stop: One past the last entry along the leading axis that is read.
+        local_index: The index, relative to the array[start:stop] it reads from.
+    """
+    if index is None:
+        return 0, length, ()
+
+    rest = ()
+    if isinstance(index, tuple):
+        if len(index) == 0:
+            return 0, length, ()
+        index, rest = index[0], index[1:]
+
+    if isinstance(index, slice):
+        rows = range(length)[index]
+        if len(rows) == 0:
+            return 0, 0, (slice(0, 0), *rest)
+
+        start = min(rows[0], rows[-1])
+        # A negative step stops before the first entry, which a relative slice can only express as None
+        local_stop = rows.stop - start if rows.stop >= start else None
+        return start, max(rows[0], rows[-1]) + 1, (slice(rows.start - start, local_stop, rows.step), *rest)
+
+    if isinstance(index, (int, np.integer)):
+        entry = operator.index(index)
+        entry = entry + length if entry < 0 else entry
+        if not 0 <= entry < length:
+            raise IndexError(f"Index {index} is out of bounds for a leading axis of size {length}")
+        return entry, entry + 1, (0, *rest)
+
+    # Other indices, like arrays or an ellipsis, read the whole leading axis
+    return 0, length, (index, *rest)
@@ -0,0 +1,156 @@
+"""Compression codecs for stored tensors.
+
+Every tensor is compressed on its own, so single tensors can still be read without
+touching their neighbors. zlib and lzma release the GIL while they run, so batches
+of tensors are compressed and decompressed on a shared pool of threads.
+"""
+
+import lzma
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+CODECS = ("none", "zlib", "lzma", "shuffle+zlib", "delta+zlib")
+
+ZLIB_LEVEL = 6
+
+# Number of threads that (de)compress tensors
+CODEC_WORKERS = os.cpu_count() or 1
+
+# Batches with fewer tensors than this are (de)compressed on the calling thread
+MIN_PARALLEL_TENSORS = 4
+
+# Unsigned integer dtype with the itemsize of every dtype that delta coding supports
+_DELTA_DTYPES = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def check_codec(field_name: str, codec: str, dtype: np.dtype) -> None:
+    """Check that a codec exists, and supports the dtype of a field.
+
+    Args:
+        field_name: The name of the field, used for error messages.
+        codec: The name of the codec.
+        dtype: The dtype of the field.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec} of field {field_name}, must be one of {CODECS}")
+
+    if codec == "delta+zlib" and np.dtype(dtype).itemsize not in _DELTA_DTYPES:
+        raise ValueError(f"Codec {codec} of field {field_name} does not support dtype {np.dtype(dtype)}")
+
+
+def encode_tensor(array: np.ndarray, codec: str) -> np.ndarray:
+    """Encode a tensor to the bytes that are stored.
+
+    Args:
+        array: A C-contiguous tensor.
+        codec: The name of the codec.
+
+    Returns:
+        data: The stored bytes, as a uint8 array. The tensor itself for the "none" codec.
+    """
+    if codec == "none":
+        return array
+
+    raw = array.reshape(-1).view(np.uint8)
+
+    if codec == "zlib":
+        compressed = zlib.compress(raw, ZLIB_LEVEL)
+    elif codec == "lzma":
+        compressed = lzma.compress(raw)
+    elif codec == "shuffle+zlib":
+        # Bytes of the same significance compress better next to each other
+        shuffled = raw.reshape(-1, array.dtype.itemsize).T.copy()
+        compressed = zlib.compress(shuffled, ZLIB_LEVEL)
+    elif codec == "delta+zlib":
+        # Differences of the bit patterns wrap around, so decoding is exact for every dtype
+        values = array.reshape(-1).view(_DELTA_DTYPES[array.dtype.itemsize])
+        deltas = np.diff(values, prepend=values.dtype.type(0)) if values.size > 0 else values
+        compressed = zlib.compress(deltas, ZLIB_LEVEL)
+    else:
+        raise ValueError(f"Unknown codec {codec}")
+
+    return np.frombuffer(compressed, dtype=np.uint8)
+
+
+def decode_tensor(data: np.ndarray, codec: str, dtype: np.dtype, shape: tuple[int, ...]) -> np.ndarray:
+    """Decode the stored bytes of a tensor.
+
+    Args:
+        data: The stored bytes, as a uint8 array.
+        codec: The name of the codec.
+        dtype: The dtype of the tensor.
+        shape: The shape of the tensor.
+
+    Returns:
+        array: The tensor.
+    """
+    dtype = np.dtype(dtype)
+
+    if codec == "none":
+        return data.view(dtype).reshape(shape)
+
+    if codec == "zlib":
+        return np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape)
+
+    if codec == "lzma":
+        return np.frombuffer(lzma.decompress(data), dtype=dtype).reshape(shape)
+
+    if codec == "shuffle+zlib":
+        shuffled = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        return shuffled.reshape(dtype.itemsize, -1).T.copy().view(dtype).reshape(shape)
+
+    if codec == "delta+zlib":
+        deltas = np.frombuffer(zlib.decompress(data), dtype=_DELTA_DTYPES[dtype.itemsize])
+        return np.cumsum(deltas, dtype=deltas.dtype).view(dtype).reshape(shape)
+
+    raise ValueError(f"Unknown codec {codec}")
+
+
+def parallel_map(function: Callable[[T], R], items: Sequence[T], workers: int | None = None) -> list[R]:
+    """Apply a function to every item, spread over the codec threads.
+
+    Items are split in one contiguous chunk per worker, so the overhead is per
+    chunk rather than per item.
+
+    Args:
+        function: The function to apply. Must be thread-safe.
+        items: The items to apply the function to.
+        workers: The number of chunks to split the items in. At most CODEC_WORKERS of
+            them run at once. If None, one per codec thread. 1 runs on the calling thread.
+
+    Returns:
+        results: The result for every item, in order.
+    """
+    workers = CODEC_WORKERS if workers is None else workers
+    assert workers > 0, "The number of workers must be positive"
+
+    if workers == 1 or len(items) < MIN_PARALLEL_TENSORS:
+        return [function(item) for item in items]
+
+    pool = _codec_pool()
+    chunk_size = -(-len(items) // workers)
+    chunks = [items[start : start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    return [result for chunk in pool.map(lambda chunk: [function(item) for item in chunk], chunks) for result in chunk]
+
+
+def _codec_pool() -> ThreadPoolExecutor:
+    """Get the pool of threads shared by all codec work, starting it on first use."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=CODEC_WORKERS, thread_name_prefix="tensordb-codec")
+
+        return _pool
@@ -0,0 +1,33 @@
+"""Native implementations of the tensor hot loops, from the optional tensordb_cpp extension.
+
+The functions release the GIL while they run, so threads that insert or read
+tensors run in parallel. Without the extension, callers fall back to numpy.
+"""
+
+import numpy as np
+
+try:
+    from tensordb.tensordb_cpp import gather_rows, row_statistics
+except ImportError:
+    gather_rows = None
+    row_statistics = None
+
+NATIVE_AVAILABLE = row_statistics is not None
+
+# Dtypes that row_statistics is compiled for
+NATIVE_STATISTIC_DTYPES = frozenset(
+    np.dtype(dtype)
+    for dtype in [
+        np.bool_,
+        np.int8,
+        np.int16,
+        np.int32,
+        np.int64,
+        np.uint8,
+        np.uint16,
+        np.uint32,
+        np.uint64,
+        np.float32,
+        np.float64,
+    ]
+)
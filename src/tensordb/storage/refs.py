@@ -0,0 +1,93 @@
+from typing import Any
+
+import numpy as np
+
+from tensordb.fields import TensorField
+from tensordb.storage.segments import SegmentStore
+from tensordb.storage.tensors import decode_shape, read_tensors
+
+
+class TensorRef:
+    """A reference to a stored tensor, that only reads the tensor when it is loaded.
+
+    The shape and dtype are known without reading the tensor. Use load() or
+    np.asarray(ref) to read it.
+    """
+
+    __collection_name: str
+    __field: TensorField
+    # the values of the location columns of the tensor
+    __location: tuple
+    __store: SegmentStore
+    __index: Any
+    __shape: tuple[int, ...]
+
+    def __init__(
+        self,
+        collection_name: str,
+        field: TensorField,
+        location: tuple,
+        store: SegmentStore,
+        index: Any = None,
+    ) -> None:
+        """Initialize the reference.
+
+        Args:
+            collection_name: The name of the collection.
+            field: The tensor field the tensor is stored in.
+            location: The values of the location columns of the tensor.
+            store: The segment store to read the tensor from.
+            index: A numpy index applied to the tensor when it is loaded. None for the whole tensor.
+        """
+        self.__collection_name = collection_name
+        self.__field = field
+        self.__location = tuple(location)
+        self.__store = store
+        self.__index = index
+
+        shape = decode_shape(location[-1])
+        if index is not None:
+            # Index a zero-size broadcast view, to get the shape without reading anything
+            shape = np.broadcast_to(np.empty((), dtype=np.uint8), shape)[index].shape
+        self.__shape = shape
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The shape of the tensor."""
+        return self.__shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The data type of the tensor."""
+        return np.dtype(self.__field.dtype)
+
+    @property
+    def ndim(self) -> int:
+        """The number of dimensions of the tensor."""
+        return len(self.__shape)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the loaded tensor, in bytes."""
+        return int(np.prod(self.__shape, dtype=np.int64)) * self.dtype.itemsize
+
+    def load(self) -> np.ndarray:
+        """Read the tensor from storage.
+
+        Returns:
+            tensor: The tensor, as a read-only array.
+        """
+        return read_tensors(self.__collection_name, self.__field, [self.__location], self.__store, self.__index)[0]
+
+    def __array__(self, dtype: np.dtype | None = None, copy: bool | None = None) -> np.ndarray:
+        """Read the tensor when it is converted to a numpy array."""
+        array = self.load()
+
+        if dtype is not None and array.dtype != dtype:
+            return array.astype(dtype)
+
+        return array.copy() if copy else array
+
+    def __repr__(self) -> str:
+        """Describe the tensor without reading it."""
+        return f"TensorRef(shape={self.__shape}, dtype={self.dtype})"
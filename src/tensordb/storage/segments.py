@@ -0,0 +1,266 @@
+import os
+from io import FileIO
+from math import prod
+from pathlib import Path
+
+import numpy as np
+
+from tensordb.config import CONFIG
+from tensordb.storage.native import NATIVE_AVAILABLE, gather_rows
+
+SEGMENT_SUFFIX = ".seg"
+
+# Upper bound on the bytes gathered at once when copying scattered rows
+GATHER_CHUNK_BYTES = 1 << 20
+
+
+class SegmentStore:
+    """Append-only binary storage for tensor payloads.
+
+    Each collection gets its own directory of numbered segment files. Tensors are
+    appended as raw dtype-typed bytes, and read back as zero-copy views into a
+    memory map of the segment they live in.
+    """
+
+    __dir: Path
+    __segment_max_bytes: int
+    __alignment: int
+    # collection name -> (segment, file, size of the segment)
+    __writers: dict[str, tuple[int, FileIO, int]]
+    # (collection name, segment) -> memory map of the whole segment
+    __maps: dict[tuple[str, int], np.memmap]
+    __unsynced: set[str]
+
+    def __init__(
+        self,
+        dir: Path,
+        segment_max_bytes: int = CONFIG.storage.segment_max_bytes,
+        alignment: int = CONFIG.storage.alignment,
+    ) -> None:
+        """Initialize the segment store.
+
+        Args:
+            dir: The directory where the segments are stored.
+            segment_max_bytes: Size after which a new segment is started.
+            alignment: The alignment of every tensor inside a segment, in bytes.
+        """
+        self.__dir = dir
+        self.__segment_max_bytes = segment_max_bytes
+        self.__alignment = alignment
+        self.__writers = {}
+        self.__maps = {}
+        self.__unsynced = set()
+
+    @property
+    def dir(self) -> Path:
+        """The directory where the segments are stored."""
+        return self.__dir
+
+    def segment_path(self, collection_name: str, segment: int) -> Path:
+        """Returns the path of a segment file.
+
+        Args:
+            collection_name: The name of the collection.
+            segment: The number of the segment.
+        """
+        return self.__dir / collection_name / f"{segment:08d}{SEGMENT_SUFFIX}"
+
+    def append(self, collection_name: str, array: np.ndarray) -> tuple[int, int]:
+        """Append the raw bytes of an array to the active segment of a collection.
+
+        Args:
+            collection_name: The name of the collection.
+            array: The array to store. Must be C-contiguous.
+
+        Returns:
+            segment: The segment the array was written to.
+            offset: The byte offset of the array inside the segment.
+        """
+        assert array.flags.c_contiguous, "Only C-contiguous arrays can be stored"
+
+        data = array.reshape(-1).view(np.uint8)
+        segment, file, size = self.__writer(collection_name, data.nbytes)
+
+        offset = (size + self.__alignment - 1) // self.__alignment * self.__alignment
+        if offset > size:
+            _write_all(file, bytes(offset - size))
+
+        _write_all(file, data)
+
+        self.__writers[collection_name] = (segment, file, offset + data.nbytes)
+        self.__unsynced.add(collection_name)
+
+        return segment, offset
+
+    def read(
+        self,
+        collection_name: str,
+        segment: int,
+        offset: int,
+        dtype: np.dtype,
+        shape: tuple[int, ...],
+    ) -> np.ndarray:
+        """Read an array from a segment without copying it.
+
+        Args:
+            collection_name: The name of the collection.
+            segment: The segment the array is stored in.
+            offset: The byte offset of the array inside the segment.
+            dtype: The data type of the array.
+            shape: The shape of the array.
+
+        Returns:
+            array: A read-only memory mapped view of the stored array.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = dtype.itemsize * prod(shape)
+
+        if nbytes == 0:
+            return np.empty(shape, dtype=dtype)
+
+        buffer = self.__segment_map(collection_name, segment, offset + nbytes)
+
+        return buffer[offset : offset + nbytes].view(dtype).reshape(shape)
+
+    def read_into(self, collection_name: str, segments: np.ndarray, offsets: np.ndarray, out: np.ndarray) -> None:
+        """Copy equally shaped arrays from the store into the rows of an output array.
+
+        Rows are copied straight from the memory mapped segments into out,
+        without creating an array per row.
+
+        Args:
+            collection_name: The name of the collection.
+            segments: The segment of every row.
+            offsets: The byte offset of every row inside its segment.
+            out: The array to fill, with one stored array per entry along the first axis.
+        """
+        if out.size == 0:
+            return
+
+        out_bytes = out.reshape(len(out), -1).view(np.uint8)
+        row_nbytes = out_bytes.shape[1]
+
+        for segment in np.unique(segments):
+            rows = np.flatnonzero(segments == segment)
+            row_offsets = offsets[rows]
+            buffer = self.__segment_map(collection_name, int(segment), int(row_offsets.max()) + row_nbytes)
+
+            _copy_rows(buffer, row_offsets, row_nbytes, out_bytes, rows)
+
+    def sync(self) -> None:
+        """Flush all segments written since the last sync to disk."""
+        for collection_name in self.__unsynced:
+            _, file, _ = self.__writers[collection_name]
+            os.fsync(file.fileno())
+
+        self.__unsynced.clear()
+
+    def close(self) -> None:
+        """Sync and close all open segment files."""
+        self.sync()
+
+        for _, file, _ in self.__writers.values():
+            file.close()
+
+        self.__writers.clear()
+        self.__maps.clear()
+
+    def __writer(self, collection_name: str, nbytes: int) -> tuple[int, FileIO, int]:
+        """Get the active segment of a collection that can fit nbytes more bytes.
+
+        Args:
+            collection_name: The name of the collection.
+            nbytes: The number of bytes about to be written.
+        """
+        if collection_name not in self.__writers:
+            collection_dir = self.__dir / collection_name
+            collection_dir.mkdir(parents=True, exist_ok=True)
+
+            segments = [int(path.stem) for path in collection_dir.glob(f"*{SEGMENT_SUFFIX}")]
+            segment = max(segments, default=0)
+
+            self.__writers[collection_name] = self.__open_segment(collection_name, segment)
+
+        segment, file, size = self.__writers[collection_name]
+
+        if size > 0 and size + self.__alignment + nbytes > self.__segment_max_bytes:
+            if collection_name in self.__unsynced:
+                os.fsync(file.fileno())
+                self.__unsynced.discard(collection_name)
+            file.close()
+            self.__writers[collection_name] = self.__open_segment(collection_name, segment + 1)
+
+        return self.__writers[collection_name]
+
+    def __open_segment(self, collection_name: str, segment: int) -> tuple[int, FileIO, int]:
+        """Open a segment for appending.
+
+        Args:
+            collection_name: The name of the collection.
+            segment: The number of the segment.
+        """
+        file = open(self.segment_path(collection_name, segment), "ab", buffering=0)
+        size = os.fstat(file.fileno()).st_size
+        return segment, file, size
+
+    def __segment_map(self, collection_name: str, segment: int, min_size: int) -> np.memmap:
+        """Get a memory map of a segment that covers at least min_size bytes.
+
+        Args:
+            collection_name: The name of the collection.
+            segment: The number of the segment.
+            min_size: The minimum number of bytes the map must cover.
+        """
+        key = (collection_name, segment)
+        buffer = self.__maps.get(key)
+
+        if buffer is None or len(buffer) < min_size:
+            buffer = np.memmap(self.segment_path(collection_name, segment), dtype=np.uint8, mode="r")
+            self.__maps[key] = buffer
+
+        return buffer
+
+
+def _copy_rows(
+    buffer: np.ndarray, offsets: np.ndarray, row_nbytes: int, out_bytes: np.ndarray, rows: np.ndarray
+) -> None:
+    """Copy equally sized byte ranges from a buffer into rows of an output array.
+
+    Args:
+        buffer: The buffer to read from.
+        offsets: The start of every range.
+        row_nbytes: The size of every range.
+        out_bytes: Byte view of the output, with one row per range.
+        rows: The row of out_bytes every range is copied to.
+    """
+    steps = np.diff(offsets)
+    if len(offsets) == 1 or (steps[0] >= row_nbytes and np.all(steps == steps[0])):
+        # Rows written as one block are evenly spaced, and can be copied from a single strided view
+        step = int(steps[0]) if len(steps) > 0 else row_nbytes
+        out_bytes[rows] = np.lib.stride_tricks.as_strided(
+            buffer[offsets[0] :], shape=(len(offsets), row_nbytes), strides=(step, 1), writeable=False
+        )
+        return
+
+    if NATIVE_AVAILABLE and out_bytes.flags.c_contiguous:
+        gather_rows(buffer, offsets.astype(np.int64, copy=False), rows.astype(np.int64, copy=False), out_bytes)
+        return
+
+    byte_range = np.arange(row_nbytes)
+    chunk_size = max(1, GATHER_CHUNK_BYTES // row_nbytes)
+    for start in range(0, len(offsets), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        out_bytes[rows[chunk]] = buffer[offsets[chunk, None] + byte_range]
+
+
+def _write_all(file: FileIO, data: bytes | np.ndarray) -> None:
+    """Write all bytes to an unbuffered file.
+
+    Args:
+        file: The file to write to.
+        data: The bytes to write.
+    """
+    view = memoryview(data).cast("B")
+    while view:
+        written = file.write(view)
+        view = view[written:]
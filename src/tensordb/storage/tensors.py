@@ -0,0 +1,423 @@
+import hashlib
+import json
+from typing import Any, Sequence, Type
+
+import numpy as np
+
+from tensordb.fields import Field, TensorField
+from tensordb.storage.chunks import read_chunked_tensor, write_chunked_tensor
+from tensordb.storage.codecs import decode_tensor, encode_tensor, parallel_map
+from tensordb.storage.native import NATIVE_AVAILABLE, NATIVE_STATISTIC_DTYPES, row_statistics
+from tensordb.storage.segments import SegmentStore
+
+# Columns that store the location of a tensor in the segment store,
+# mapped to their sql type.
+TENSOR_LOCATION_COLUMN_TYPES = {
+    "segment": "INTEGER",
+    "offset": "INTEGER",
+    "stored_nbytes": "INTEGER",
+    "shape": "TEXT",
+}
+
+# Columns with summary statistics of every tensor, computed on insert.
+# They let queries filter on tensors without reading their bytes.
+TENSOR_STATISTIC_COLUMN_TYPES = {
+    "nbytes": "INTEGER",
+    "min": "NUMERIC",
+    "max": "NUMERIC",
+    "mean": "REAL",
+    "norm": "REAL",
+}
+
+TENSOR_COLUMN_TYPES = TENSOR_LOCATION_COLUMN_TYPES | TENSOR_STATISTIC_COLUMN_TYPES
+
+# Column with the hash of every tensor, only for fields with dedup
+TENSOR_HASH_COLUMN_TYPES = {"hash": "TEXT"}
+
+# Kinds of dtypes that statistics are computed for: booleans, integers and floats
+STATISTIC_DTYPE_KINDS = "biuf"
+
+# Largest integer sqlite can store, larger uint64 minima and maxima are stored as floats
+SQLITE_MAX_INTEGER = np.iinfo(np.int64).max
+
+
+def tensor_column_name(field_name: str, attribute: str) -> str:
+    """Get the name of a hidden column that stores an attribute of a tensor field.
+
+    Args:
+        field_name: The name of the tensor field.
+        attribute: The attribute stored in the column, e.g. "segment".
+    """
+    return f"__{field_name}__{attribute}"
+
+
+def tensor_column_field(column_name: str) -> str:
+    """Get the name of the tensor field a hidden column belongs to.
+
+    Args:
+        column_name: The name of the hidden column.
+    """
+    return column_name[2:].rsplit("__", 1)[0]
+
+
+def is_hidden_column(column_name: str) -> bool:
+    """Check if a column is a hidden column that is not exposed as a field.
+
+    Args:
+        column_name: The name of the column.
+    """
+    return column_name.startswith("__")
+
+
+def tensor_column_types(field: TensorField) -> dict[str, str]:
+    """Get the attributes of the hidden columns of a tensor field, mapped to their sql type.
+
+    Args:
+        field: The tensor field.
+    """
+    return TENSOR_COLUMN_TYPES | TENSOR_HASH_COLUMN_TYPES if field.dedup else TENSOR_COLUMN_TYPES
+
+
+def field_columns(field_name: str, field_type: Type | Field) -> list[str]:
+    """Get the table columns that store a field.
+
+    Args:
+        field_name: The name of the field.
+        field_type: The type of the field.
+
+    Returns:
+        columns: The names of the columns, in the order they are stored.
+    """
+    if isinstance(field_type, TensorField):
+        return [tensor_column_name(field_name, attribute) for attribute in tensor_column_types(field_type)]
+
+    return [field_name]
+
+
+def field_select_columns(field_name: str, field_type: Type | Field) -> list[str]:
+    """Get the table columns that are needed to read a field.
+
+    Args:
+        field_name: The name of the field.
+        field_type: The type of the field.
+
+    Returns:
+        columns: The names of the columns, in the order they are selected.
+    """
+    if isinstance(field_type, TensorField):
+        return [tensor_column_name(field_name, attribute) for attribute in TENSOR_LOCATION_COLUMN_TYPES]
+
+    return [field_name]
+
+
+def tensor_statistics(array: np.ndarray) -> tuple[int, Any, Any, float | None, float | None]:
+    """Compute the summary statistics of a tensor.
+
+    Args:
+        array: The tensor.
+
+    Returns:
+        statistics: The values of the statistic columns, in the order of TENSOR_STATISTIC_COLUMN_TYPES.
+            All but nbytes are None for empty tensors and non-numeric dtypes.
+    """
+    if array.size == 0 or array.dtype.kind not in STATISTIC_DTYPE_KINDS:
+        return array.nbytes, None, None, None, None
+
+    values = array.reshape(-1)
+    as_float = values.astype(np.float64, copy=False)
+
+    minimum, maximum = sqlite_extrema([values.min().item(), values.max().item()], array.dtype)
+
+    return (
+        array.nbytes,
+        minimum,
+        maximum,
+        float(as_float.mean()),
+        float(np.sqrt(np.dot(as_float, as_float))),
+    )
+
+
+def tensor_hash(array: np.ndarray, dtype: np.dtype | None = None) -> str:
+    """Hash the dtype, shape and bytes of a tensor.
+
+    Tensors of fields with dedup are stored once per hash. Use this to query for a tensor,
+    e.g. {"mask.$hash": tensor_hash(mask, np.uint8)}.
+
+    Args:
+        array: The tensor.
+        dtype: The dtype of the field the tensor is stored in. If None, the dtype of the tensor.
+
+    Returns:
+        hash: The hash, as a hex string.
+    """
+    array = np.ascontiguousarray(array, dtype=dtype)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}{encode_shape(array.shape)}".encode())
+    digest.update(array.reshape(-1).view(np.uint8))
+
+    return digest.hexdigest()
+
+
+def block_statistics(block: np.ndarray) -> list[list[Any]]:
+    """Compute the summary statistics of every tensor in a block of stacked tensors.
+
+    Args:
+        block: The tensors, stacked along the leading axis.
+
+    Returns:
+        statistics: One list of values per statistic column, in the order of TENSOR_STATISTIC_COLUMN_TYPES.
+    """
+    num_rows = len(block)
+    row_nbytes = block.nbytes // num_rows if num_rows > 0 else 0
+
+    if block[0].size == 0 or block.dtype.kind not in STATISTIC_DTYPE_KINDS:
+        return [[row_nbytes] * num_rows] + [[None] * num_rows] * 4
+
+    rows = block.reshape(num_rows, -1)
+
+    if NATIVE_AVAILABLE and rows.dtype in NATIVE_STATISTIC_DTYPES and rows.flags.c_contiguous:
+        minimum = np.empty(num_rows, dtype=rows.dtype)
+        maximum = np.empty(num_rows, dtype=rows.dtype)
+        mean = np.empty(num_rows, dtype=np.float64)
+        norm = np.empty(num_rows, dtype=np.float64)
+        row_statistics(rows, minimum, maximum, mean, norm)
+        return [
+            [row_nbytes] * num_rows,
+            sqlite_extrema(minimum.tolist(), rows.dtype),
+            sqlite_extrema(maximum.tolist(), rows.dtype),
+            mean.tolist(),
+            norm.tolist(),
+        ]
+
+    as_float = rows.astype(np.float64, copy=False)
+
+    return [
+        [row_nbytes] * num_rows,
+        sqlite_extrema(rows.min(axis=1).tolist(), rows.dtype),
+        sqlite_extrema(rows.max(axis=1).tolist(), rows.dtype),
+        as_float.mean(axis=1).tolist(),
+        np.sqrt(np.einsum("ij,ij->i", as_float, as_float)).tolist(),
+    ]
+
+
+def sqlite_extrema(values: list[Any], dtype: np.dtype) -> list[Any]:
+    """Convert minima or maxima of tensors to values sqlite can store.
+
+    Args:
+        values: The minima or maxima.
+        dtype: The dtype of the tensors.
+
+    Returns:
+        values: The values, with uint64 values above the largest sqlite integer as floats.
+    """
+    if dtype != np.uint64:
+        return values
+
+    return [float(value) if value > SQLITE_MAX_INTEGER else value for value in values]
+
+
+def prepare_tensor(field_name: str, value: Any, field: TensorField) -> np.ndarray:
+    """Validate a value for a tensor field and convert it to a storable array.
+
+    Args:
+        field_name: The name of the field, used for error messages.
+        value: The value to store.
+        field: The tensor field to store the value in.
+
+    Returns:
+        array: A C-contiguous array with the dtype of the field.
+    """
+    array = np.asarray(value)
+
+    if not np.can_cast(array.dtype, field.dtype, casting="same_kind"):
+        raise ValueError(f"Cannot store {array.dtype} data in field {field_name} with dtype {np.dtype(field.dtype)}")
+
+    if not field.matches_shape(array.shape):
+        raise ValueError(f"Shape {array.shape} does not match the shape {field.shape} of field {field_name}")
+
+    return np.ascontiguousarray(array, dtype=field.dtype)
+
+
+def prepare_tensor_block(field_name: str, values: np.ndarray, field: TensorField) -> np.ndarray:
+    """Validate stacked values for a tensor field and convert them to a storable array.
+
+    The leading axis of the block indexes rows, and every row is one tensor.
+
+    Args:
+        field_name: The name of the field, used for error messages.
+        values: The stacked values to store.
+        field: The tensor field to store the values in.
+
+    Returns:
+        block: A C-contiguous array with the dtype of the field.
+    """
+    if not np.can_cast(values.dtype, field.dtype, casting="same_kind"):
+        raise ValueError(f"Cannot store {values.dtype} data in field {field_name} with dtype {np.dtype(field.dtype)}")
+
+    if values.ndim == 0 or not field.matches_shape(values.shape[1:]):
+        raise ValueError(f"Rows of shape {values.shape[1:]} do not match the shape {field.shape} of field {field_name}")
+
+    return np.ascontiguousarray(values, dtype=field.dtype)
+
+
+def encode_shape(shape: tuple[int, ...]) -> str:
+    """Encode a shape to store it in a shape column.
+
+    Shapes are stored as json arrays so that sqlite's json functions can read them.
+
+    Args:
+        shape: The shape to encode.
+    """
+    return json.dumps(shape, separators=(",", ":"))
+
+
+def decode_shape(shape: str) -> tuple[int, ...]:
+    """Decode a shape stored in a shape column.
+
+    Args:
+        shape: The encoded shape.
+    """
+    return tuple(json.loads(shape))
+
+
+def write_tensor(collection_name: str, array: np.ndarray, field: TensorField, store: SegmentStore) -> tuple[Any, ...]:
+    """Encode a tensor with the codec of its field, and append it to the store.
+
+    Args:
+        collection_name: The name of the collection.
+        array: The tensor, as returned by prepare_tensor.
+        field: The tensor field the tensor is stored in.
+        store: The segment store to write the tensor to.
+
+    Returns:
+        location: The values of the location columns, in the order of TENSOR_LOCATION_COLUMN_TYPES.
+    """
+    if field.chunk_rows is not None:
+        return *write_chunked_tensor(collection_name, array, field, store), encode_shape(array.shape)
+
+    data = encode_tensor(array, field.codec)
+    segment, offset = store.append(collection_name, data)
+    return segment, offset, data.nbytes, encode_shape(array.shape)
+
+
+def write_tensor_block(
+    collection_name: str, block: np.ndarray, field: TensorField, store: SegmentStore
+) -> list[Sequence[Any]]:
+    """Encode and store every tensor of a block of stacked tensors.
+
+    Without a codec or chunks, the block is appended in one piece. Otherwise, every
+    tensor is encoded on its own.
+
+    Args:
+        collection_name: The name of the collection.
+        block: The tensors, as returned by prepare_tensor_block.
+        field: The tensor field the tensors are stored in.
+        store: The segment store to write the tensors to.
+
+    Returns:
+        locations: One sequence of values per location column, in the order of TENSOR_LOCATION_COLUMN_TYPES.
+    """
+    num_rows = len(block)
+    shapes = [encode_shape(block.shape[1:])] * num_rows
+
+    if field.chunk_rows is not None:
+        segments, offsets, stored_nbytes = zip(
+            *[write_chunked_tensor(collection_name, array, field, store) for array in block]
+        )
+        return [segments, offsets, stored_nbytes, shapes]
+
+    if field.codec != "none":
+        encoded = parallel_map(lambda array: encode_tensor(array, field.codec), list(block))
+        segments, offsets = zip(*[store.append(collection_name, data) for data in encoded])
+        return [segments, offsets, [data.nbytes for data in encoded], shapes]
+
+    segment, offset = store.append(collection_name, block)
+    row_nbytes = block.nbytes // num_rows
+    offsets = range(offset, offset + num_rows * row_nbytes, row_nbytes) if row_nbytes > 0 else [offset] * num_rows
+
+    return [[segment] * num_rows, offsets, [row_nbytes] * num_rows, shapes]
+
+
+def read_tensors(
+    collection_name: str,
+    field: TensorField,
+    locations: Sequence[Sequence[Any]],
+    store: SegmentStore,
+    index: Any = None,
+    workers: int | None = None,
+) -> list[np.ndarray]:
+    """Read tensors from the store, decompressing them in parallel if their field has a codec.
+
+    Args:
+        collection_name: The name of the collection.
+        field: The tensor field the tensors are stored in.
+        locations: The values of the location columns of every tensor.
+        store: The segment store to read the tensors from.
+        index: A numpy index applied to every tensor, e.g. np.s_[1000:2000]. For chunked
+            fields, only the chunks covering the index are read. None for whole tensors.
+        workers: The number of threads to decompress with, see parallel_map.
+
+    Returns:
+        tensors: The tensors, as read-only arrays. Without a codec, they are views of the store.
+    """
+    if field.chunk_rows is not None:
+        # Chunks are already decoded in parallel
+        return [
+            read_chunked_tensor(collection_name, field, segment, offset, decode_shape(shape), store, index)
+            for segment, offset, _, shape in locations
+        ]
+
+    if field.codec == "none":
+        tensors = [
+            store.read(collection_name, segment, offset, field.dtype, decode_shape(shape))
+            for segment, offset, _, shape in locations
+        ]
+    else:
+
+        def read(location: Sequence[Any]) -> np.ndarray:
+            segment, offset, stored_nbytes, shape = location
+            data = store.read(collection_name, segment, offset, np.uint8, (stored_nbytes,))
+            return decode_tensor(data, field.codec, field.dtype, decode_shape(shape))
+
+        tensors = parallel_map(read, locations, workers)
+
+    return tensors if index is None else [tensor[index] for tensor in tensors]
+
+
+def read_tensors_into(
+    collection_name: str,
+    field: TensorField,
+    segments: np.ndarray,
+    offsets: np.ndarray,
+    stored_nbytes: np.ndarray,
+    out: np.ndarray,
+    store: SegmentStore,
+) -> None:
+    """Copy equally shaped tensors from the store into the rows of an output array.
+
+    Args:
+        collection_name: The name of the collection.
+        field: The tensor field the tensors are stored in.
+        segments: The segment of every tensor.
+        offsets: The byte offset of every tensor inside its segment.
+        stored_nbytes: The number of stored bytes of every tensor.
+        out: The array to fill, with one tensor per entry along the first axis.
+        store: The segment store to read the tensors from.
+    """
+    if field.chunk_rows is not None:
+        for row in range(len(out)):
+            out[row] = read_chunked_tensor(
+                collection_name, field, int(segments[row]), int(offsets[row]), out.shape[1:], store
+            )
+        return
+
+    if field.codec == "none":
+        store.read_into(collection_name, segments, offsets, out)
+        return
+
+    def read(row: int) -> None:
+        data = store.read(collection_name, int(segments[row]), int(offsets[row]), np.uint8, (int(stored_nbytes[row]),))
+        out[row] = decode_tensor(data, field.codec, out.dtype, out.shape[1:])
+
+    parallel_map(read, range(len(out)))
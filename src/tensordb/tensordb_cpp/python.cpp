@@ -1,5 +1,8 @@
+#include "../../../include/_tensordb_cpp/tensors.hpp"
 #include "../../../include/tensordb_cpp/example.hpp"
 #include <nanobind/nanobind.h>
+#include <nanobind/ndarray.h>
+#include <nanobind/stl/string.h>
 
 // NOTE: This sets compile time level. In addition, you need to set the
 // runtime level low enough to show these (e.g. trace for everything)
@@ -7,12 +10,50 @@
 
 #include <fstream>
 #include <spdlog/spdlog.h>
+#include <stdexcept>
+#include <tracy/TracyC.h>
 
 namespace nb = nanobind;
 using namespace nb::literals;
 
 using namespace tensordb;
 
+/**
+ * A Tracy zone opened from Python. Zones must be ended on the thread that began them, in reverse order.
+ */
+struct TracyZone {
+#ifdef TRACY_ENABLE
+  TracyCZoneCtx context;
+#endif
+};
+
+template <typename T> using Rows = nb::ndarray<const T, nb::ndim<2>, nb::c_contig, nb::device::cpu>;
+template <typename T> using Output = nb::ndarray<T, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+using Bytes = nb::ndarray<const uint8_t, nb::ndim<1>, nb::device::cpu>;
+using Indices = nb::ndarray<const int64_t, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+using OutputRows = nb::ndarray<uint8_t, nb::ndim<2>, nb::c_contig, nb::device::cpu>;
+
+template <typename T>
+void bind_row_statistics(nb::module_ &m) {
+  m.def(
+      "row_statistics",
+      [](Rows<T> rows, Output<T> minimum, Output<T> maximum, Output<double> mean, Output<double> norm) {
+        const size_t num_rows = rows.shape(0);
+        if (minimum.shape(0) != num_rows || maximum.shape(0) != num_rows || mean.shape(0) != num_rows ||
+            norm.shape(0) != num_rows) {
+          throw std::invalid_argument("Every output needs one entry per row");
+        }
+        if (rows.shape(1) == 0) {
+          throw std::invalid_argument("Rows can not be empty");
+        }
+
+        row_statistics<T>(rows.data(), num_rows, rows.shape(1), minimum.data(), maximum.data(), mean.data(),
+                          norm.data());
+      },
+      "rows"_a, "minimum"_a, "maximum"_a, "mean"_a, "norm"_a, nb::call_guard<nb::gil_scoped_release>(),
+      "Compute the minimum, maximum, mean and norm of every row into the outputs, without holding the GIL.");
+}
+
 NB_MODULE(tensordb_cpp, m) {
   m.doc() = R"pbdoc(
         Bindings to the cpp code for TensorDB
@@ -22,4 +63,68 @@ NB_MODULE(tensordb_cpp, m) {
   m.def(
       "set_spdlog_level", [](const std::string &level) { spdlog::set_level(spdlog::level::from_str(level)); },
       "Set spd log level. Supported levels are: trace, debug, info, warn, error, critical, off.");
+
+  m.def(
+      "tracy_enabled",
+      []() {
+#ifdef TRACY_ENABLE
+        return true;
+#else
+        return false;
+#endif
+      },
+      "Whether the module was built with TRACY_ENABLE, so that zones are reported to Tracy.");
+
+  nb::class_<TracyZone>(m, "TracyZone");
+
+  m.def(
+      "tracy_zone_begin",
+      [](const std::string &name) {
+        TracyZone zone;
+#ifdef TRACY_ENABLE
+        const char source[] = "python";
+        const uint64_t source_location = ___tracy_alloc_srcloc_name(0, source, sizeof(source) - 1, name.c_str(),
+                                                                    name.size(), name.c_str(), name.size(), 0);
+        zone.context = ___tracy_emit_zone_begin_alloc(source_location, 1);
+#endif
+        return zone;
+      },
+      "name"_a, "Begin a named Tracy zone on the calling thread.");
+
+  m.def(
+      "tracy_zone_end",
+      [](TracyZone &zone) {
+#ifdef TRACY_ENABLE
+        ___tracy_emit_zone_end(zone.context);
+#endif
+      },
+      "zone"_a, "End a Tracy zone begun by tracy_zone_begin.");
+
+  bind_row_statistics<bool>(m);
+  bind_row_statistics<int8_t>(m);
+  bind_row_statistics<int16_t>(m);
+  bind_row_statistics<int32_t>(m);
+  bind_row_statistics<int64_t>(m);
+  bind_row_statistics<uint8_t>(m);
+  bind_row_statistics<uint16_t>(m);
+  bind_row_statistics<uint32_t>(m);
+  bind_row_statistics<uint64_t>(m);
+  bind_row_statistics<float>(m);
+  bind_row_statistics<double>(m);
+
+  m.def(
+      "gather_rows",
+      [](Bytes buffer, Indices offsets, Indices rows, OutputRows out) {
+        if (buffer.stride(0) != 1) {
+          throw std::invalid_argument("The buffer must be contiguous");
+        }
+        if (offsets.shape(0) != rows.shape(0)) {
+          throw std::invalid_argument("Every offset needs an output row");
+        }
+
+        gather_rows(buffer.data(), buffer.shape(0), offsets.data(), rows.data(), offsets.shape(0), out.shape(1),
+                    out.data(), out.shape(0));
+      },
+      "buffer"_a, "offsets"_a, "rows"_a, "out"_a, nb::call_guard<nb::gil_scoped_release>(),
+      "Copy the rows of out from the byte ranges of buffer at offsets, without holding the GIL.");
 }
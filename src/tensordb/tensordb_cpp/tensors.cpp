@@ -0,0 +1,81 @@
+#include "../../../include/_tensordb_cpp/tensors.hpp"
+
+#include <cmath>
+#include <cstring>
+#include <limits>
+#include <stdexcept>
+#include <tracy/Tracy.hpp>
+
+namespace tensordb {
+
+template <typename T>
+void row_statistics(const T *rows, size_t num_rows, size_t row_size, T *minimum, T *maximum, double *mean,
+                    double *norm) {
+  ZoneScopedN("row_statistics");
+
+  for (size_t row = 0; row < num_rows; ++row) {
+    const T *values = rows + row * row_size;
+
+    T row_minimum = values[0];
+    T row_maximum = values[0];
+    double sum = 0.0;
+    double sum_of_squares = 0.0;
+    bool has_nan = false;
+
+    for (size_t i = 0; i < row_size; ++i) {
+      const T value = values[i];
+
+      if (value != value) {
+        has_nan = true;
+      } else if (value < row_minimum) {
+        row_minimum = value;
+      } else if (value > row_maximum) {
+        row_maximum = value;
+      }
+
+      const double as_double = static_cast<double>(value);
+      sum += as_double;
+      sum_of_squares += as_double * as_double;
+    }
+
+    // NaN propagates to the minimum and maximum, like in numpy
+    minimum[row] = has_nan ? std::numeric_limits<T>::quiet_NaN() : row_minimum;
+    maximum[row] = has_nan ? std::numeric_limits<T>::quiet_NaN() : row_maximum;
+    mean[row] = sum / static_cast<double>(row_size);
+    norm[row] = std::sqrt(sum_of_squares);
+  }
+}
+
+void gather_rows(const uint8_t *buffer, size_t buffer_size, const int64_t *offsets, const int64_t *out_rows,
+                 size_t num_rows, size_t row_nbytes, uint8_t *out, size_t out_num_rows) {
+  ZoneScopedN("gather_rows");
+
+  for (size_t i = 0; i < num_rows; ++i) {
+    if (offsets[i] < 0 || static_cast<size_t>(offsets[i]) + row_nbytes > buffer_size) {
+      throw std::out_of_range("Row offset outside of the buffer");
+    }
+    if (out_rows[i] < 0 || static_cast<size_t>(out_rows[i]) >= out_num_rows) {
+      throw std::out_of_range("Output row outside of the output");
+    }
+
+    std::memcpy(out + static_cast<size_t>(out_rows[i]) * row_nbytes, buffer + offsets[i], row_nbytes);
+  }
+}
+
+#define TENSORDB_INSTANTIATE_ROW_STATISTICS(T)                                                                       \
+  template void row_statistics<T>(const T *rows, size_t num_rows, size_t row_size, T *minimum, T *maximum,         \
+                                  double *mean, double *norm);
+
+TENSORDB_INSTANTIATE_ROW_STATISTICS(bool)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(int8_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(int16_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(int32_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(int64_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(uint8_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(uint16_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(uint32_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(uint64_t)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(float)
+TENSORDB_INSTANTIATE_ROW_STATISTICS(double)
+
+} // namespace tensordb
@@ -1,4 +1,7 @@
 import sqlite3
+from typing import Any
+
+import numpy as np
 
 TYPE_TO_SQL_TYPE = {
     int: "INTEGER",
@@ -9,6 +12,21 @@ TYPE_TO_SQL_TYPE = {
 SQL_TYPE_TO_TYPE = {value: key for key, value in TYPE_TO_SQL_TYPE.items()}
 
 
+def to_sql_value(value: Any) -> Any:
+    """Convert a numpy scalar to the equivalent Python value, which sqlite can bind.
+
+    sqlite3 binds numpy scalars through the buffer protocol, as blobs of their raw bytes,
+    so they must be converted before they are stored or compared with stored values.
+
+    Args:
+        value: The value, returned unchanged unless it is a numpy scalar.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
 def get_table_fields(table_name: str, cursor: sqlite3.Cursor) -> dict[str, str]:
     """Get the fields of a table.
 
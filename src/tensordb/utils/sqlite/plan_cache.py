@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class QueryPlanCache:
+    """A least recently used cache of built sql queries.
+
+    Queries whose conditions have the same shape, i.e. the same fields, operators and
+    number of values, only differ in their parameters. Their sql text is built once,
+    and sqlite's own statement cache then reuses the compiled statement.
+    """
+
+    __max_size: int
+    __lock: threading.Lock
+    __plans: OrderedDict[Hashable, Any]
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_size: The maximum number of cached queries.
+        """
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__plans = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Look up a query, and mark it as recently used.
+
+        Args:
+            key: The key of the query.
+
+        Returns:
+            plan: The cached query, or None if it is not cached.
+        """
+        with self.__lock:
+            plan = self.__plans.get(key)
+            if plan is not None:
+                self.__plans.move_to_end(key)
+
+            return plan
+
+    def put(self, key: Hashable, plan: Any) -> None:
+        """Cache a query, evicting the least recently used query if the cache is full.
+
+        Args:
+            key: The key of the query.
+            plan: The query.
+        """
+        with self.__lock:
+            self.__plans[key] = plan
+            self.__plans.move_to_end(key)
+
+            if len(self.__plans) > self.__max_size:
+                self.__plans.popitem(last=False)
+
+    def __len__(self) -> int:
+        """The number of cached queries."""
+        return len(self.__plans)
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from tensordb.config import CONFIG
+
+
+class ConnectionPool:
+    """Connections to a sqlite database that can be shared between threads.
+
+    Every thread reads through its own read-only connection, and all writes go
+    through a single writer connection that is used by one thread at a time.
+    With write-ahead logging, readers see the last committed state and are never
+    blocked by the writer.
+    """
+
+    __path: Path
+    __timeout: float
+    __cached_statements: int
+    __writer: sqlite3.Connection
+    __write_lock: threading.Lock
+    # thread -> reader connection of that thread
+    __readers: dict[threading.Thread, sqlite3.Connection]
+    __readers_lock: threading.Lock
+    __local: threading.local
+    __closed: bool
+
+    def __init__(
+        self,
+        path: Path,
+        journal_mode: str = CONFIG.sqlite.journal_mode,
+        timeout: float = CONFIG.sqlite.busy_timeout,
+        cached_statements: int = CONFIG.sqlite.cached_statements,
+    ) -> None:
+        """Open the writer connection, and set the journal mode of the database.
+
+        Args:
+            path: The path to the sqlite database.
+            journal_mode: The journal mode of the database, "wal" lets readers run concurrently with the writer.
+            timeout: Seconds to wait for a lock on the database before raising.
+            cached_statements: The number of compiled statements every connection keeps.
+        """
+        self.__path = path
+        self.__timeout = timeout
+        self.__cached_statements = cached_statements
+        self.__writer = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, cached_statements=cached_statements
+        )
+        self.__writer.execute(f"pragma journal_mode={journal_mode}")
+        self.__write_lock = threading.Lock()
+        self.__readers = {}
+        self.__readers_lock = threading.Lock()
+        self.__local = threading.local()
+        self.__closed = False
+
+    @property
+    def path(self) -> Path:
+        """The path to the sqlite database."""
+        return self.__path
+
+    def reader(self) -> sqlite3.Connection:
+        """Get the read-only connection of the calling thread, opening it on first use."""
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            return connection
+
+        assert not self.__closed, "The connection pool is closed"
+
+        connection = sqlite3.connect(
+            f"{self.__path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            timeout=self.__timeout,
+            check_same_thread=False,
+            cached_statements=self.__cached_statements,
+        )
+
+        with self.__readers_lock:
+            # Connections of threads that have exited are closed here, since they can not close them themselves
+            for thread in [thread for thread in self.__readers if not thread.is_alive()]:
+                self.__readers.pop(thread).close()
+
+            self.__readers[threading.current_thread()] = connection
+
+        self.__local.connection = connection
+        return connection
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Get exclusive use of the writer connection.
+
+        Yields:
+            connection: The writer connection, which must not be used after the block exits.
+        """
+        assert not self.__closed, "The connection pool is closed"
+
+        with self.__write_lock:
+            yield self.__writer
+
+    def close(self) -> None:
+        """Close all connections of the pool."""
+        with self.__write_lock, self.__readers_lock:
+            self.__closed = True
+
+            for connection in self.__readers.values():
+                connection.close()
+            self.__readers.clear()
+
+            self.__writer.close()
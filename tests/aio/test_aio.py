@@ -0,0 +1,142 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensordb.aio import AsyncDatabase
+from tensordb.fields import TensorField
+
+
+def test_async_insert_and_execute(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path) as db:
+            collection = await db.collection("test", fields={"value": int, "tensor": TensorField(np.int64, (2,))})
+
+            await collection.insert([{"value": i, "tensor": np.array([i, i])} for i in range(10)])
+            num_rows = await collection.insert_columns({"value": [10, 11], "tensor": np.ones((2, 2), dtype=np.int64)})
+
+            rows = await collection.find({"value": {"$lt": 3}}).execute()
+            columns = await collection.find().select(["value"]).to_numpy()
+
+            assert num_rows == 2
+            assert [row["value"] for row in rows] == [0, 1, 2]
+            np.testing.assert_array_equal(rows[2]["tensor"], [2, 2])
+            np.testing.assert_array_equal(columns["value"], np.arange(12))
+            assert await db.collections() == ["test"]
+
+    asyncio.run(main())
+
+
+def test_async_iteration(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path) as db:
+            collection = await db.collection("test", fields={"value": int})
+            await collection.insert_columns({"value": list(range(25))})
+
+            values = [row["value"] async for row in collection.find()]
+            batches = [batch async for batch in collection.find().iter_batches(10)]
+
+            async for row in collection.find():
+                if row["value"] == 3:
+                    break
+
+            assert values == list(range(25))
+            assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    asyncio.run(main())
+
+
+def test_async_concurrent_queries(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path, max_workers=4) as db:
+            collection = await db.collection("test", fields={"value": int})
+
+            async def insert(start: int) -> None:
+                await collection.insert_columns({"value": list(range(start, start + 10))})
+
+            async def count() -> int:
+                return len(await collection.find().execute())
+
+            results = await asyncio.gather(
+                *[insert(start) for start in range(0, 100, 10)], *[count() for _ in range(10)]
+            )
+
+            assert all(num_rows % 10 == 0 for num_rows in results[10:])
+            assert await count() == 100
+
+    asyncio.run(main())
+
+
+def test_async_aggregates(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path) as db:
+            collection = await db.collection("test", fields={"value": int, "tensor": TensorField(np.float64, (3,))})
+            await collection.insert([{"value": i, "tensor": np.full(3, i, dtype=np.float64)} for i in range(4)])
+
+            result = await collection.find().aggregate({"value": "sum", "tensor": "mean"})
+
+            assert await collection.find({"value": {"$gt": 0}}).count() == 3
+            assert result["value"] == 6
+            np.testing.assert_array_equal(result["tensor"], np.full(3, 1.5))
+
+    asyncio.run(main())
+
+
+def test_async_pages(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path) as db:
+            collection = await db.collection("test", fields={"value": int})
+            await collection.insert_columns({"value": list(range(25))})
+
+            query = collection.find().order_by("value", descending=True).limit(10)
+            first = await query.page()
+            second = await query.page(after=first.next)
+
+            assert [row["value"] for row in first.rows] == list(range(24, 14, -1))
+            assert [row["value"] for row in second.rows] == list(range(14, 4, -1))
+            assert (await query.page(after=second.next)).next is None
+
+    asyncio.run(main())
+
+
+def test_async_writer_and_stats(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path, cache_bytes=1 << 20) as db:
+            collection = await db.collection("test", fields={"value": int, "tensor": TensorField(np.int64, (2,))})
+
+            async with await collection.writer(max_rows=8, max_latency_ms=10) as writer:
+                await asyncio.gather(*[writer.write({"value": i, "tensor": np.array([i, i])}) for i in range(20)])
+                await writer.flush()
+                assert len(await collection.find().execute()) == 20
+
+                with pytest.raises(ValueError):
+                    await writer.write({"value": 20, "tensor": np.zeros(3)})
+
+            await collection.find().execute()
+            assert db.stats()["sql.execute"].count > 0
+            assert db.cache_stats().hits > 0
+
+            db.reset_stats()
+            assert db.stats() == {}
+            assert db.cache_stats().hits == 0
+
+    asyncio.run(main())
+
+
+def test_async_export_and_import(tmp_path: Path) -> None:  # noqa: D103
+    async def main() -> None:
+        async with await AsyncDatabase.open("test_db", tmp_path) as db:
+            collection = await db.collection("test", fields={"value": int, "tensor": TensorField(np.float32, (3,))})
+            tensors = np.random.default_rng(0).random((10, 3), dtype=np.float32)
+            await collection.insert_columns({"value": list(range(10)), "tensor": tensors})
+
+            assert await collection.export(tmp_path / "export") == 10
+
+            imported = await db.import_collection(tmp_path / "export", name="copy")
+            columns = await imported.find().to_numpy()
+
+            assert imported.name == "copy"
+            np.testing.assert_array_equal(columns["value"], np.arange(10))
+            np.testing.assert_array_equal(columns["tensor"], tensors)
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+from tensordb import Database
+from tensordb.catalog import Catalog
+from tensordb.fields import TensorField
+
+
+def test_catalog_preserves_field_order(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    fields = {"a": int, "tensor": TensorField(dtype=np.float32, shape=(None, 3)), "b": str}
+    db.collection("test", fields=fields)
+
+    catalog = Catalog()
+    connection = sqlite3.connect(db.location / "db.db")
+
+    assert list(catalog.fields("test", connection.cursor()).items()) == [("id", int), *fields.items()]
+
+
+def test_catalog_invalidation(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    db.collection("first", fields={"a": int})
+
+    # A second handle to the same database changes the schema behind the back of the first.
+    Database("test_db", tmp_path).collection("second", fields={"b": float})
+
+    assert set(db.collections()) == {"first", "second"}
+    assert db.collection("second").fields == {"id": int, "b": float}
+
+
+def test_lookups_use_cached_catalog(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"a": int, "tensor": TensorField(dtype=np.float32, shape=(2,))})
+    coll.insert({"a": 1, "tensor": np.zeros(2)})
+
+    statements = []
+    connection = sqlite3.connect(db.location / "db.db")
+    catalog = Catalog()
+    catalog.refresh(connection.cursor())
+
+    connection.set_trace_callback(statements.append)
+    for _ in range(3):
+        catalog.fields("test", connection.cursor())
+
+    assert len(statements) == 3, "Every lookup should only check the schema version"
+    assert all("__metadata__" in statement for statement in statements)
+
+
+def test_tensor_field_of_any_shape(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"tensor": TensorField(dtype=np.float32, shape=None)})
+
+    tensors = [np.zeros(3, dtype=np.float32), np.ones((2, 2), dtype=np.float32)]
+    coll.insert([{"tensor": tensor} for tensor in tensors])
+
+    assert coll.fields["tensor"].shape is None
+    for row, tensor in zip(coll.find().execute(), tensors):
+        np.testing.assert_array_equal(row["tensor"], tensor)
+
+    db.close()
+    assert Database("test_db", tmp_path).collection("test").fields["tensor"].shape is None
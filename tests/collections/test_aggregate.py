@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensordb import Database
+from tensordb.collections.query.aggregate import TensorAccumulator
+from tensordb.fields import TensorField
+
+
+@pytest.fixture
+def data(tmp_path: Path) -> tuple[Database, dict]:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection(
+        "test", fields={"label": int, "score": float, "image": TensorField(np.float32, (4, 5), codec="zlib")}
+    )
+
+    rng = np.random.default_rng(0)
+    columns = {
+        "label": (np.arange(50) % 3).tolist(),
+        "score": rng.random(50).tolist(),
+        "image": rng.random((50, 4, 5), dtype=np.float32),
+    }
+    coll.insert_columns(columns)
+
+    return db, columns
+
+
+def test_count(data: tuple[Database, dict]) -> None:  # noqa: D103
+    db, columns = data
+    coll = db.collection("test")
+
+    assert coll.find().count() == 50
+    assert coll.find({"label": 1}).count() == columns["label"].count(1)
+    assert coll.find({"score": {"$gt": 2}}).count() == 0
+
+
+def test_scalar_aggregates(data: tuple[Database, dict]) -> None:  # noqa: D103
+    db, columns = data
+    scores = np.array(columns["score"])
+
+    result = db.collection("test").find().aggregate({"score": ["count", "sum", "mean", "min", "max", "std"]})
+    assert result["score"]["count"] == 50
+    assert result["score"]["sum"] == pytest.approx(scores.sum())
+    assert result["score"]["mean"] == pytest.approx(scores.mean())
+    assert result["score"]["min"] == scores.min()
+    assert result["score"]["max"] == scores.max()
+    assert result["score"]["std"] == pytest.approx(scores.std())
+
+    result = db.collection("test").find({"label": 2}).aggregate({"score": "mean", "image.$max": "max"})
+    assert result["score"] == pytest.approx(scores[2::3].mean())
+    assert result["image.$max"] == pytest.approx(columns["image"][2::3].max())
+
+
+def test_std_of_large_values(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"label": int, "x": float})
+
+    x = 1e9 + np.arange(1000) % 3
+    labels = np.arange(1000) % 2
+    coll.insert_columns({"label": labels.tolist(), "x": x.tolist()})
+
+    result = coll.find().aggregate({"x": ["std", "mean"]})
+    assert result["x"]["std"] == pytest.approx(np.std(x), rel=1e-9)
+    assert result["x"]["mean"] == pytest.approx(np.mean(x), rel=1e-12)
+
+    for group in coll.find().aggregate({"x": "std"}, group_by="label"):
+        assert group["x"] == pytest.approx(np.std(x[labels == group["label"]]), rel=1e-9)
+
+
+def test_tensor_aggregates(data: tuple[Database, dict], monkeypatch: pytest.MonkeyPatch) -> None:  # noqa: D103
+    db, columns = data
+    images = columns["image"]
+
+    # Several batches per group
+    monkeypatch.setattr("tensordb.collections.query.aggregate.AGGREGATE_BATCH_SIZE", 7)
+
+    result = db.collection("test").find().aggregate({"image": ["mean", "sum", "min", "max", "std", "count"]})
+    np.testing.assert_allclose(result["image"]["mean"], images.mean(axis=0, dtype=np.float64))
+    np.testing.assert_allclose(result["image"]["sum"], images.sum(axis=0, dtype=np.float64))
+    np.testing.assert_array_equal(result["image"]["min"], images.min(axis=0))
+    np.testing.assert_array_equal(result["image"]["max"], images.max(axis=0))
+    np.testing.assert_allclose(result["image"]["std"], images.std(axis=0, dtype=np.float64))
+    assert result["image"]["count"] == 50
+
+    groups = db.collection("test").find({"label": {"$ne": 0}}).aggregate({"image": "mean", "score": "max"}, "label")
+    assert [group["label"] for group in groups] == [1, 2]
+    for group in groups:
+        label = group["label"]
+        np.testing.assert_allclose(group["image"], images[label::3].mean(axis=0, dtype=np.float64), rtol=1e-6)
+        assert group["score"] == max(columns["score"][label::3])
+
+
+def test_integer_tensor_sums(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"big": TensorField(np.int64, (2,)), "unsigned": TensorField(np.uint64, (2,))})
+
+    big = np.array([[2**62, -(2**62)]] * 4, dtype=np.int64)
+    unsigned = np.array([[2**63, 1]] * 4, dtype=np.uint64)
+    coll.insert_columns({"big": big, "unsigned": unsigned})
+
+    result = coll.find().aggregate({"big": "sum", "unsigned": "sum"})
+    np.testing.assert_array_equal(result["big"], [4.0 * 2**62, -4.0 * 2**62])
+    np.testing.assert_array_equal(result["unsigned"], [4.0 * 2**63, 4.0])
+    assert result["big"].dtype == np.float64
+
+
+def test_empty_aggregates(data: tuple[Database, dict]) -> None:  # noqa: D103
+    db, _ = data
+    query = db.collection("test").find({"label": 5})
+
+    assert query.aggregate({"image": "mean", "score": ["sum", "count"]}) == {
+        "image": None,
+        "score": {"sum": None, "count": 0},
+    }
+    assert query.aggregate({"image": "mean"}, group_by="label") == []
+
+
+def test_invalid_aggregates(data: tuple[Database, dict]) -> None:  # noqa: D103
+    db, _ = data
+
+    with pytest.raises(ValueError):
+        db.collection("test").find().aggregate({"score": "median"})
+
+    accumulator = TensorAccumulator("image")
+    accumulator.update([np.zeros(3)])
+    with pytest.raises(ValueError):
+        accumulator.update([np.zeros(4)])
@@ -1,5 +1,9 @@
+import sqlite3
+import threading
+import time
 from pathlib import Path
 
+import numpy as np
 import pytest
 from tensordb import Database
 from tensordb.fields import TensorField
@@ -42,3 +46,283 @@ def test_insert_basic_types(tmp_path: Path) -> None:  # noqa: D103
     collection.insert({"field1": 1, "field2": "test"})
 
     collection.insert([{"field1": 2, "field2": "test2"}, {"field1": 3, "field2": "test3"}])
+
+
+def test_insert_columns(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    collection = db.collection(
+        "test",
+        fields={"name": str, "number": int, "tensor": TensorField(dtype=np.float32, shape=(2, 3))},
+    )
+
+    num_rows = 5
+    tensors = np.random.rand(num_rows, 2, 3).astype(np.float32)
+
+    inserted = collection.insert_columns(
+        {"name": [f"test{i}" for i in range(num_rows)], "number": np.arange(num_rows), "tensor": tensors}
+    )
+    assert inserted == num_rows
+
+    collection.insert_columns({"name": ["list"], "number": [num_rows], "tensor": [tensors[0]]})
+
+    result = collection.find().execute()
+    assert len(result) == num_rows + 1
+
+    for i, row in enumerate(result[:num_rows]):
+        assert row["name"] == f"test{i}"
+        assert row["number"] == i
+        np.testing.assert_array_equal(row["tensor"], tensors[i])
+
+    np.testing.assert_array_equal(result[-1]["tensor"], tensors[0])
+
+    with pytest.raises(ValueError):
+        collection.insert_columns({"name": ["a", "b"], "number": [1], "tensor": tensors[:2]})
+
+
+def test_insert_is_atomic(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    collection = db.collection("test", fields={"tensor": TensorField(dtype=np.float32, shape=(3,))})
+
+    with pytest.raises(ValueError):
+        collection.insert([{"tensor": np.zeros(3)}, {"tensor": np.zeros(4)}])
+
+    assert collection.find().execute() == [], "A failed insert should not insert any rows"
+
+
+def test_buffered_writer(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"value": int, "tensor": TensorField(dtype=np.int64, shape=(2,))})
+
+    num_threads = 4
+    rows_per_thread = 100
+
+    with collection.writer(max_rows=32, max_latency_ms=10) as writer:
+
+        def produce(start: int) -> None:
+            for value in range(start, start + rows_per_thread):
+                writer.write({"value": value, "tensor": np.array([value, -value])})
+
+        threads = [threading.Thread(target=produce, args=(i * rows_per_thread,)) for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        writer.flush()
+        assert len(collection.find().execute()) == num_threads * rows_per_thread
+
+        writer.write({"value": -1, "tensor": np.zeros(2, dtype=np.int64)})
+
+    rows = collection.find().execute()
+    assert sorted(row["value"] for row in rows) == list(range(-1, num_threads * rows_per_thread))
+    assert all(np.all(row["tensor"] == [row["value"], -row["value"]]) for row in rows if row["value"] >= 0)
+
+
+def test_buffered_writer_latency(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"value": int})
+
+    with collection.writer(max_rows=1000, max_latency_ms=10) as writer:
+        writer.write({"value": 1})
+
+        deadline = time.monotonic() + 5
+        while len(collection.find().execute()) == 0:
+            assert time.monotonic() < deadline, "The row was not committed after max_latency_ms"
+            time.sleep(0.01)
+
+
+def test_buffered_writer_error(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"tensor": TensorField(dtype=np.int64, shape=(2,))})
+
+    writer = collection.writer()
+
+    # Invalid rows fail on the thread that writes them
+    with pytest.raises(ValueError):
+        writer.write({"tensor": np.zeros(3)})
+    with pytest.raises(ValueError):
+        writer.write({"other": np.zeros(2)})
+
+    writer.write({"tensor": np.zeros(2, dtype=np.int64)})
+    writer.close()
+
+    assert len(collection.find().execute()) == 1
+
+
+def test_buffered_writer_bad_producer(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"value": int, "name": str})
+    collection.create_index("value", unique=True)
+
+    errors = []
+
+    with collection.writer(max_rows=64, max_latency_ms=50) as writer:
+
+        def produce(start: int, bad: bool) -> None:
+            for value in range(start, start + 100):
+                try:
+                    writer.write({"value": value, "name": 1 if bad and value % 10 == 0 else "name"})
+                except TypeError as error:
+                    errors.append(error)
+
+        threads = [threading.Thread(target=produce, args=(i * 100, i == 1)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        writer.flush()
+
+        # A row that only fails when it is inserted does not discard the rest of its group
+        writer.write([{"value": 0, "name": "duplicate"}, {"value": 1000, "name": "name"}])
+        with pytest.raises(sqlite3.IntegrityError):
+            writer.flush()
+
+    assert len(errors) == 10
+    values = sorted(row["value"] for row in collection.find().execute())
+    assert values == [value for value in range(200) if value < 100 or value % 10 != 0] + [1000]
+
+
+def test_numpy_scalars(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"n": int, "f": float})
+
+    with collection.writer() as writer:
+        writer.write({"n": np.int64(7), "f": np.float32(0.5)})
+    collection.insert([{"n": np.uint8(8), "f": np.float64(1.5)}])
+    collection.insert_columns({"n": list(np.arange(9, 11)), "f": [np.float16(2.5), np.int32(3)]})
+    collection.update({"n": 10}, {"f": np.float32(4.5)})
+
+    rows = collection.find().execute()
+    assert [(row["n"], row["f"]) for row in rows] == [(7, 0.5), (8, 1.5), (9, 2.5), (10, 4.5)]
+    assert not any(isinstance(value, (bytes, np.generic)) for row in rows for value in row.values())
+    np.testing.assert_array_equal(collection.find().to_numpy()["n"], [7, 8, 9, 10])
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma", "shuffle+zlib", "delta+zlib"])
+def test_codecs(tmp_path: Path, codec: str) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    fields = {
+        "number": int,
+        "depth": TensorField(np.float32, (16, 16), codec=codec),
+        "labels": TensorField(np.int64, (None,), codec=codec),
+    }
+    collection = db.collection("test", fields=fields)
+
+    depth = np.cumsum(np.ones((8, 16, 16), dtype=np.float32), axis=2)
+    labels = [np.full((i + 1,), i, dtype=np.int64) for i in range(8)]
+
+    collection.insert([{"number": i, "depth": depth[i], "labels": labels[i]} for i in range(4)])
+    collection.insert_columns({"number": np.arange(4, 8), "depth": depth[4:], "labels": labels[4:]})
+
+    rows = collection.find().execute()
+    assert [row["number"] for row in rows] == list(range(8))
+    for i, row in enumerate(rows):
+        np.testing.assert_array_equal(row["depth"], depth[i])
+        np.testing.assert_array_equal(row["labels"], labels[i])
+
+    np.testing.assert_array_equal(collection.find().select(["depth"]).to_numpy()["depth"], depth)
+
+    columns = collection.find().to_columns()
+    np.testing.assert_array_equal(columns["depth"], depth)
+    for recovered, expected in zip(columns["labels"], labels):
+        np.testing.assert_array_equal(recovered, expected)
+
+    batches = list(collection.find().iter_batches(3))
+    np.testing.assert_array_equal(np.stack([row["depth"] for batch in batches for row in batch]), depth)
+
+    db.close()
+    collection = Database("test_db", tmp_path).collection("test")
+    assert collection.fields["depth"].codec == codec, "The codec should be persisted"
+    np.testing.assert_array_equal(collection.find({"number": 5}).execute()[0]["depth"], depth[5])
+
+
+def test_invalid_codec(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    with pytest.raises(ValueError):
+        db.collection("test", fields={"tensor": TensorField(np.float32, (4,), codec="gzip")})
+
+    with pytest.raises(ValueError):
+        db.collection("test", fields={"tensor": TensorField(np.complex128, (4,), codec="delta+zlib")})
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_chunked_slices(tmp_path: Path, codec: str) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    fields = {"number": int, "series": TensorField(np.float64, (None, 3), codec=codec, chunk_rows=100)}
+    collection = db.collection("test", fields=fields)
+
+    series = [np.arange(length * 3, dtype=np.float64).reshape(length, 3) for length in (1050, 250, 0)]
+    collection.insert([{"number": i, "series": tensor} for i, tensor in enumerate(series)])
+
+    rows = collection.find().execute()
+    for row, tensor in zip(rows, series):
+        np.testing.assert_array_equal(row["series"], tensor)
+
+    rows = collection.find().select({"number": None, "series": np.s_[120:230]}).execute()
+    assert [row["number"] for row in rows] == [0, 1, 2]
+    for row, tensor in zip(rows, series):
+        np.testing.assert_array_equal(row["series"], tensor[120:230])
+
+    rows = collection.find({"number": 0}).select({"series": np.s_[-10::3, 2]}).execute()
+    np.testing.assert_array_equal(rows[0]["series"], series[0][-10::3, 2])
+
+    columns = collection.find({"number": {"$lt": 2}}).select({"series": np.s_[:200]}).to_numpy()
+    np.testing.assert_array_equal(columns["series"], np.stack([tensor[:200] for tensor in series[:2]]))
+
+    collection = Database("test_db", tmp_path).collection("test")
+    assert collection.fields["series"].chunk_rows == 100, "chunk_rows should be persisted"
+
+
+def test_fixed_shape_slices(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    fields = {"image": TensorField(np.uint8, (8, 8)), "chunked": TensorField(np.uint8, (8, 8), chunk_rows=3)}
+    collection = db.collection("test", fields=fields)
+
+    images = np.arange(4 * 64, dtype=np.uint8).reshape(4, 8, 8)
+    collection.insert_columns({"image": images, "chunked": images})
+
+    columns = collection.find().to_numpy()
+    np.testing.assert_array_equal(columns["chunked"], images)
+
+    columns = collection.find().select({"image": np.s_[2:4, ::2], "chunked": np.s_[5]}).to_columns()
+    np.testing.assert_array_equal(columns["image"], images[:, 2:4, ::2])
+    np.testing.assert_array_equal(columns["chunked"], images[:, 5])
+
+    columns = collection.find({"id": -1}).select({"image": np.s_[2:4]}).to_numpy()
+    assert columns["image"].shape == (0, 2, 8)
+
+    with pytest.raises(ValueError):
+        db.collection("bad", fields={"scalar": TensorField(np.float32, (), chunk_rows=10)})
+
+
+def test_update_and_delete(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"name": str, "tensor": TensorField(np.float32, (3,))})
+    collection.insert([{"name": f"row{i}", "tensor": np.full(3, i, dtype=np.float32)} for i in range(5)])
+
+    assert collection.update({"name": {"$in": ["row1", "row3"]}}, {"tensor": np.ones(3), "name": "updated"}) == 2
+
+    rows = collection.find({"name": "updated"}).execute()
+    assert [row["id"] for row in rows] == [2, 4]
+    for row in rows:
+        np.testing.assert_array_equal(row["tensor"], np.ones(3))
+
+    assert [row["id"] for row in collection.find({"tensor.$max": 1.0}).execute()] == [2, 4], "Statistics are updated"
+
+    assert collection.delete({"name": "updated"}) == 2
+    assert [row["name"] for row in collection.find().execute()] == ["row0", "row2", "row4"]
+
+    assert collection.delete({"name": "missing"}) == 0
+
+    with pytest.raises(ValueError):
+        collection.update({}, {"id": 3})
+
+    with pytest.raises(ValueError):
+        collection.update({}, {"tensor": np.ones(4)})
+
+    assert collection.delete({}) == 3
+    assert collection.find().execute() == []
@@ -0,0 +1,81 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensordb import Database
+from tensordb.fields import TensorField
+from tensordb.storage import tensor_hash
+
+
+def stored_bytes(db: Database, collection_name: str) -> int:
+    """Get the size of all segments of a collection."""
+    return sum(path.stat().st_size for path in (db.location / "tensors" / collection_name).iterdir())
+
+
+def refcounts(db: Database) -> dict[str, int]:
+    """Get the reference count of every payload."""
+    connection = sqlite3.connect(db.location / "db.db")
+    try:
+        return dict(connection.execute("select hash, refcount from __tensor_payloads__").fetchall())
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        TensorField(np.float32, (64, 64), dedup=True),
+        TensorField(np.float32, (None, 64), codec="zlib", dedup=True),
+        TensorField(np.float32, (None, 64), chunk_rows=16, dedup=True),
+    ],
+)
+def test_dedup(tmp_path: Path, field: TensorField) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "mask": field})
+
+    masks = np.random.default_rng(0).random((3, 64, 64), dtype=np.float32)
+    coll.insert([{"number": i, "mask": masks[i % 3]} for i in range(30)])
+    coll.insert_columns({"number": list(range(30, 60)), "mask": masks[np.arange(30) % 3]})
+
+    hashes = [tensor_hash(mask) for mask in masks]
+    assert refcounts(db) == {mask_hash: 20 for mask_hash in hashes}
+    assert stored_bytes(db, "test") < 4 * masks.nbytes
+
+    rows = coll.find().execute()
+    for row in rows:
+        np.testing.assert_array_equal(row["mask"], masks[row["number"] % 3])
+
+    numbers = [row["number"] for row in coll.find({"mask.$hash": hashes[1]}).select(["number"])]
+    assert numbers == [i for i in range(60) if i % 3 == 1]
+
+    # Hashes are computed with the dtype of the field
+    assert tensor_hash(masks[1].astype(np.float64), np.float32) == hashes[1]
+    assert tensor_hash(masks[1].astype(np.float64)) != hashes[1]
+
+    assert coll.delete({"number": {"$lt": 10}}) == 10
+    assert refcounts(db) == {hashes[0]: 16, hashes[1]: 17, hashes[2]: 17}
+
+    new_mask = np.ones((64, 64), dtype=np.float32)
+    assert coll.update({"mask.$hash": hashes[2]}, {"mask": new_mask}) == 17
+    assert refcounts(db) == {hashes[0]: 16, hashes[1]: 17, hashes[2]: 0, tensor_hash(new_mask): 17}
+
+    # Payloads without references are reused
+    size = stored_bytes(db, "test")
+    coll.insert({"number": 100, "mask": masks[2]})
+    assert stored_bytes(db, "test") == size
+    assert refcounts(db)[hashes[2]] == 1
+
+    np.testing.assert_array_equal(coll.find({"number": 100}).execute()[0]["mask"], masks[2])
+    np.testing.assert_array_equal(coll.find({"mask.$hash": tensor_hash(new_mask)}).execute()[0]["mask"], new_mask)
+
+
+def test_hash_without_dedup(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"tensor": TensorField(np.float32, (3,))})
+    coll.insert({"tensor": np.zeros(3, dtype=np.float32)})
+
+    with pytest.raises(ValueError):
+        coll.find({"tensor.$hash": tensor_hash(np.zeros(3, dtype=np.float32))}).execute()
+
+    assert coll.fields["tensor"].dedup is False
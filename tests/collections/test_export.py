@@ -0,0 +1,135 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensordb import Database
+from tensordb.fields import TensorField
+
+
+def test_export_and_import(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    fields = {
+        "number": int,
+        "score": float,
+        "name": str,
+        "image": TensorField(np.float32, (4, 5), codec="zlib"),
+        "vector": TensorField(np.float32, (8,)),
+        "series": TensorField(np.int64, (None,), chunk_rows=4),
+        "matrix": TensorField(np.float64, (None, None)),
+        "anything": TensorField(np.int32, None),
+    }
+    coll = db.collection("test", fields=fields)
+
+    num_rows = 30
+    rng = np.random.default_rng(0)
+    columns = {
+        "number": list(range(num_rows)),
+        "score": rng.random(num_rows).tolist(),
+        "name": [f"name{i}" * (i % 3) for i in range(num_rows)],
+        "image": rng.random((num_rows, 4, 5), dtype=np.float32),
+        "vector": rng.random((num_rows, 8), dtype=np.float32),
+        "series": [np.arange(i) for i in range(num_rows)],
+        "matrix": [np.full((i % 3, i % 4), i, dtype=np.float64) for i in range(num_rows)],
+        "anything": [np.full((2,) * (i % 3), i, dtype=np.int32) for i in range(num_rows)],
+    }
+    coll.insert_columns(columns)
+    coll.delete({"number": 3})
+    coll.create_index("name", unique=False)
+    coll.create_vector_index("vector", n_lists=4)
+
+    assert coll.export(tmp_path / "export") == num_rows - 1
+
+    image = np.load(tmp_path / "export" / "image.npy", mmap_mode="r")
+    assert image.shape == (num_rows - 1, 4, 5)
+    np.testing.assert_array_equal(image[3], columns["image"][4])
+
+    with pytest.raises(FileExistsError):
+        coll.export(tmp_path / "export")
+
+    other = Database("other_db", tmp_path)
+    imported = other.import_collection(tmp_path / "export")
+    assert imported.name == "test"
+    assert imported.fields == coll.fields
+    assert [index.fields for index in imported.list_indexes()] == [("name",)]
+
+    expected = coll.find().execute()
+    rows = imported.find().execute()
+    assert len(rows) == num_rows - 1
+
+    for row, expected_row in zip(rows, expected):
+        assert row.keys() == expected_row.keys()
+        for field in fields:
+            np.testing.assert_array_equal(row[field], expected_row[field])
+            assert np.asarray(row[field]).dtype == np.asarray(expected_row[field]).dtype
+
+    neighbors = imported.nearest("vector", columns["vector"][7], k=1, n_probe=4)
+    assert neighbors[0][0]["number"] == 7
+
+    # Importing again needs a new name
+    with pytest.raises(ValueError):
+        other.import_collection(tmp_path / "export")
+
+    copy = other.import_collection(tmp_path / "export", name="copy")
+    assert copy.find({"number": 29}).execute()[0]["series"].tolist() == list(range(29))
+
+
+def test_export_empty(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"name": str, "tensor": TensorField(np.float32, (None, 3))})
+
+    assert coll.export(tmp_path / "export") == 0
+
+    imported = db.import_collection(tmp_path / "export", name="copy")
+    assert imported.find().execute() == []
+    assert imported.fields == coll.fields
+
+
+def test_export_missing_values(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "score": float, "name": str})
+    coll.insert(
+        [
+            {"number": 2**62 + 1, "score": None, "name": None},
+            {"number": None, "score": 0.5, "name": ""},
+            {"number": 0, "score": 0.0, "name": "name"},
+        ]
+    )
+
+    coll.export(tmp_path / "export")
+    np.testing.assert_array_equal(np.load(tmp_path / "export" / "number.missing.npy"), [False, True, False])
+
+    imported = db.import_collection(tmp_path / "export", name="copy")
+    assert [(row["number"], row["score"], row["name"]) for row in imported.find().execute()] == [
+        (2**62 + 1, None, None),
+        (None, 0.5, ""),
+        (0, 0.0, "name"),
+    ]
+
+
+def test_failed_import(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "vector": TensorField(np.float32, (4,))})
+    coll.insert_columns({"number": [1, 1, 2], "vector": np.ones((3, 4), dtype=np.float32)})
+    coll.create_index("number", unique=False)
+    coll.create_vector_index("vector", n_lists=2)
+    coll.export(tmp_path / "export")
+
+    # The data violates the unique index, which is only built after the rows are inserted
+    manifest_path = tmp_path / "export" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest["indexes"][0]["unique"] = True
+    manifest_path.write_text(json.dumps(manifest))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.import_collection(tmp_path / "export", name="copy")
+    assert "copy" not in db.collections()
+
+    manifest["indexes"][0]["unique"] = False
+    manifest_path.write_text(json.dumps(manifest))
+
+    copy = db.import_collection(tmp_path / "export", name="copy")
+    assert [row["number"] for row in copy.find().execute()] == [1, 1, 2]
+    assert [index.fields for index in copy.list_indexes()] == [("number",)]
+    assert len(copy.nearest("vector", np.ones(4, dtype=np.float32), k=3, n_probe=2)) == 3
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensordb import Database
+from tensordb.fields import TensorField
+
+
+def test_create_and_drop_index(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"name": str, "number": int, "tensor": TensorField(np.float32, (3,))})
+    coll.insert_columns(
+        {"name": [f"test{i}" for i in range(100)], "number": list(range(100)), "tensor": np.zeros((100, 3))}
+    )
+
+    assert not any("USING INDEX" in step for step in coll.find({"name": "test5"}).explain())
+
+    name = coll.create_index("name")
+    assert [index.name for index in coll.list_indexes()] == [name]
+    assert coll.list_indexes()[0].fields == ("name",)
+
+    plan = coll.find({"name": "test5"}).explain()
+    assert any(f"USING INDEX {name}" in step for step in plan), plan
+    assert [row["number"] for row in coll.find({"name": "test5"})] == [5]
+
+    # The index is visible to other handles of the database
+    assert [index.name for index in Database("test_db", tmp_path).collection("test").list_indexes()] == [name]
+
+    with pytest.raises(ValueError):
+        coll.create_index("name")
+
+    with pytest.raises(ValueError):
+        coll.create_index("tensor")
+
+    coll.drop_index(name)
+    assert coll.list_indexes() == []
+    assert not any("USING INDEX" in step for step in coll.find({"name": "test5"}).explain())
+
+
+def test_unique_index(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"a": int, "b": str})
+    coll.insert([{"a": 1, "b": "x"}, {"a": 1, "b": "y"}])
+
+    name = coll.create_index(["a", "b"], unique=True)
+    assert coll.list_indexes()[0].unique
+
+    with pytest.raises(Exception):
+        coll.insert({"a": 1, "b": "x"})
+
+    coll.drop_index(name)
+
+    # Creating a unique index over duplicate values fails, and leaves no trace in the catalog
+    with pytest.raises(Exception):
+        coll.create_index("a", unique=True)
+
+    assert coll.list_indexes() == []
+
+
+def test_index_names(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"v_max": float, "v": TensorField(np.float32, (3,)), "v_1": int, "a": int})
+    coll.insert({"v_max": 1.0, "v": np.arange(3, dtype=np.float32), "v_1": 1, "a": 1})
+
+    # Fields that only differ in characters that are not valid in sql names get different indexes
+    indexes = [["v.$max"], ["v_max"], ["v.$shape.0"], ["v_1"], ["a", "v_1"], ["v_1", "a"]]
+    names = [coll.create_index(fields) for fields in indexes]
+
+    assert len(set(names)) == len(indexes)
+    assert [list(index.fields) for index in coll.list_indexes()] == indexes
+    assert [row["a"] for row in coll.find({"v_max": 1.0})] == [1]
+
+    # Index names are shared by all collections
+    other = db.collection("test__v_1", fields={"a": int})
+    assert other.create_index("a") not in names
@@ -1,6 +1,13 @@
 from pathlib import Path
 
+import numpy as np
+import pytest
 from tensordb import Database
+from tensordb.backend import get_backend
+from tensordb.collections.query.build_query import build_query
+from tensordb.collections.query.conditions import compile_conditions, condition_shape
+from tensordb.fields import TensorField
+from tensordb.storage import TensorRef
 
 
 def test_basic_queries(tmp_path: Path) -> None:  # noqa: D103
@@ -27,3 +34,419 @@ def test_basic_queries(tmp_path: Path) -> None:  # noqa: D103
     assert result[0]["field1"] == test_i
     assert result[0]["field2"] == f"test{test_i}"
     assert result[0]["id"] == test_i + 1
+
+
+def test_tensor_queries(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"name": str, "tensor": TensorField(dtype=np.float32, shape=(None, 3))})
+
+    tensors = [np.random.rand(i + 1, 3).astype(np.float32) for i in range(5)]
+    coll.insert([{"name": f"test{i}", "tensor": tensor} for i, tensor in enumerate(tensors)])
+
+    result = coll.find().execute()
+    assert len(result) == len(tensors)
+
+    for row, tensor in zip(result, tensors):
+        assert row["tensor"].dtype == np.float32
+        np.testing.assert_array_equal(row["tensor"], tensor)
+
+    result = coll.find({"name": "test3"}).select(["tensor"]).execute()
+    assert list(result[0].keys()) == ["tensor"]
+    np.testing.assert_array_equal(result[0]["tensor"], tensors[3])
+
+    with pytest.raises(ValueError):
+        coll.insert({"name": "wrong_shape", "tensor": np.zeros((2, 4), dtype=np.float32)})
+
+    with pytest.raises(ValueError):
+        coll.find({"tensor": 1}).execute()
+
+
+def test_streaming_queries(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"number": int, "tensor": TensorField(dtype=np.int64, shape=(2,))})
+
+    num_rows = 25
+    coll.insert_columns({"number": list(range(num_rows)), "tensor": np.arange(2 * num_rows).reshape(num_rows, 2)})
+
+    batches = list(coll.find().iter_batches(batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    assert [row["id"] for row in coll.find()] == [row["id"] for batch in batches for row in batch]
+
+    for i, row in enumerate(coll.find().iter(batch_size=4)):
+        assert row["number"] == i
+        np.testing.assert_array_equal(row["tensor"], [2 * i, 2 * i + 1])
+
+    assert [row["number"] for row in coll.find({"number": 3})] == [3]
+
+
+def test_parallel_decoding(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"number": int, "tensor": TensorField(np.float32, (None, 8), codec="zlib")})
+
+    tensors = [np.random.rand(i % 7 + 1, 8).astype(np.float32) for i in range(50)]
+    coll.insert_columns({"number": list(range(50)), "tensor": tensors})
+
+    for workers in [None, 1, 4]:
+        rows = coll.find().execute(workers=workers)
+        assert [row["number"] for row in rows] == list(range(50))
+        for row, tensor in zip(rows, tensors):
+            np.testing.assert_array_equal(row["tensor"], tensor)
+
+    batches = list(coll.find().iter_batches(batch_size=7, workers=2, in_flight=3))
+    assert [len(batch) for batch in batches] == [7] * 7 + [1]
+    assert [row["number"] for batch in batches for row in batch] == list(range(50))
+
+    rows = list(coll.find({"number": {"$gte": 10}}).iter(batch_size=4, workers=4, in_flight=1))
+    assert [row["number"] for row in rows] == list(range(10, 50))
+    np.testing.assert_array_equal(rows[-1]["tensor"], tensors[-1])
+
+    # Stopping early drops the batches decoded ahead
+    for row in coll.find().iter(batch_size=2, workers=2):
+        if row["number"] == 3:
+            break
+
+    assert list(coll.find({"number": -1}).iter_batches(workers=2)) == []
+
+
+def test_columnar_queries(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection(
+        "test",
+        fields={
+            "number": int,
+            "name": str,
+            "fixed": TensorField(dtype=np.float32, shape=(2, 3)),
+            "variable": TensorField(dtype=np.int32, shape=(None,)),
+        },
+    )
+
+    num_rows = 6
+    fixed = np.random.rand(num_rows, 2, 3).astype(np.float32)
+    variable = [np.arange(i, dtype=np.int32) for i in range(num_rows)]
+
+    # Insert in two parts, so rows are spread over a block and single writes
+    coll.insert_columns(
+        {"number": list(range(3)), "name": ["a", "b", "c"], "fixed": fixed[:3], "variable": variable[:3]}
+    )
+    coll.insert([{"number": i, "name": "d", "fixed": fixed[i], "variable": variable[i]} for i in range(3, num_rows)])
+
+    columns = coll.find().to_columns()
+
+    np.testing.assert_array_equal(columns["id"], np.arange(1, num_rows + 1))
+    np.testing.assert_array_equal(columns["number"], np.arange(num_rows))
+    assert columns["number"].dtype == np.int64
+    assert list(columns["name"]) == ["a", "b", "c", "d", "d", "d"]
+    assert columns["fixed"].shape == (num_rows, 2, 3)
+    np.testing.assert_array_equal(columns["fixed"], fixed)
+    assert isinstance(columns["variable"], list)
+    for recovered, expected in zip(columns["variable"], variable):
+        np.testing.assert_array_equal(recovered, expected)
+
+    with pytest.raises(ValueError):
+        coll.find().to_numpy()
+
+    arrays = coll.find({"number": 3}).select(["fixed", "variable"]).to_numpy()
+    np.testing.assert_array_equal(arrays["fixed"], fixed[3:4])
+    np.testing.assert_array_equal(arrays["variable"], variable[3][None])
+
+    empty = coll.find({"name": "missing"}).to_columns()
+    assert empty["number"].shape == (0,)
+    assert empty["fixed"].shape == (0, 2, 3)
+
+
+def test_columns_with_missing_values(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "score": float, "name": str})
+    coll.insert([{"number": 1, "score": 0.5, "name": "a"}, {"number": None, "score": None, "name": None}])
+
+    columns = coll.find().to_columns()
+    np.testing.assert_array_equal(columns["number"], [1, np.nan])
+    assert columns["number"].dtype == np.float64
+    np.testing.assert_array_equal(columns["score"], [0.5, np.nan])
+    assert columns["name"].tolist() == ["a", None]
+
+    assert coll.find({"number": 1}).to_columns()["number"].dtype == np.int64
+
+
+def test_query_operators(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"number": int, "name": str})
+    coll.insert_columns({"number": list(range(200)), "name": [f"test{i % 10}" for i in range(200)]})
+
+    def numbers(query: dict) -> list[int]:
+        return [row["number"] for row in coll.find(query)]
+
+    assert numbers({"number": {"$gte": 195}}) == [195, 196, 197, 198, 199]
+    assert numbers({"number": {"$gt": 3, "$lte": 5}}) == [4, 5]
+    assert numbers({"number": {"$lt": 3}}) == [0, 1, 2]
+    assert numbers({"number": {"$lt": 20}, "name": {"$ne": "test1"}}) == [i for i in range(20) if i % 10 != 1]
+    assert numbers({"number": {"$in": [3, 7, 500]}}) == [3, 7]
+    assert numbers({"number": {"$in": []}}) == []
+    assert numbers({"$or": [{"number": 1}, {"number": {"$gt": 198}}]}) == [1, 199]
+    assert numbers({"name": "test3", "$or": [{"number": 3}, {"number": 13}]}) == [3, 13]
+    assert numbers({}) == list(range(200))
+
+    # Large lists are bound as a single parameter
+    large = list(range(0, 400, 3))
+    assert numbers({"number": {"$in": large}}) == [i for i in range(200) if i % 3 == 0]
+    assert numbers({"number": {"$nin": large}}) == [i for i in range(200) if i % 3 != 0]
+
+    coll.create_index("number")
+    assert any("USING" in step and "INDEX" in step for step in coll.find({"number": {"$in": large}}).explain())
+    assert any("USING" in step and "INDEX" in step for step in coll.find({"number": {"$gt": 100}}).explain())
+
+    with pytest.raises(ValueError):
+        coll.find({"number": {"$regex": "a"}}).execute()
+
+    # Numpy scalars, e.g. from the results of to_numpy, compare as Python values
+    assert numbers({"number": {"$in": list(np.arange(5))}}) == [0, 1, 2, 3, 4]
+    assert numbers({"number": {"$in": list(np.arange(0, 400, 3))}}) == [i for i in range(200) if i % 3 == 0]
+    assert numbers({"number": {"$gt": np.int64(197)}}) == [198, 199]
+    assert numbers({"number": np.int32(5), "name": np.str_("test5")}) == [5]
+
+    # Missing values match $ne and $nin
+    coll.insert_columns({"number": [None] * 5, "name": ["test1"] * 5})
+    assert len(numbers({"number": {"$ne": 1}})) == 204
+    assert len(numbers({"number": {"$nin": [1, 2]}})) == 203
+    assert len(numbers({"number": {"$nin": large}})) == 138
+    assert len(numbers({"number": {"$gt": 1}})) == 198
+    assert numbers({"number": None}) == [None] * 5
+
+    with pytest.raises(ValueError):
+        coll.find({"$or": []}).execute()
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        {},
+        {"number": 3},
+        {"number": None, "name": {"$ne": None}},
+        {"number": {"$gt": 3, "$lte": 5}, "name": "test1"},
+        {"number": {"$in": [1, 2, 3]}, "name": {"$nin": []}},
+        {"number": {"$in": list(range(100))}},
+        {"number": {"$in": list(np.arange(100))}, "points.$max": np.float32(0.5)},
+        {"$or": [{"number": 1}, {"$and": [{"number": {"$gt": 5}}, {"name": {"$in": ["a", "b"]}}]}]},
+        {"points.$max": {"$lt": 0.5}, "points.$shape.0": 3},
+    ],
+)
+def test_condition_shape(conditions: dict) -> None:  # noqa: D103
+    fields = {"number": int, "name": str, "points": TensorField(np.float32, (None, 3))}
+
+    _, parameters = compile_conditions(conditions, fields)
+    shape, shape_parameters = condition_shape(conditions)
+
+    assert shape_parameters == parameters
+    assert isinstance(hash(shape), int)
+
+
+def test_query_plan_cache(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "name": str})
+    coll.insert_columns({"number": list(range(100)), "name": [f"test{i % 10}" for i in range(100)]})
+
+    backend = get_backend(tmp_path / "test_db")
+    fields = backend.catalog.fields("test", backend.cursor())
+
+    def build(conditions: dict | None, selected: list[str] | None = None) -> tuple:
+        return build_query("test", conditions, selected, backend, fields)
+
+    _, sql_query, parameters = build({"number": {"$gt": 5}, "name": "test1"})
+    assert parameters == (5, "test1")
+    assert build({"number": {"$gt": 50}, "name": "test2"}) == (["id", "number", "name"], sql_query, (50, "test2"))
+    assert len(backend.plans) == 1
+
+    # Different operators, set sizes and selected fields are different queries
+    assert build({"number": {"$gte": 5}, "name": "test1"})[1] != sql_query
+    assert build({"number": {"$in": [1, 2]}})[1] != build({"number": {"$in": [1, 2, 3]}})[1]
+    assert build(None, ["name"])[0] == ["name"]
+    assert len(backend.plans) == 5
+
+    # Large sets are one query for all sizes
+    build({"number": {"$in": list(range(100))}})
+    build({"number": {"$in": list(range(200))}})
+    assert len(backend.plans) == 6
+
+    # The ordering is part of the query, the limit is a parameter
+    fields_selected, ordered_query, _ = build_query("test", None, None, backend, fields, order_by=["number"], limit=5)
+    assert build_query("test", None, None, backend, fields, order_by=["number"], limit=9) == (
+        fields_selected,
+        ordered_query,
+        (9,),
+    )
+    assert build_query("test", None, None, backend, fields, order_by=["name"], limit=5)[1] != ordered_query
+    assert build_query("test", None, None, backend, fields, order_by=["number"])[1] != ordered_query
+
+    backend.close()
+
+    def numbers(query: dict) -> list[int]:
+        return [row["number"] for row in coll.find(query).select(["number"])]
+
+    for i in range(10):
+        assert numbers({"name": f"test{i}", "number": {"$lt": 30}}) == [i, i + 10, i + 20]
+        assert numbers({"number": {"$in": list(range(i, 200, 2))}}) == list(range(i, 100, 2))
+
+    # Invalid conditions are rejected every time, and are never cached
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            coll.find({"number": 1, "name": {"$regex": "a"}}).execute()
+
+    assert numbers({"name": None}) == []
+
+
+def test_tensor_statistics_queries(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"number": int, "points": TensorField(dtype=np.float32, shape=(None, 3))})
+
+    points = [np.full((i + 1, 3), i / 10, dtype=np.float32) for i in range(20)]
+    coll.insert_columns({"number": list(range(10)), "points": points[:10]})
+    coll.insert([{"number": i, "points": points[i]} for i in range(10, 20)])
+
+    def numbers(query: dict) -> list[int]:
+        return [row["number"] for row in coll.find(query).select(["number"])]
+
+    assert numbers({"points.$max": {"$lt": 0.25}}) == [0, 1, 2]
+    assert numbers({"points.$min": {"$gte": 1.75}}) == [18, 19]
+    assert numbers({"points.$shape.0": {"$gt": 18}}) == [18, 19]
+    assert numbers({"points.$shape.1": 3, "points.$ndim": 2}) == list(range(20))
+    assert numbers({"points.$nbytes": 3 * 4}) == [0]
+    assert numbers({"points.$mean": {"$gt": 1.85}}) == [19]
+    norm = float(np.linalg.norm(points[5]))
+    assert numbers({"points.$norm": {"$gt": norm - 1e-4, "$lt": norm + 1e-4}}) == [5]
+
+    # Same statistics for rows inserted as a block
+    block = np.arange(12, dtype=np.float32).reshape(2, 2, 3)
+    coll.insert_columns({"number": [100, 101], "points": block})
+    assert numbers({"points.$max": 11}) == [101]
+    assert numbers({"points.$min": 0, "points.$mean": 2.5}) == [100]
+
+    coll.create_index("points.$max")
+    assert any("INDEX" in step for step in coll.find({"points.$max": {"$lt": 0.25}}).explain())
+    assert numbers({"points.$max": {"$lt": 0.25}}) == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        coll.find({"points.$median": 1}).execute()
+
+
+def test_uint64_statistics(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "tensor": TensorField(np.uint64, (2,))})
+
+    large = np.array([1, 2**63 + 5], dtype=np.uint64)
+    coll.insert({"number": 0, "tensor": large})
+    coll.insert_columns({"number": [1, 2], "tensor": np.array([[3, 4], [2**64 - 1, 2**64 - 1]], dtype=np.uint64)})
+
+    np.testing.assert_array_equal(coll.find({"number": 0}).execute()[0]["tensor"], large)
+
+    def numbers(query: dict) -> list[int]:
+        return [row["number"] for row in coll.find(query).select(["number"])]
+
+    assert numbers({"tensor.$max": {"$gt": 2**62}}) == [0, 2]
+    assert numbers({"tensor.$min": {"$lt": 2**62}}) == [0, 1]
+
+
+def test_lazy(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    fields = {
+        "number": int,
+        "image": TensorField(np.float32, (4, 5)),
+        "series": TensorField(np.int64, (None,), codec="zlib", chunk_rows=10),
+    }
+    collection = db.collection("test", fields=fields)
+
+    images = np.random.rand(3, 4, 5).astype(np.float32)
+    series = [np.arange(25 * (i + 1)) for i in range(3)]
+    collection.insert([{"number": i, "image": images[i], "series": series[i]} for i in range(3)])
+
+    rows = collection.find({"number": {"$gte": 1}}).lazy().execute()
+    assert [row["number"] for row in rows] == [1, 2]
+
+    for row, image, tensor in zip(rows, images[1:], series[1:]):
+        assert isinstance(row["image"], TensorRef)
+        assert row["image"].shape == (4, 5)
+        assert row["image"].dtype == np.float32
+        assert row["image"].nbytes == image.nbytes
+        assert row["series"].shape == tensor.shape
+
+        np.testing.assert_array_equal(row["image"].load(), image)
+        np.testing.assert_array_equal(np.asarray(row["series"]), tensor)
+        np.testing.assert_array_equal(np.asarray(row["image"], dtype=np.float64), image.astype(np.float64))
+
+    rows = list(collection.find().select({"number": None, "series": np.s_[5:15]}).lazy().iter(batch_size=2))
+    assert [row["series"].shape for row in rows] == [(10,)] * 3
+    np.testing.assert_array_equal(rows[2]["series"].load(), series[2][5:15])
+
+
+def test_order_and_limit(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "tensor": TensorField(np.float64, (None,))})
+    coll.insert([{"number": (i * 7) % 10, "tensor": np.arange(i + 1, dtype=np.float64)} for i in range(20)])
+
+    rows = coll.find().order_by("number").select(["id", "number"]).execute()
+    assert [row["number"] for row in rows] == sorted(row["number"] for row in rows)
+    # Equal values are ordered by id
+    assert [row["id"] for row in rows if row["number"] == 3] == sorted(row["id"] for row in rows if row["number"] == 3)
+
+    rows = coll.find({"number": {"$gt": 2}}).order_by(["tensor.$shape.0"], descending=True).limit(3).execute()
+    assert [len(row["tensor"]) for row in rows] == [20, 19, 18]
+
+    columns = coll.find().select(["number"]).order_by("number", descending=True).limit(5).to_numpy()
+    np.testing.assert_array_equal(columns["number"], [9, 9, 8, 8, 7])
+
+    with pytest.raises(ValueError):
+        coll.find().order_by("tensor").execute()
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages(tmp_path: Path, descending: bool) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "name": str})
+    names = [f"name{i % 7}" if i % 5 else None for i in range(50)]
+    coll.insert_columns({"number": list(range(50)), "name": names})
+    coll.create_index("name", unique=False)
+
+    for order_by in [None, "name"]:
+        query = coll.find({"number": {"$ne": 10}}).select(["number", "name"]).limit(6)
+        if order_by is not None:
+            query.order_by(order_by, descending=descending)
+        expected = query.execute() if order_by is not None else None
+
+        rows, token, num_pages = [], None, 0
+        while True:
+            page = query.page(after=token)
+            rows.extend(page.rows)
+            num_pages += 1
+            if page.next is None:
+                break
+            token = page.next
+
+        assert num_pages == 9
+        assert len(rows) == 49
+        if order_by is None:
+            assert [row["number"] for row in rows] == [i for i in range(50) if i != 10]
+        else:
+            assert [row["number"] for row in rows[:6]] == [row["number"] for row in expected[:6]]
+            assert [row["number"] for row in rows] == [
+                row["number"]
+                for row in sorted(
+                    rows,
+                    key=lambda row: (row["name"] is not None, row["name"] or "", row["number"]),
+                    reverse=descending,
+                )
+            ]
+
+    # Pages are read with the index, after the last row instead of after skipping rows
+    assert "USING INDEX" in " ".join(coll.find().order_by("name").limit(6).explain())
+
+    with pytest.raises(ValueError):
+        coll.find().order_by("number").limit(6).page(after=page.next or query.page().next)
+
+    with pytest.raises(ValueError):
+        coll.find().limit(6).page(after="invalid")
@@ -0,0 +1,118 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from tensordb import Database
+from tensordb.collections.vectors import nearest
+from tensordb.fields import TensorField
+
+
+def expected_neighbors(vectors: np.ndarray, query: np.ndarray, k: int, metric: str) -> list[int]:  # noqa: D103
+    if metric == "l2":
+        distances = np.linalg.norm(vectors - query, axis=1)
+    elif metric == "cosine":
+        distances = 1 - vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    else:
+        distances = -(vectors @ query)
+
+    return (np.argsort(distances, kind="stable")[:k] + 1).tolist()
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine", "ip"])
+def test_nearest_brute_force(tmp_path: Path, metric: str) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"label": int, "embedding": TensorField(dtype=np.float32, shape=(8,))})
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 8)).astype(np.float32)
+    labels = np.arange(500) % 2
+    coll.insert_columns({"label": labels, "embedding": vectors})
+
+    query = rng.normal(size=8)
+
+    neighbors = coll.nearest("embedding", query, k=5, metric=metric)
+    assert [row["id"] for row, _ in neighbors] == expected_neighbors(vectors, query, 5, metric)
+    assert [distance for _, distance in neighbors] == sorted(distance for _, distance in neighbors)
+    np.testing.assert_array_equal(neighbors[0][0]["embedding"], vectors[neighbors[0][0]["id"] - 1])
+
+    neighbors = coll.nearest("embedding", query, k=5, metric=metric, where={"label": 1})
+    expected = np.flatnonzero(labels == 1)[np.array(expected_neighbors(vectors[labels == 1], query, 5, metric)) - 1]
+    assert [row["id"] for row, _ in neighbors] == (expected + 1).tolist()
+
+
+def test_vector_index(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"embedding": TensorField(dtype=np.float32, shape=(4,))})
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(10, 4)) * 10
+    vectors = (centers[np.arange(1000) % 10] + rng.normal(size=(1000, 4))).astype(np.float32)
+    coll.insert_columns({"embedding": vectors[:800]})
+
+    coll.create_vector_index("embedding", n_lists=10)
+
+    # Rows inserted after the index was built are added to it
+    coll.insert_columns({"embedding": vectors[800:]})
+
+    query = centers[3]
+    exact = expected_neighbors(vectors, query, 10, "l2")
+
+    # Probing all lists is exact
+    neighbors = Database("test_db", tmp_path).collection("test").nearest("embedding", query, k=10, n_probe=10)
+    assert [row["id"] for row, _ in neighbors] == exact
+
+    # Probing a single list finds the neighbors in the cluster of the query
+    neighbors = coll.nearest("embedding", query, k=10, n_probe=1)
+    assert len(set(row["id"] for row, _ in neighbors) & set(exact)) >= 8
+
+    with pytest.raises(ValueError):
+        coll.create_vector_index("embedding")
+
+    coll.drop_vector_index("embedding")
+    assert [row["id"] for row, _ in coll.nearest("embedding", query, k=10)] == exact
+
+
+def test_nearest_invalid_field(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+
+    coll = db.collection("test", fields={"name": str, "points": TensorField(dtype=np.float32, shape=(None, 3))})
+
+    with pytest.raises(ValueError):
+        coll.nearest("name", np.zeros(3))
+
+    with pytest.raises(ValueError):
+        coll.nearest("points", np.zeros(3))
+
+
+def test_vector_index_after_update(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"vector": TensorField(np.float32, (2,))})
+
+    vectors = np.concatenate([np.zeros((20, 2)), np.full((20, 2), 10)]).astype(np.float32)
+    collection.insert_columns({"vector": vectors})
+    collection.create_vector_index("vector", n_lists=2)
+
+    collection.update({"id": 1}, {"vector": np.full(2, 10)})
+
+    neighbors = collection.nearest("vector", np.full(2, 10), k=21, n_probe=1)
+    assert 1 in [row["id"] for row, _ in neighbors], "Updated rows should move to the list of their new vector"
+
+
+def test_nearest_concurrent_delete(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    coll = db.collection("test", fields={"number": int, "vector": TensorField(np.float32, (2,))})
+    coll.insert_columns({"number": list(range(10)), "vector": np.arange(20, dtype=np.float32).reshape(10, 2)})
+
+    def search_then_delete(*args: Any) -> list[tuple[int, float]]:
+        neighbors = nearest(*args)
+        coll.delete({"number": 1})
+        return neighbors
+
+    # The row is deleted after the search, before the rows are read
+    monkeypatch.setattr("tensordb.collections.collection.nearest", search_then_delete)
+
+    neighbors = coll.nearest("vector", np.array([2.0, 3.0]), k=3)
+    assert [row["number"] for row, _ in neighbors] == [0, 2]
@@ -1,3 +1,4 @@
+import threading
 from pathlib import Path
 
 import numpy as np
@@ -62,3 +63,122 @@ def test_database_get_collections(tmp_path: Path) -> None:  # noqa: D103
     assert len(recovered_names) == 2, "The number of collections is not correct"
 
     assert set(recovered_names) == set(collection_names), "The collections are not correct"
+
+
+def test_database_concurrent_readers_and_writer(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"value": int, "tensor": TensorField(dtype=np.float32, shape=(4,))})
+
+    num_batches = 20
+    batch_size = 50
+    errors = []
+    done = threading.Event()
+
+    def write() -> None:
+        try:
+            for batch in range(num_batches):
+                values = np.arange(batch * batch_size, (batch + 1) * batch_size)
+                collection.insert_columns(
+                    {"value": values, "tensor": np.repeat(values[:, None], 4, axis=1).astype(np.float32)}
+                )
+        except Exception as error:
+            errors.append(error)
+        finally:
+            done.set()
+
+    def read() -> None:
+        try:
+            while not done.is_set():
+                rows = collection.find({"value": {"$lt": 100}}).execute()
+                # Readers only ever see whole batches, and every tensor matches its row
+                assert len(rows) % batch_size == 0
+                assert all(np.all(row["tensor"] == row["value"]) for row in rows)
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writer = threading.Thread(target=write)
+
+    for thread in [*readers, writer]:
+        thread.start()
+    for thread in [*readers, writer]:
+        thread.join()
+
+    assert errors == []
+    assert len(collection.find().execute()) == num_batches * batch_size
+
+    db.close()
+
+
+def test_database_reopen_after_close(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"tensor": TensorField(dtype=np.int64, shape=(2,))})
+    collection.insert({"tensor": np.array([1, 2])})
+    db.close()
+
+    db = Database("test_db", tmp_path)
+    rows = db.collection("test").find().execute()
+
+    assert len(rows) == 1
+    np.testing.assert_array_equal(rows[0]["tensor"], [1, 2])
+
+
+def test_database_stats(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"value": int, "tensor": TensorField(dtype=np.float32, shape=(4,))})
+    db.reset_stats()
+
+    collection.insert_columns({"value": [1, 2], "tensor": np.zeros((2, 4), dtype=np.float32)})
+    collection.insert({"value": 3, "tensor": np.zeros(4, dtype=np.float32)})
+    rows = collection.find().execute()
+
+    stats = db.stats()
+
+    assert len(rows) == 3
+    assert stats["commit"].count == 2
+    assert stats["tensor.encode"].count == 2
+    assert stats["tensor.encode"].nbytes == 3 * 16
+    assert stats["tensor.decode"].nbytes == 3 * 16
+    assert stats["catalog.lookup"].count == 3
+    assert stats["sql.build"].count == 1
+    assert all(operation.seconds >= 0 for operation in stats.values())
+
+    db.reset_stats()
+    assert db.stats() == {}
+
+
+def test_database_tensor_cache(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path, cache_bytes=1000)
+    collection = db.collection("test", fields={"name": str, "tensor": TensorField(np.float64, (10,))})
+    collection.insert([{"name": f"row{i}", "tensor": np.full(10, i)} for i in range(20)])
+
+    collection.find({"id": {"$in": [1, 2]}}).execute()
+    rows = collection.find({"id": {"$in": [1, 2]}}).select(["tensor"]).execute()
+
+    assert [list(row.keys()) for row in rows] == [["tensor"], ["tensor"]], "The id should only be used for the cache"
+    assert not rows[0]["tensor"].flags.writeable
+    stats = db.cache_stats()
+    assert (stats.hits, stats.misses, stats.entries, stats.nbytes) == (2, 2, 2, 160)
+
+    collection.update({"id": 1}, {"tensor": np.full(10, 100)})
+    np.testing.assert_array_equal(collection.find({"id": 1}).execute()[0]["tensor"], np.full(10, 100))
+
+    collection.delete({"id": 2})
+    assert db.cache_stats().entries == 1
+
+    collection.find().execute()
+    stats = db.cache_stats()
+    assert stats.evictions > 0
+    assert stats.nbytes <= 1000
+
+    db.reset_stats()
+    assert db.cache_stats().hits == 0
+
+
+def test_database_tensor_cache_disabled(tmp_path: Path) -> None:  # noqa: D103
+    db = Database("test_db", tmp_path)
+    collection = db.collection("test", fields={"tensor": TensorField(np.float64, (10,))})
+    collection.insert({"tensor": np.zeros(10)})
+
+    collection.find().execute()
+    assert db.cache_stats().misses == 0
@@ -0,0 +1,60 @@
+import numpy as np
+from tensordb.storage import TensorCache
+
+
+def test_lru_eviction() -> None:  # noqa: D103
+    cache = TensorCache(max_bytes=300)
+    tensors = {row_id: np.full(10, row_id, dtype=np.float64) for row_id in range(4)}
+
+    for row_id in range(3):
+        cache.put(("coll", row_id, "tensor"), tensors[row_id], cache.epoch("coll"))
+
+    assert cache.get(("coll", 0, "tensor")) is not None
+    cache.put(("coll", 3, "tensor"), tensors[3], cache.epoch("coll"))
+
+    assert cache.get(("coll", 1, "tensor")) is None, "The least recently used tensor should be evicted"
+    for row_id in (0, 2, 3):
+        np.testing.assert_array_equal(cache.get(("coll", row_id, "tensor")), tensors[row_id])
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (4, 1, 1)
+    assert (stats.entries, stats.nbytes, stats.max_bytes) == (3, 240, 300)
+
+
+def test_cached_tensors_are_read_only() -> None:  # noqa: D103
+    cache = TensorCache(max_bytes=1000)
+    tensor = np.arange(10)
+
+    cached = cache.put(("coll", 1, "tensor"), tensor, cache.epoch("coll"))
+
+    assert not cached.flags.writeable
+    assert tensor.flags.writeable, "The given tensor should stay writeable"
+
+
+def test_invalidate() -> None:  # noqa: D103
+    cache = TensorCache(max_bytes=1000)
+
+    epoch = cache.epoch("coll")
+    for row_id in range(3):
+        cache.put(("coll", row_id, "a"), np.zeros(2), epoch)
+        cache.put(("coll", row_id, "b"), np.zeros(2), epoch)
+    cache.put(("other", 0, "a"), np.zeros(2), cache.epoch("other"))
+
+    cache.invalidate("coll", [0, 2])
+    assert [cache.get(("coll", row_id, "a")) is not None for row_id in range(3)] == [False, True, False]
+    assert cache.get(("coll", 1, "b")) is not None
+
+    cache.put(("coll", 0, "a"), np.zeros(2), epoch)
+    assert cache.get(("coll", 0, "a")) is None, "Tensors read before an invalidation should not be cached"
+
+    cache.invalidate("coll")
+    assert cache.stats().entries == 1
+    assert cache.stats().nbytes == 16
+
+
+def test_disabled() -> None:  # noqa: D103
+    cache = TensorCache(max_bytes=0)
+    cache.put(("coll", 0, "a"), np.zeros(2), 0)
+
+    assert not cache.enabled
+    assert cache.stats().entries == 0
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from tensordb.storage.chunks import leading_range
+
+
+@pytest.mark.parametrize(
+    "index",
+    [
+        None,
+        np.s_[3:17],
+        np.s_[-5:],
+        np.s_[::3],
+        np.s_[15:2:-2],
+        np.s_[::-1],
+        np.s_[30:40],
+        np.s_[4],
+        np.s_[-1],
+        np.s_[2:9, 1],
+        np.s_[..., 0],
+        np.s_[[1, 5, 7]],
+    ],
+)
+def test_leading_range(index: object) -> None:  # noqa: D103
+    array = np.arange(20 * 3).reshape(20, 3)
+
+    start, stop, local_index = leading_range(index, len(array))
+
+    expected = array if index is None else array[index]
+    np.testing.assert_array_equal(array[start:stop][local_index], expected)
+
+
+def test_leading_range_out_of_bounds() -> None:  # noqa: D103
+    with pytest.raises(IndexError):
+        leading_range(20, 20)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from tensordb.storage import CODECS
+from tensordb.storage.codecs import decode_tensor, encode_tensor, parallel_map
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, np.float32, np.float64, np.int64])
+def test_encode_decode(codec: str, dtype: type) -> None:  # noqa: D103
+    arrays = [
+        np.arange(60).reshape(3, 4, 5).astype(dtype),
+        np.zeros((0, 3), dtype=dtype),
+        np.array(7, dtype=dtype),
+    ]
+
+    for array in arrays:
+        data = encode_tensor(array, codec)
+        assert data.dtype == np.uint8 or codec == "none"
+
+        decoded = decode_tensor(data.reshape(-1).view(np.uint8), codec, array.dtype, array.shape)
+        assert decoded.dtype == array.dtype
+        np.testing.assert_array_equal(decoded, array)
+
+
+def test_delta_wraps_around() -> None:  # noqa: D103
+    array = np.array([np.iinfo(np.int64).min, np.iinfo(np.int64).max, -1, 0], dtype=np.int64)
+
+    decoded = decode_tensor(encode_tensor(array, "delta+zlib"), "delta+zlib", array.dtype, array.shape)
+    np.testing.assert_array_equal(decoded, array)
+
+
+def test_compression_ratio() -> None:  # noqa: D103
+    mask = np.zeros((256, 256), dtype=np.uint8)
+    mask[64:192, 64:192] = 1
+
+    for codec in ("zlib", "lzma", "shuffle+zlib", "delta+zlib"):
+        assert encode_tensor(mask, codec).nbytes < mask.nbytes / 20, f"{codec} should compress a mask"
+
+
+def test_parallel_map() -> None:  # noqa: D103
+    items = list(range(1000))
+    assert parallel_map(lambda item: item * 2, items) == [item * 2 for item in items]
+    assert parallel_map(lambda item: item, []) == []
+
+    for workers in [1, 3, 2000]:
+        assert parallel_map(lambda item: item * 2, items, workers) == [item * 2 for item in items]
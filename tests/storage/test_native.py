@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from tensordb.storage import NATIVE_AVAILABLE
+from tensordb.storage.native import gather_rows, row_statistics
+
+pytestmark = pytest.mark.skipif(not NATIVE_AVAILABLE, reason="The tensordb_cpp extension is not built")
+
+
+@pytest.mark.parametrize("dtype", [np.bool_, np.int8, np.uint16, np.int64, np.float32, np.float64])
+def test_row_statistics_matches_numpy(dtype: np.dtype) -> None:  # noqa: D103
+    rows = (np.random.default_rng(0).random((5, 7)) * 100).astype(dtype)
+
+    minimum = np.empty(5, dtype=dtype)
+    maximum = np.empty(5, dtype=dtype)
+    mean = np.empty(5)
+    norm = np.empty(5)
+    row_statistics(rows, minimum, maximum, mean, norm)
+
+    as_float = rows.astype(np.float64)
+    np.testing.assert_array_equal(minimum, rows.min(axis=1))
+    np.testing.assert_array_equal(maximum, rows.max(axis=1))
+    np.testing.assert_allclose(mean, as_float.mean(axis=1))
+    np.testing.assert_allclose(norm, np.linalg.norm(as_float, axis=1))
+
+
+def test_row_statistics_nan() -> None:  # noqa: D103
+    rows = np.array([[1.0, np.nan, 3.0]])
+    minimum, maximum, mean, norm = np.empty(1), np.empty(1), np.empty(1), np.empty(1)
+
+    row_statistics(rows, minimum, maximum, mean, norm)
+
+    assert np.isnan(minimum[0]) and np.isnan(maximum[0]) and np.isnan(mean[0])
+
+
+def test_gather_rows() -> None:  # noqa: D103
+    buffer = np.arange(16, dtype=np.uint8)
+    out = np.zeros((3, 4), dtype=np.uint8)
+
+    gather_rows(buffer, np.array([12, 0, 4]), np.array([0, 2, 1]), out)
+
+    np.testing.assert_array_equal(out, [[12, 13, 14, 15], [4, 5, 6, 7], [0, 1, 2, 3]])
+
+    with pytest.raises(IndexError):
+        gather_rows(buffer, np.array([14]), np.array([0]), out)
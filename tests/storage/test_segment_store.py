@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import numpy as np
+from tensordb.storage import SegmentStore
+
+
+def test_append_and_read(tmp_path: Path) -> None:  # noqa: D103
+    store = SegmentStore(tmp_path, alignment=64)
+
+    arrays = [
+        np.arange(10, dtype=np.float32),
+        np.arange(12, dtype=np.int64).reshape(3, 4),
+        np.zeros((0, 3), dtype=np.float64),
+        np.array(7, dtype=np.int16),
+    ]
+
+    locations = [store.append("coll", array) for array in arrays]
+
+    for (segment, offset), array in zip(locations, arrays):
+        assert offset % 64 == 0, "Tensors should be aligned"
+
+        recovered = store.read("coll", segment, offset, array.dtype, array.shape)
+        assert recovered.dtype == array.dtype
+        np.testing.assert_array_equal(recovered, array)
+
+    recovered = store.read("coll", *locations[0], np.float32, (10,))
+    assert isinstance(recovered, np.memmap), "Reads should be memory mapped"
+    assert not recovered.flags.writeable, "Reads should be read-only"
+
+
+def test_segment_rollover(tmp_path: Path) -> None:  # noqa: D103
+    store = SegmentStore(tmp_path, segment_max_bytes=256, alignment=8)
+
+    arrays = [np.full(16, i, dtype=np.float64) for i in range(5)]
+    locations = [store.append("coll", array) for array in arrays]
+
+    assert len({segment for segment, _ in locations}) > 1, "Full segments should roll over"
+
+    for (segment, offset), array in zip(locations, arrays):
+        np.testing.assert_array_equal(store.read("coll", segment, offset, np.float64, (16,)), array)
+
+    store.close()
+
+    # Reopening keeps appending after the existing data.
+    store = SegmentStore(tmp_path, segment_max_bytes=256, alignment=8)
+    segment, offset = store.append("coll", arrays[0])
+    assert (segment, offset) > locations[-1]
+
+    for (segment, offset), array in zip(locations, arrays):
+        np.testing.assert_array_equal(store.read("coll", segment, offset, np.float64, (16,)), array)
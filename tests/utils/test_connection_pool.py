@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+from tensordb.utils.sqlite.pool import ConnectionPool
+
+
+def test_connection_pool_wal(tmp_path: Path) -> None:  # noqa: D103
+    pool = ConnectionPool(tmp_path / "db.db")
+
+    journal_mode = pool.reader().execute("pragma journal_mode").fetchone()[0]
+
+    assert journal_mode == "wal"
+
+    pool.close()
+
+
+def test_connection_pool_reader_per_thread(tmp_path: Path) -> None:  # noqa: D103
+    pool = ConnectionPool(tmp_path / "db.db")
+
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(pool.reader()))
+    thread.start()
+    thread.join()
+
+    assert pool.reader() is pool.reader()
+    assert connections[0] is not pool.reader()
+
+    pool.close()
+
+
+def test_connection_pool_readers_are_read_only(tmp_path: Path) -> None:  # noqa: D103
+    pool = ConnectionPool(tmp_path / "db.db")
+
+    with pool.writer() as connection:
+        connection.execute("create table test (value integer)")
+        connection.commit()
+
+    with pytest.raises(sqlite3.OperationalError):
+        pool.reader().execute("insert into test (value) values (1)")
+
+    pool.close()
+
+
+def test_connection_pool_readers_see_commits_only(tmp_path: Path) -> None:  # noqa: D103
+    pool = ConnectionPool(tmp_path / "db.db")
+
+    with pool.writer() as connection:
+        connection.execute("create table test (value integer)")
+        connection.commit()
+
+        connection.execute("insert into test (value) values (1)")
+        assert pool.reader().execute("select count(*) from test").fetchone()[0] == 0
+
+        connection.commit()
+        assert pool.reader().execute("select count(*) from test").fetchone()[0] == 1
+
+    pool.close()